@@ -0,0 +1,51 @@
+"""Import time of the embedding store modules, measured in a fresh interpreter with ``python -X importtime``.
+
+With ``--max-ms`` the script exits with 1 when a module takes longer, so it can guard the import time in CI.
+
+    PYTHONPATH=. python benchmarks/import_time.py --max-ms 1000
+"""
+import argparse
+import subprocess
+import sys
+from typing import List, Text
+
+MODULES = ["embestore.store.base", "embestore.store.torch", "embestore.store.jina", "embestore.store.onnx"]
+
+
+def import_ms(module: Text, repeat: int = 3) -> float:
+    """Best cumulative import time of ``module`` over ``repeat`` fresh interpreters, in milliseconds."""
+
+    timings: List[float] = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, check=True
+        )
+        for line in result.stderr.splitlines():
+            fields = [field.strip() for field in line.split("|")]
+            if len(fields) == 3 and fields[2] == module:
+                timings.append(int(fields[1]) / 1000)
+
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    slow = []
+    for module in args.modules:
+        milliseconds = import_ms(module, repeat=args.repeat)
+        print(f"{module:<24} {milliseconds:8.1f} ms")
+        if args.max_ms is not None and milliseconds > args.max_ms:
+            slow.append(module)
+
+    if slow:
+        print(f"Slower than {args.max_ms} ms: {', '.join(slow)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
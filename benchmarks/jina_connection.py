@@ -0,0 +1,74 @@
+"""Compare a new ``jina.Client`` per cache miss with the long-lived channel of ``JinaEmbeddingStore``.
+
+The benchmark serves a dummy embedding executor from a local in-process Jina flow, so only the client side costs are
+measured. The embeddings are also read from the documents and from the one blob of the ``/encode_blob`` endpoint.
+
+    PYTHONPATH=. python benchmarks/jina_connection.py --requests 200 --batch-size 2
+"""
+import argparse
+import time
+
+import numpy as np
+from jina import Client, Document, DocumentArray, Executor, Flow, requests
+
+from embestore.store.jina_connection import BLOB_ENDPOINT, JinaConnection, response_embeddings
+
+PORT = 54399
+HOST = f"grpc://0.0.0.0:{PORT}"
+EMBEDDING_DIM = 384
+
+
+class DummyEmbedding(Executor):
+    @requests
+    def encode(self, docs: DocumentArray, **kwargs):
+        docs.embeddings = np.ones((len(docs), EMBEDDING_DIM), dtype=np.float32)
+
+    @requests(on=BLOB_ENDPOINT)
+    def encode_blob(self, docs: DocumentArray, **kwargs):
+        embeddings = np.ones((len(docs), EMBEDDING_DIM), dtype=np.float32)
+        return DocumentArray(
+            [Document(blob=embeddings.tobytes(), tags={"dtype": embeddings.dtype.str, "shape": list(embeddings.shape)})]
+        )
+
+
+def _documents(batch_size: int) -> DocumentArray:
+    document_array = DocumentArray().empty(batch_size)
+    document_array.texts = [f"sentence {i}" for i in range(batch_size)]
+
+    return document_array
+
+
+def _latency_ms(post, n_requests: int, batch_size: int) -> float:
+    post(_documents(batch_size))
+    start = time.perf_counter()
+    for _ in range(n_requests):
+        post(_documents(batch_size))
+
+    return (time.perf_counter() - start) / n_requests * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=2)
+    args = parser.parse_args()
+
+    with Flow(port=PORT).add(uses=DummyEmbedding):
+        client = Client(host=HOST)
+        connection = JinaConnection(HOST)
+        posts = {
+            "new jina.Client per request": lambda docs: Client(host=HOST).post("/", docs),
+            "reused jina.Client": lambda docs: client.post("/", docs),
+            "JinaConnection": connection.post,
+            "JinaConnection embeddings": lambda docs: connection.post(docs, "/", response_embeddings),
+            "JinaConnection blob": lambda docs: connection.post(docs, BLOB_ENDPOINT, response_embeddings),
+        }
+        results = {name: _latency_ms(post, args.requests, args.batch_size) for name, post in posts.items()}
+        connection.close()
+
+    for name, latency in results.items():
+        print(f"{name:<30} {latency:8.2f} ms/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""CPU throughput of the sentence transformer run by torch, by ONNX Runtime and by the int8 quantized ONNX model.
+
+The model is called directly, without the cache, on sentences of mixed lengths.
+
+    PYTHONPATH=. python benchmarks/onnx_throughput.py --model sentence-transformers/all-MiniLM-L6-v2 --threads 4
+"""
+import argparse
+import random
+import tempfile
+import time
+from typing import Callable, List, Text
+
+import numpy as np
+
+from embestore.store.onnx import OnnxEmbeddingStore
+from embestore.store.torch import TorchEmbeddingStore
+
+WORDS = "the music cache embedding store sentence model retrieve listen want to and of a in".split()
+
+
+def _sentences(n_sentences: int, seed: int = 0) -> List[Text]:
+    generator = random.Random(seed)
+    return [" ".join(generator.choices(WORDS, k=generator.randint(3, 60))) for _ in range(n_sentences)]
+
+
+def _throughput(encode: Callable[[List[Text]], np.ndarray], sentences: List[Text]) -> float:
+    encode(sentences[:32])
+    start = time.perf_counter()
+    encode(sentences)
+
+    return len(sentences) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+    parser.add_argument("--sentences", type=int, default=2048)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    sentences = _sentences(args.sentences)
+    torch_store = TorchEmbeddingStore(model_name=args.model)
+    reference = torch_store.model.encode(sentences[:64])
+    with tempfile.TemporaryDirectory() as onnx_path:
+        stores = {
+            "torch": torch_store,
+            "onnx": OnnxEmbeddingStore(model_name=args.model, onnx_path=onnx_path, threads=args.threads),
+            "onnx int8": OnnxEmbeddingStore(
+                model_name=args.model, onnx_path=onnx_path, threads=args.threads, quantize=True
+            ),
+        }
+        for name, store in stores.items():
+            embeddings = store._retrieve_embeddings_from_model(sentences[:64])
+            cosine = (embeddings * reference).sum(axis=1) / (
+                np.linalg.norm(embeddings, axis=1) * np.linalg.norm(reference, axis=1)
+            )
+            throughput = _throughput(store._retrieve_embeddings_from_model, sentences)
+            print(f"{name:<10} {throughput:10.1f} sentences/s  min cosine to torch {cosine.min():.4f}")
+
+
+if __name__ == "__main__":
+    main()
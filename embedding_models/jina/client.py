@@ -10,3 +10,6 @@ if __name__ == "__main__":
 
     da_res = jina_client.post("/current_model")
     print(da_res.texts)
+
+    da_res = jina_client.post("/stats")
+    print(da_res[0].tags)
@@ -1,9 +1,17 @@
+import asyncio
 import logging
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
+import numpy as np
 from jina import Document, DocumentArray, Executor, requests
 from sentence_transformers import SentenceTransformer
 
+if TYPE_CHECKING:
+    from embestore.store.base import AsyncEmbeddingStore
+
 logger = logging.getLogger(__name__)
 
 SENTENCE_TRANSFORMER = os.environ.get(
@@ -12,17 +20,218 @@ SENTENCE_TRANSFORMER = os.environ.get(
 if SENTENCE_TRANSFORMER is None:
     raise ValueError("SENTENCE_TRANSFORMER should be defined in environment variable.")
 
-logger.info(f"Loading transformer model: {SENTENCE_TRANSFORMER}")
-model = SentenceTransformer(SENTENCE_TRANSFORMER).eval()
+BLOB_ENDPOINT = "/encode_blob"
+DEFAULT_BATCH_WINDOW_MS = 5.0
+DEFAULT_MAX_BATCH_SIZE = 64
+
+
+class EncodingBatcher:
+    """Encode the texts of the requests arriving within ``window_ms`` of each other in one model call.
+
+    The queued texts are sorted by their number of tokens and encoded by batches of up to ``max_batch_size`` texts,
+    so the texts of a forward pass are padded to similar lengths. The model runs in one thread next to the event
+    loop, the requests arriving meanwhile are queued for the next batch.
+    """
+
+    def __init__(self, encoder: SentenceTransformer, window_ms: float, max_batch_size: int) -> None:
+        if window_ms < 0:
+            raise ValueError("window_ms must not be negative")
+        if max_batch_size <= 0:
+            raise ValueError("max_batch_size must be larger than 0")
+
+        self.encoder = encoder
+        self.window_ms = window_ms
+        self.max_batch_size = max_batch_size
+        self._pending: List[Tuple[List[str], asyncio.Future]] = []
+        self._pending_size = 0
+        self._first_arrival = 0.0
+        self._full: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._model_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-model")
+        self._stats = {"requests": 0, "sentences": 0, "batches": 0, "tokens": 0, "padded_tokens": 0}
+        self._encode_seconds = 0.0
+
+    async def encode(self, texts: List[str]) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        if self._full is None:
+            self._full = asyncio.Event()
+        if not self._pending:
+            self._first_arrival = time.monotonic()
+
+        future = loop.create_future()
+        self._pending.append((texts, future))
+        self._pending_size += len(texts)
+        if self._pending_size >= self.max_batch_size:
+            self._full.set()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = loop.create_task(self._dispatch())
+
+        return await future
+
+    async def _dispatch(self) -> None:
+        while self._pending:
+            remaining = self.window_ms / 1000 - (time.monotonic() - self._first_arrival)
+            if remaining > 0 and not self._full.is_set():
+                try:
+                    await asyncio.wait_for(self._full.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    pass
+            self._full.clear()
+
+            pending, self._pending, self._pending_size = self._pending, [], 0
+            texts = [text for request_texts, _ in pending for text in request_texts]
+            self._stats["requests"] += len(pending)
+            try:
+                embeddings = await asyncio.get_running_loop().run_in_executor(
+                    self._model_thread, self._encode_sorted, texts
+                )
+            except Exception as error:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+
+            offset = 0
+            for request_texts, future in pending:
+                end = offset + len(request_texts)
+                if not future.done():
+                    future.set_result(embeddings[offset:end])
+                offset = end
+
+    def _encode_sorted(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.encoder.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        start = time.perf_counter()
+        lengths = np.array([len(ids) for ids in self.encoder.tokenizer(texts, truncation=True)["input_ids"]])
+        order = np.argsort(lengths, kind="stable")
+        batches = np.array_split(order, -(-len(texts) // self.max_batch_size))
+        encoded = np.concatenate(
+            [
+                self.encoder.encode([texts[i] for i in batch], batch_size=len(batch), convert_to_numpy=True)
+                for batch in batches
+            ]
+        )
+        embeddings = np.empty_like(encoded, dtype=np.float32)
+        embeddings[order] = encoded
+
+        self._encode_seconds += time.perf_counter() - start
+        self._stats["sentences"] += len(texts)
+        self._stats["batches"] += len(batches)
+        self._stats["tokens"] += int(lengths.sum())
+        self._stats["padded_tokens"] += sum(len(batch) * int(lengths[batch].max()) for batch in batches)
+
+        return embeddings
+
+    def summary(self) -> Dict[str, float]:
+        """Counters of the encoded requests, with the throughput of the model and the share of non-padding tokens."""
+
+        stats = dict(self._stats)
+        stats["encode_seconds"] = self._encode_seconds
+        stats["sentences_per_second"] = stats["sentences"] / self._encode_seconds if self._encode_seconds else 0.0
+        stats["mean_batch_size"] = stats["sentences"] / stats["batches"] if stats["batches"] else 0.0
+        stats["padding_efficiency"] = stats["tokens"] / stats["padded_tokens"] if stats["padded_tokens"] else 1.0
+
+        return stats
+
+
+def create_batched_embedding_store(batcher: EncodingBatcher, **kwargs) -> "AsyncEmbeddingStore":
+    """Embedding store in front of the batched model, shared by every client of the executor. ``embestore`` is only
+    imported here, the executor runs without it when the cache is off."""
+
+    from embestore.store.base import AsyncEmbeddingStore
+
+    class BatchedEmbeddingStore(AsyncEmbeddingStore):
+        async def _aretrieve_embeddings_from_model(self, sentences: List[str]) -> np.ndarray:
+            return await batcher.encode(sentences)
+
+    return BatchedEmbeddingStore(**kwargs)
 
 
 class EmbeddingModel(Executor):
+    def __init__(
+        self,
+        batch_window_ms: float = DEFAULT_BATCH_WINDOW_MS,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        cache: bool = False,
+        cache_max_size: Optional[int] = None,
+        cache_max_bytes: Optional[int] = None,
+        eviction_policy: Optional[str] = None,
+        cache_path: Optional[str] = None,
+        persistence: str = "full",
+        checkpoint_interval: Optional[float] = None,
+        storage_dtype: str = "float32",
+        cache_l2_path: Optional[str] = None,
+        cache_l2_max_size: Optional[int] = None,
+        **kwargs,
+    ):
+        """Sentence transformer executor, the texts of the concurrent requests are queued for ``batch_window_ms`` and
+        encoded together by length-sorted batches of ``max_batch_size``.
+
+        With ``cache``, an embedding store shared by every client sits in front of the model. The ``cache_*``,
+        ``eviction_policy``, ``persistence``, ``checkpoint_interval`` and ``storage_dtype`` options are the ones of
+        ``EmbeddingStore``, the cache is loaded from ``cache_path`` at start and saved to it at shutdown. With
+        ``cache_l2_path``, the evicted entries are demoted to a SQLite file of up to ``cache_l2_max_size`` rows. The
+        model is loaded when the executor starts rather than when the module is imported.
+        """
+
+        super().__init__(**kwargs)
+        logger.info(f"Loading transformer model: {SENTENCE_TRANSFORMER}")
+        model = SentenceTransformer(SENTENCE_TRANSFORMER).eval()
+        self.batcher = EncodingBatcher(model, window_ms=batch_window_ms, max_batch_size=max_batch_size)
+        self.store: Optional["AsyncEmbeddingStore"] = None
+        if cache:
+            from embestore.store.sqlite import SqliteCache
+
+            self.store = create_batched_embedding_store(
+                self.batcher,
+                max_size=cache_max_size,
+                max_bytes=cache_max_bytes,
+                eviction_policy=eviction_policy,
+                cache_path=cache_path,
+                persistence=persistence,
+                checkpoint_interval=checkpoint_interval,
+                storage_dtype=storage_dtype,
+                l2_cache=None if cache_l2_path is None else SqliteCache(cache_l2_path, max_size=cache_l2_max_size),
+            )
+
+    async def _encode(self, texts: List[str]) -> np.ndarray:
+        if self.store is not None:
+            return await self.store.aretrieve_embeddings(texts)
+        return await self.batcher.encode(texts)
+
     @requests
-    def encode(self, docs: DocumentArray, **kwargs):
-        docs.embeddings = model.encode(docs.texts)
+    async def encode(self, docs: DocumentArray, **kwargs):
+        docs.embeddings = await self._encode(docs.texts)
+
+    @requests(on=BLOB_ENDPOINT)
+    async def encode_blob(self, docs: DocumentArray, **kwargs):
+        """Return the embeddings as one document holding the raw bytes of the contiguous matrix, its dtype and shape
+        are in the tags. The client reads the matrix from the bytes instead of deserializing every document."""
+
+        embeddings = np.ascontiguousarray(await self._encode(docs.texts), dtype=np.float32)
+        return DocumentArray(
+            [Document(blob=embeddings.tobytes(), tags={"dtype": embeddings.dtype.str, "shape": list(embeddings.shape)})]
+        )
 
     @requests(on="/current_model")
     def current_model(self, **kwargs):
         docs = DocumentArray()
         docs.append(Document(text=SENTENCE_TRANSFORMER))
         return docs
+
+    @requests(on="/stats")
+    def stats(self, **kwargs):
+        return DocumentArray([Document(tags=self.batcher.summary())])
+
+    @requests(on="/cache_stats")
+    def cache_stats(self, **kwargs):
+        """Hits and misses of the shared cache, empty tags when the executor runs without cache."""
+
+        return DocumentArray([Document(tags=self.store.stats if self.store is not None else {})])
+
+    def close(self):
+        if self.store is not None and (self.store.cache_path is not None or self.store.cache.persistent):
+            self.store.wait_for_save()
+            self.store.save()
+        super().close()
@@ -0,0 +1,22 @@
+from typing import List, Optional
+
+import typer
+
+from embestore.store.eviction import EvictionPolicy, replay_trace
+
+app = typer.Typer(help="Inspect the embedding cache.")
+
+
+@app.command(name="replay", help="Replay a recorded sentence stream, one sentence per line, on the eviction policies.")
+def replay(
+    trace_path: str = typer.Argument(..., help="Text file of the requested sentences."),
+    max_size: int = typer.Option(..., help="Cache size of every policy."),
+    policy: Optional[List[str]] = typer.Option(
+        None, help="Policies to replay, defaults to " + ", ".join([policy.value for policy in EvictionPolicy])
+    ),
+):
+    with open(trace_path, encoding="utf-8") as trace_file:
+        hit_ratios = replay_trace((line.rstrip("\n") for line in trace_file), max_size=max_size, policies=policy)
+
+    for policy_name, hit_ratio in sorted(hit_ratios.items(), key=lambda item: item[1], reverse=True):
+        typer.echo(f"{policy_name:<12}{hit_ratio:.4f}")
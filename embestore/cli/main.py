@@ -1,9 +1,11 @@
 import typer
 
+import embestore.cli.cache as cache
 import embestore.cli.serve as serve
 
 app = typer.Typer()
 app.add_typer(serve.app, name="serve", help="Serve the model in docker container.")
+app.add_typer(cache.app, name="cache", help="Inspect the embedding cache.")
 
 
 if __name__ == "__main__":
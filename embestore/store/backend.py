@@ -0,0 +1,56 @@
+from abc import ABC, abstractmethod
+from typing import Optional, Sequence, Text, Tuple
+
+import numpy as np
+
+
+class CacheBackend(ABC):
+    """Key-value storage of the embeddings below the in-process cache of a store, given as its ``l2_cache``.
+
+    The store searches the backend for the sentences missing from its cache before calling the model, the in-process
+    cache acts as the near cache of the backend. A local backend receives the entries evicted from the cache. A
+    ``write_through`` backend, shared by several hosts, receives the model results right away so the other stores
+    find them too.
+    """
+
+    write_through = False
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    def size(self) -> Optional[int]:
+        """Number of entries reported by the ``stats`` of the store, None when counting them isn't cheap."""
+
+        return len(self)
+
+    @abstractmethod
+    def get(self, keys: Sequence[Text]) -> Tuple[np.ndarray, np.ndarray]:
+        """Search the embeddings of the keys.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            Embeddings of the keys, rows of the missing keys are filled with zeros, and the mask of the found keys.
+        """
+
+        pass
+
+    @abstractmethod
+    def put(self, keys: Sequence[Text], embeddings: np.ndarray) -> None:
+        """Insert or overwrite the embeddings of the keys."""
+
+        pass
+
+    @abstractmethod
+    def remove(self, keys: Sequence[Text]) -> None:
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+    def close(self) -> None:
+        """Release the connections of the backend."""
+
+        pass
@@ -1,63 +1,159 @@
-import math
+import asyncio
+import logging
 import os
+import threading
+import time
 from abc import ABC, abstractmethod
-from enum import Enum
-from typing import List, Literal, Optional, Text
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
+from functools import partial
+from typing import Callable, Dict, Iterable, Iterator, List, Literal, Optional, Text, Tuple
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from embestore.store.backend import CacheBackend
+from embestore.store.batching import DEFAULT_MAX_BATCH_SIZE, MicroBatcher
+from embestore.store.cache import (
+    EMBEDDING_DTYPE,
+    LFU_COUNTER_COLUMN,
+    OFFSET_COLUMN,
+    ROW_GROUP_SIZE,
+    SCALE_COLUMN,
+    VALID_COLUMN_ATTRIBUTE,
+    VALID_ROW_ATTRIBUTE,
+    ArrayCache,
+    StorageDtype,
+)
+from embestore.store.eviction import EVICTION_STRATEGIES, EvictionPolicy, EvictionStrategy, create_eviction_strategy
+from embestore.store.persistence import Persistence, SegmentLog, write_parquet
+from embestore.store.sink import write_embeddings
+from embestore.utils import chunks
+
+DEFAULT_ITER_BATCH_SIZE = 1024
+
+logger = logging.getLogger(__name__)
 
-VALID_ROW_ATTRIBUTE = "sentence"
-VALID_COLUMN_ATTRIBUTE = "embedding"
-LFU_COUNTER_COLUMN = "count"
 
+class EmbeddingStore(ABC):
+    """Retrieve sentence embeddings.
 
-class EvictionPolicy(str, Enum):
-    LFU = "lfu"
-    LRU = "lru"
-
-    @classmethod
-    def has_value(cls, value):
-        return value in cls._value2member_map_
+    The store can be shared by threads. The cache is guarded by a lock which isn't held during the model calls, and
+    the sentences missed by several threads at once are only retrieved from the model by the first one, the other
+    threads wait for its result. With ``max_batch_latency_ms``, the misses of the concurrent callers are coalesced
+    into model batches of up to ``max_batch_size`` sentences.
 
+    The missing sentences are sent to the model by chunks of ``batch_size`` sentences, with up to ``max_in_flight``
+    chunks retrieved at once.
 
-class EmbeddingStore(ABC):
-    """Retrieve sentence embeddings."""
+    With ``l2_cache``, the entries evicted from the cache are demoted to that second tier instead of being dropped.
+    The missing sentences are searched there before the model, and the ones found are promoted back to the cache. A
+    ``write_through`` backend, such as a Redis server shared by several hosts, receives the model results instead of
+    the evicted entries. A failing backend only costs model calls, its errors are logged.
+    """
 
     def __init__(
         self,
         max_size: Optional[int] = None,
-        eviction_policy: Optional[Literal["lfu", "lru"]] = None,
+        eviction_policy: Optional[Literal["lfu", "lru", "w-tinylfu", "arc", "2q"]] = None,
         cache_path: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        storage_dtype: Literal["float32", "float16", "int8"] = StorageDtype.FLOAT32.value,
+        cache: Optional[ArrayCache] = None,
+        persistence: Literal["full", "append"] = Persistence.FULL.value,
+        checkpoint_interval: Optional[float] = None,
+        max_batch_latency_ms: Optional[float] = None,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        batch_size: Optional[int] = None,
+        max_in_flight: int = 1,
+        l2_cache: Optional[CacheBackend] = None,
     ) -> None:
-        def create_empty_df() -> pd.DataFrame:
-            df = pd.DataFrame({VALID_ROW_ATTRIBUTE: [], VALID_COLUMN_ATTRIBUTE: [], LFU_COUNTER_COLUMN: []})
-            df.set_index(VALID_ROW_ATTRIBUTE, inplace=True)
-
-            return df
-
+        if not Persistence.has_value(persistence):
+            raise ValueError("persistence should be within " + ", ".join([mode.value for mode in Persistence]))
+        if persistence == Persistence.APPEND.value and cache_path is None:
+            raise ValueError("cache_path can't be None with append persistence")
         if eviction_policy is not None:
             if not EvictionPolicy.has_value(eviction_policy):
                 raise ValueError(
                     "eviction_policy should be within " + ", ".join([policy.value for policy in EvictionPolicy])
                 )
-            if max_size is None:
-                raise ValueError("max_size can't be None")
+            if max_size is None and max_bytes is None:
+                raise ValueError("max_size and max_bytes can't both be None with an eviction_policy")
+            if max_size is None and EVICTION_STRATEGIES[EvictionPolicy(eviction_policy)].requires_max_size:
+                raise ValueError(
+                    f"max_size can't be None with the {eviction_policy} eviction_policy, even with max_bytes"
+                )
         if max_size is not None:
             if max_size <= 0:
                 raise ValueError("max_size must be larger than 0")
             if eviction_policy is None:
-                raise ValueError("eviction_policy can't be None")
+                raise ValueError("eviction_policy can't be None with max_size")
+        if max_bytes is not None:
+            if max_bytes <= 0:
+                raise ValueError("max_bytes must be larger than 0")
+            if eviction_policy is None:
+                raise ValueError("eviction_policy can't be None with max_bytes, it picks the entries evicted")
+
+        if cache is not None and cache.evicting and (eviction_policy, max_size, max_bytes) != (None, None, None):
+            raise ValueError("eviction_policy, max_size and max_bytes should be None with a cache evicting by itself")
+
+        if batch_size is not None and batch_size <= 0:
+            raise ValueError("batch_size must be larger than 0")
+        if max_in_flight <= 0:
+            raise ValueError("max_in_flight must be larger than 0")
+        if checkpoint_interval is not None:
+            if checkpoint_interval < 0:
+                raise ValueError("checkpoint_interval can't be negative")
+            if cache_path is None and not (cache is not None and cache.persistent):
+                raise ValueError("cache_path can't be None with checkpoint_interval")
 
         self._max_size = max_size
+        self._max_bytes = max_bytes
         self._eviction_policy = eviction_policy
         self.cache_path = cache_path
 
-        if self.cache_path is None or not os.path.isfile(cache_path):
-            self.cache_df = create_empty_df()
-        else:
-            self.cache_df = pd.read_parquet(cache_path)
-            self._column_validation(self.cache_df)
+        self._cache = cache if cache is not None else ArrayCache(storage_dtype=storage_dtype)
+        self._cache.max_nbytes = max_bytes
+        self._eviction = self._create_eviction()
+        self._cache_df: Optional[pd.DataFrame] = None
+        self._cache_df_version = -1
+        self._checkpoint_interval = checkpoint_interval
+        self._last_checkpoint = time.monotonic()
+        self._save_executor: Optional[ThreadPoolExecutor] = None
+        self._pending_saves: List[Future] = []
+        self._lock = threading.RLock()
+        self._in_flight: Dict[Text, Future] = {}
+        self._hits = 0
+        self._misses = 0
+        self._l2_cache = l2_cache
+        self._demoted: List[Tuple[List[Text], np.ndarray]] = []
+        self._l2_hits = 0
+        self._l2_misses = 0
+        self._batch_size = batch_size
+        self._max_in_flight = max_in_flight
+        self._model_executor: Optional[ThreadPoolExecutor] = None
+        if max_in_flight > 1:
+            self._model_executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="embestore-model")
+        self._batcher: Optional[MicroBatcher] = None
+        if max_batch_latency_ms is not None:
+            self._batcher = MicroBatcher(self._resolve, max_latency_ms=max_batch_latency_ms, max_size=max_batch_size)
+
+        self._segment_log: Optional[SegmentLog] = None
+        if persistence == Persistence.APPEND.value:
+            self._segment_log = SegmentLog(cache_path)
+            table = self._segment_log.read()
+            if table is not None:
+                self._load_table(table)
+            self._cache.track_changes = True
+            self._cache.reset_changes()
+        elif self.cache_path is not None and os.path.isfile(cache_path):
+            self.load(cache_path)
+        elif self._eviction is not None and len(self._cache) > 0:
+            self._apply_eviction_policy(*self._cache.key_counts())
+        self._demote()
 
     @property
     def eviction_policy(self) -> Text:
@@ -67,6 +163,103 @@ class EmbeddingStore(ABC):
     def max_size(self) -> int:
         return self._max_size
 
+    @property
+    def cache(self) -> ArrayCache:
+        return self._cache
+
+    @property
+    def storage_dtype(self) -> Text:
+        return self._cache.storage_dtype
+
+    @property
+    def max_bytes(self) -> Optional[int]:
+        return self._max_bytes
+
+    @property
+    def segment_log(self) -> Optional[SegmentLog]:
+        """Change log of the ``cache_path`` directory with append persistence."""
+
+        return self._segment_log
+
+    @property
+    def l2_cache(self) -> Optional[CacheBackend]:
+        return self._l2_cache
+
+    @property
+    def stats(self) -> Dict[Text, float]:
+        """Cache hits and misses of the retrieved sentences since the store was created or ``reset_stats``.
+
+        With ``l2_cache``, the ``l2_`` entries count the cache misses found in the second tier and the ones sent to
+        the model, and the size of the second tier when it's cheap to count.
+        """
+
+        with self._lock:
+            retrieved = self._hits + self._misses
+            stats = {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / retrieved if retrieved else 0.0,
+                "size": len(self._cache),
+            }
+            if self._l2_cache is not None:
+                l2_retrieved = self._l2_hits + self._l2_misses
+                stats["l2_hits"] = self._l2_hits
+                stats["l2_misses"] = self._l2_misses
+                stats["l2_hit_rate"] = self._l2_hits / l2_retrieved if l2_retrieved else 0.0
+                l2_size = self._l2_cache.size()
+                if l2_size is not None:
+                    stats["l2_size"] = l2_size
+
+            return stats
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._hits = 0
+            self._misses = 0
+            self._l2_hits = 0
+            self._l2_misses = 0
+
+    @property
+    def memory_usage(self) -> int:
+        """Bytes held by the cache arrays, including their free rows, and the sentence strings."""
+
+        return self._cache.allocated_nbytes
+
+    @property
+    def cache_df(self) -> pd.DataFrame:
+        """Data frame view of the cache, it's only rebuilt when the cache changed since the last access."""
+
+        with self._lock:
+            if self._cache_df is None or self._cache_df_version != self._cache.version:
+                keys, embeddings, counts = self._cache.items()
+                self._cache_df = self._build_dataframe(keys, embeddings, counts)
+                self._cache_df_version = self._cache.version
+
+            return self._cache_df
+
+    @cache_df.setter
+    def cache_df(self, df: pd.DataFrame) -> None:
+        self._column_validation(df)
+        with self._lock:
+            self._cache.clear()
+            self._eviction = self._create_eviction()
+            if len(df) > 0:
+                df = df.loc[~df.index.duplicated(keep="last")]
+                keys = df.index.to_list()
+                counts = df[LFU_COUNTER_COLUMN].to_numpy(dtype=np.int64)
+                self._cache.put(keys, np.stack(df[VALID_COLUMN_ATTRIBUTE].to_list()), counts)
+                self._apply_eviction_policy(keys, counts)
+        self._demote()
+
+    @staticmethod
+    def _build_dataframe(sentences: List[Text], embeddings: np.ndarray, counts: np.ndarray) -> pd.DataFrame:
+        df = pd.DataFrame(
+            {VALID_ROW_ATTRIBUTE: sentences, VALID_COLUMN_ATTRIBUTE: list(embeddings), LFU_COUNTER_COLUMN: counts}
+        )
+        df.set_index(VALID_ROW_ATTRIBUTE, inplace=True)
+
+        return df
+
     def _column_validation(self, df: pd.DataFrame) -> None:
         if VALID_ROW_ATTRIBUTE != df.index.name:
             raise ValueError(f"Missing row index: {VALID_ROW_ATTRIBUTE}")
@@ -77,6 +270,84 @@ class EmbeddingStore(ABC):
         if len(df.columns) != 2:
             raise ValueError("Column size should be 2")
 
+    def _schema_validation(self, schema: pa.Schema) -> None:
+        if VALID_ROW_ATTRIBUTE not in schema.names:
+            raise ValueError(f"Missing row index: {VALID_ROW_ATTRIBUTE}")
+        if VALID_COLUMN_ATTRIBUTE not in schema.names:
+            raise ValueError(f"Missing column index: {VALID_COLUMN_ATTRIBUTE}")
+        if LFU_COUNTER_COLUMN not in schema.names:
+            raise ValueError(f"Missing column index: {LFU_COUNTER_COLUMN}")
+        quantization_columns = {SCALE_COLUMN, OFFSET_COLUMN} & set(schema.names)
+        if quantization_columns and len(quantization_columns) != 2:
+            raise ValueError(f"{SCALE_COLUMN} and {OFFSET_COLUMN} columns should be given together")
+        if len(schema.names) != 3 + len(quantization_columns):
+            raise ValueError(f"Column size should be {2 + len(quantization_columns)}")
+
+    def load(
+        self,
+        path: str,
+        top_n: Optional[int] = None,
+        keys: Optional[Iterable[Text]] = None,
+        batch_size: int = ROW_GROUP_SIZE,
+    ) -> None:
+        """Load the cache from a parquet file, the cached entries are replaced.
+
+        The schema is validated before reading any row, then the record batches are streamed into the cache arrays
+        and go through the eviction policy one after the other, so the file is never materialized as a whole.
+
+        Args:
+            path (str): Parquet cache path.
+            top_n (Optional[int], optional): Only load the entries with the highest access counts. Defaults to None.
+            keys (Optional[Iterable[Text]], optional): Only load the entries of these sentences. Defaults to None.
+            batch_size (int, optional): Number of rows read at once. Defaults to 8192.
+        """
+
+        if top_n is not None and top_n <= 0:
+            raise ValueError("top_n must be larger than 0")
+
+        parquet_file = pq.ParquetFile(path)
+        schema = parquet_file.schema_arrow
+        self._schema_validation(schema)
+
+        rows = None
+        if top_n is not None:
+            counts = parquet_file.read(columns=[LFU_COUNTER_COLUMN]).column(0).to_numpy()
+            rows = np.sort(np.argsort(-counts, kind="stable")[:top_n])
+        key_set = None if keys is None else pa.array(list(keys), type=pa.string())
+
+        with self._lock:
+            self._cache.clear()
+            self._eviction = self._create_eviction()
+            size = parquet_file.metadata.num_rows
+            for limit in (top_n, None if key_set is None else len(key_set)):
+                size = size if limit is None else min(size, limit)
+            embedding_type = schema.field(VALID_COLUMN_ATTRIBUTE).type
+            if size > 0 and pa.types.is_fixed_size_list(embedding_type):
+                self._cache.reserve(size, embedding_type.list_size)
+
+            offset = 0
+            for batch in parquet_file.iter_batches(batch_size=batch_size, columns=schema.names):
+                table = pa.Table.from_batches([batch]).replace_schema_metadata(schema.metadata)
+                if rows is not None:
+                    start, end = np.searchsorted(rows, [offset, offset + batch.num_rows])
+                    table = table.take(pa.array(rows[start:end] - offset, type=pa.int64()))
+                if key_set is not None:
+                    table = table.filter(pc.is_in(table.column(VALID_ROW_ATTRIBUTE), value_set=key_set))
+                offset += batch.num_rows
+
+                loaded_keys = self._cache.put_table(table)
+                self._apply_eviction_policy(loaded_keys, self._cache.counts(loaded_keys))
+        self._demote()
+
+    def _load_table(self, table: pa.Table) -> None:
+        """Load the cache from an arrow table, the embeddings are kept in the file storage dtype when possible."""
+
+        self._schema_validation(table.schema)
+        self._cache.clear()
+        self._eviction = self._create_eviction()
+        keys = self._cache.put_table(table)
+        self._apply_eviction_policy(keys, self._cache.counts(keys))
+
     def retrieve_dataframe_embeddings(self, sentences: List[Text]) -> pd.DataFrame:
         """Retrieve the sentence embeddings from the cache, if the sentence embedding doesn't
         existed in cache then search result from the model. Return the sentence embeddings
@@ -89,69 +360,385 @@ class EmbeddingStore(ABC):
             pd.DataFrame: The sentences with the embedding vectors formed by data frame.
         """
 
-        embeddings_df = self._retrieve_embeddings_from_cache(sentences)
-        null_value_mask = embeddings_df[VALID_COLUMN_ATTRIBUTE].isnull()
-        embeddings_from_model = self._retrieve_embeddings_from_model(
-            sentences=embeddings_df.index[null_value_mask].to_list()
-        )
-        embeddings_df[VALID_COLUMN_ATTRIBUTE].loc[null_value_mask] = [
-            np.array(v) for v in embeddings_from_model.tolist()
-        ]
-        embeddings_df[LFU_COUNTER_COLUMN] = embeddings_df[LFU_COUNTER_COLUMN].apply(lambda x: x + 1)
+        embeddings, counts = self._retrieve(sentences)
 
-        self._update_cache_df(new_embedding_df=embeddings_df)
-        self._apply_eviction_policy()
+        return self._build_dataframe(list(sentences), embeddings, counts)
 
-        return embeddings_df
+    def retrieve_embeddings(self, sentences: List[Text]) -> np.ndarray:
+        """Retrieve the sentence embeddings from the cache, if the sentence embedding doesn't
+        existed in cache then search result from the model.
+        """
 
-    def _update_cache_df(self, new_embedding_df: pd.DataFrame) -> None:
-        self._column_validation(self.cache_df)
-        self._column_validation(new_embedding_df)
-        self.cache_df = pd.concat([self.cache_df, new_embedding_df], axis=0)
-        self.cache_df = self.cache_df.loc[~self.cache_df.index.duplicated(keep="last")]
+        embeddings, _ = self._retrieve(sentences)
 
-    def _apply_eviction_policy(self) -> None:
-        if self._eviction_policy is not None and len(self.cache_df) > self._max_size:
-            keeped_size = self.max_size
-            if self._eviction_policy == EvictionPolicy.LRU.value:
-                keeped_size = self.max_size
-            elif self._eviction_policy == EvictionPolicy.LFU.value:
-                keeped_size = math.ceil(self._max_size / 2)
-                self.cache_df.sort_values(LFU_COUNTER_COLUMN, inplace=True)
-            else:
-                raise ValueError("Unknown eviction policy")
+        return embeddings
 
-            self.cache_df = self.cache_df.iloc[-keeped_size:]
+    def iter_embeddings(
+        self, sentences: Iterable[Text], batch_size: int = DEFAULT_ITER_BATCH_SIZE
+    ) -> Iterator[Tuple[List[Text], np.ndarray]]:
+        """Lazily retrieve the embeddings of any sentence iterable, such as the lines of a large file.
 
-    def retrieve_embeddings(self, sentences: List[Text]) -> np.ndarray:
-        """Retrieve the sentence embeddings from the cache, if the sentence embedding doesn't
-        existed in cache then search result from the model.
+        Args:
+            sentences (Iterable[Text]): Sentences to embed, only ``batch_size`` of them are read at once.
+            batch_size (int, optional): Number of sentences of the yielded batches. Defaults to 1024.
+
+        Returns:
+            Iterator[Tuple[List[Text], np.ndarray]]: The batches of sentences with their embedding vectors.
         """
 
-        return np.array(self.retrieve_dataframe_embeddings(sentences=sentences)[VALID_COLUMN_ATTRIBUTE].to_list())
+        if batch_size <= 0:
+            raise ValueError("batch_size must be larger than 0")
 
-    def _retrieve_embeddings_from_cache(self, sentences: List[Text]) -> pd.DataFrame:
-        sentences_df = pd.DataFrame({VALID_ROW_ATTRIBUTE: sentences})
-        embeddings_df = sentences_df.merge(
-            self.cache_df[~self.cache_df.index.duplicated(keep="first")].reset_index(),
-            how="left",
-            on=VALID_ROW_ATTRIBUTE,
-        )
-        embeddings_df[VALID_COLUMN_ATTRIBUTE].replace({np.nan: None}, inplace=True)
-        embeddings_df[LFU_COUNTER_COLUMN].replace({np.nan: 0}, inplace=True)
-        embeddings_df.set_index(VALID_ROW_ATTRIBUTE, inplace=True)
+        return ((batch, self.retrieve_embeddings(batch)) for batch in chunks(sentences, batch_size))
 
-        return embeddings_df
+    def write_embeddings(
+        self,
+        sentences: Iterable[Text],
+        path: str,
+        batch_size: int = DEFAULT_ITER_BATCH_SIZE,
+        sink_format: Optional[Literal["parquet", "npy"]] = None,
+    ) -> int:
+        """Stream the embeddings of the sentences into a parquet file of sentences and embeddings, or into a ``.npy``
+        matrix of the embeddings in the order of the sentences.
+
+        Args:
+            sentences (Iterable[Text]): Sentences to embed.
+            path (str): Output path, written to a temporary path and renamed once complete.
+            batch_size (int, optional): Number of sentences embedded and written at once. Defaults to 1024.
+            sink_format (Optional[Text], optional): "parquet" or "npy". Defaults to the extension of the path.
+
+        Returns:
+            int: Number of written embeddings.
+        """
+
+        return write_embeddings(self.iter_embeddings(sentences, batch_size), path, sink_format=sink_format)
+
+    def _retrieve(self, sentences: List[Text]) -> Tuple[np.ndarray, np.ndarray]:
+        embeddings, found, futures, owned_futures = self._claim_misses(sentences)
+        try:
+            if owned_futures:
+                if self._batcher is not None:
+                    self._batcher.submit(owned_futures)
+                else:
+                    try:
+                        self._resolve(owned_futures)
+                    except BaseException:
+                        self._track_fulfilled(futures)
+                        raise
+
+            return self._complete(sentences, embeddings, found, futures)
+        finally:
+            self._demote()
+
+    def _claim_misses(
+        self, sentences: List[Text]
+    ) -> Tuple[np.ndarray, np.ndarray, Dict[Text, Future], Dict[Text, Future]]:
+        """Search the cache and get the futures of the missing sentences, the ones which aren't retrieved by another
+        caller yet are claimed. The cache validates the missing sentences before any is claimed.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray, Dict[Text, Future], Dict[Text, Future]]
+            The cached embeddings, the mask of the cached sentences, the futures of every missing sentence and the
+            futures claimed by this call.
+        """
+
+        with self._lock:
+            embeddings, found = self._retrieve_embeddings_from_cache(sentences)
+            if not found.all():
+                self._cache.validate([sentence for sentence, hit in zip(sentences, found) if not hit])
+            hits = int(np.count_nonzero(found))
+            self._hits += hits
+            self._misses += len(sentences) - hits
+            futures, owned_futures = {}, {}
+            for sentence, hit in zip(sentences, found):
+                if hit or sentence in futures:
+                    continue
+                future = self._in_flight.get(sentence)
+                if future is None:
+                    future = owned_futures[sentence] = self._in_flight[sentence] = Future()
+                futures[sentence] = future
+
+        return embeddings, found, futures, owned_futures
+
+    def _resolve(self, owned_futures: Dict[Text, Future]) -> None:
+        """Retrieve the claimed sentences from the model by chunks of ``batch_size`` and fulfil their futures.
+
+        With ``max_in_flight`` above 1 the chunks are sent from the model threads and the futures are fulfilled as
+        the chunks complete, otherwise they're sent one after the other and the first error is raised once set on
+        the futures of the remaining chunks.
+        """
+
+        chunked_futures = [
+            dict(chunk) for chunk in chunks(owned_futures.items(), self._batch_size or len(owned_futures))
+        ]
+        if self._model_executor is not None:
+            for chunk_futures in chunked_futures:
+                self._model_executor.submit(self._resolve_chunk, chunk_futures)
+            return
+
+        remaining_chunks = iter(chunked_futures)
+        for chunk_futures in remaining_chunks:
+            try:
+                self._resolve_chunk(chunk_futures)
+            except BaseException as error:
+                for remaining_futures in remaining_chunks:
+                    self._reject(remaining_futures, error)
+                raise
+
+    def _resolve_chunk(self, chunk_futures: Dict[Text, Future]) -> None:
+        try:
+            chunk_futures = self._resolve_from_l2(chunk_futures)
+            if not chunk_futures:
+                return
+            embeddings_from_model = self._retrieve_embeddings_from_model(sentences=list(chunk_futures))
+            self._fulfil(chunk_futures, embeddings_from_model)
+        except BaseException as error:
+            self._reject(chunk_futures, error)
+            raise
+        self._write_through(list(chunk_futures), embeddings_from_model)
+
+    def _resolve_from_l2(self, owned_futures: Dict[Text, Future]) -> Dict[Text, Future]:
+        """Fulfil the claimed sentences found in ``l2_cache``, which promotes them to the cache, and return the futures
+        of the other ones."""
+
+        if self._l2_cache is None:
+            return owned_futures
+
+        try:
+            embeddings, found = self._l2_cache.get(list(owned_futures))
+        except Exception as error:
+            logger.warning(f"Failed to search the second tier cache: {error!r}")
+            embeddings, found = None, np.zeros(len(owned_futures), dtype=bool)
+        with self._lock:
+            self._l2_hits += int(np.count_nonzero(found))
+            self._l2_misses += int(np.count_nonzero(~found))
+        items = list(owned_futures.items())
+        if found.any():
+            self._fulfil(dict(item for item, hit in zip(items, found) if hit), embeddings[found])
+
+        return dict(item for item, hit in zip(items, found) if not hit)
+
+    def _write_through(self, sentences: List[Text], embeddings_from_model: np.ndarray) -> None:
+        """Store the model results in a ``write_through`` second tier, once the waiting callers have them."""
+
+        if self._l2_cache is None or not self._l2_cache.write_through:
+            return
+
+        try:
+            self._l2_cache.put(sentences, embeddings_from_model)
+        except Exception as error:
+            logger.warning(f"Failed to write the second tier cache: {error!r}")
+
+    def _fulfil(self, owned_futures: Dict[Text, Future], embeddings_from_model: np.ndarray) -> None:
+        """Cache the model results of the claimed sentences and hand them to the waiting callers, the callers get the
+        error instead when the results can't be cached."""
+
+        sentences = list(owned_futures)
+        try:
+            embeddings_from_model = np.asarray(embeddings_from_model, dtype=EMBEDDING_DTYPE)
+            if embeddings_from_model.ndim != 2 or len(embeddings_from_model) != len(sentences):
+                raise ValueError("The model should return one embedding per sentence")
+            self._cache.validate(sentences, embeddings_from_model)
+            with self._lock:
+                self._cache.put(sentences, embeddings_from_model)
+                for sentence in sentences:
+                    del self._in_flight[sentence]
+        except BaseException as error:
+            self._reject(owned_futures, error)
+            raise
+        for future, embedding in zip(owned_futures.values(), embeddings_from_model):
+            future.set_result(embedding)
+
+    def _reject(self, owned_futures: Dict[Text, Future], error: BaseException) -> None:
+        """Hand the error to the callers waiting on the claimed sentences, the ones already resolved are skipped."""
+
+        with self._lock:
+            rejected_futures = []
+            for sentence, future in owned_futures.items():
+                if self._in_flight.get(sentence) is future:
+                    del self._in_flight[sentence]
+                    rejected_futures.append(future)
+        for future in rejected_futures:
+            future.set_exception(error)
+
+    def _complete(
+        self, sentences: List[Text], embeddings: np.ndarray, found: np.ndarray, futures: Dict[Text, Future]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Fill the missing embeddings as their futures complete, then count the accesses and apply the eviction."""
+
+        if futures:
+            rows = defaultdict(list)
+            for row in np.flatnonzero(~found):
+                rows[sentences[row]].append(row)
+            sentence_of = {future: sentence for sentence, future in futures.items()}
+            try:
+                for future in as_completed(sentence_of):
+                    embedding = future.result()
+                    if embeddings.shape[1] != len(embedding):
+                        embeddings = np.zeros((len(sentences), len(embedding)), dtype=EMBEDDING_DTYPE)
+                    embeddings[rows[sentence_of[future]]] = embedding
+            except BaseException:
+                wait(sentence_of)
+                self._track_fulfilled(futures)
+                raise
+
+        with self._lock:
+            counts = self._cache.touch(sentences)
+            self._apply_eviction_policy(sentences)
+            self._checkpoint_if_due()
+
+        return embeddings, counts
+
+    def _track_fulfilled(self, futures: Dict[Text, Future]) -> None:
+        """Insert the sentences cached by the successful chunks of a failed retrieval into the eviction policy, which
+        would never see them otherwise."""
+
+        with self._lock:
+            self._apply_eviction_policy(
+                [sentence for sentence, future in futures.items() if future.done() and future.exception() is None]
+            )
+
+    def _create_eviction(self) -> Optional[EvictionStrategy]:
+        if self._eviction_policy is None:
+            return None
+
+        return create_eviction_strategy(self._eviction_policy, max_size=self._max_size)
+
+    def _apply_eviction_policy(self, sentences: List[Text], counts: Optional[np.ndarray] = None) -> None:
+        """Replay the accesses of the sentences on the eviction policy, cached sentences not tracked by the policy
+        are inserted with their access counts if given, and the overflowing keys are evicted by the inserts. Then the
+        policy keeps evicting until the cache fits in ``max_bytes``, and the rows left free are released.
+        """
+
+        if self._eviction is None:
+            return
+
+        evicted_keys = []
+        for i, sentence in enumerate(sentences):
+            if sentence in self._eviction:
+                self._eviction.touch(sentence)
+            elif sentence in self._cache:
+                evicted_keys.extend(self._eviction.insert(sentence, frequency=1 if counts is None else int(counts[i])))
+        self._evict([key for key in evicted_keys if key not in self._eviction])
+
+        if self._max_bytes is None:
+            return
+
+        while self._cache.nbytes > self._max_bytes:
+            evicted_key = self._eviction.evict()
+            if evicted_key is None:
+                break
+            self._evict([evicted_key])
+        self._cache.shrink()
+
+    def _evict(self, keys: List[Text]) -> None:
+        """Remove the keys from the cache, their rows are queued for ``_demote`` if there is an ``l2_cache``."""
+
+        if self._l2_cache is not None and not self._l2_cache.write_through and keys:
+            embeddings, found = self._cache.get(keys)
+            if found.any():
+                self._demoted.append(([key for key, hit in zip(keys, found) if hit], embeddings[found]))
+        self._cache.remove(keys)
+
+    def _demote(self) -> None:
+        """Write the evicted rows to ``l2_cache`` once the lock is released, a failing write only loses them from the
+        second tier."""
+
+        if not self._demoted:
+            return
+
+        with self._lock:
+            demoted, self._demoted = self._demoted, []
+        for keys, embeddings in demoted:
+            try:
+                self._l2_cache.put(keys, embeddings)
+            except Exception as error:
+                logger.warning(f"Failed to demote to the second tier cache: {error!r}")
+
+    def _retrieve_embeddings_from_cache(self, sentences: List[Text]) -> Tuple[np.ndarray, np.ndarray]:
+        return self._cache.get(sentences)
 
     def save(self, path: Optional[str] = None):
-        """Save the cache to parquet."""
+        """Save the cache to parquet, the embeddings are written in the storage dtype and in small row groups so the
+        file can be streamed back. Without any path, a persistent cache such as ``MmapArrayCache`` is flushed to its
+        own files, and with append persistence only the changes since the last save are appended to the
+        ``cache_path`` directory. The file is written to a temporary path and renamed over the previous one, the
+        other threads keep using the cache during the write. The write goes after the saves started by
+        ``save_async``, so the saves never overlap.
+        """
+
+        self._submit_save(path).result()
+
+    def save_async(self, path: Optional[str] = None) -> Future:
+        """Save the cache like ``save`` on a background thread, the request threads don't wait for the writes.
 
-        if path is not None:
-            self.cache_df.to_parquet(path)
-        else:
+        The snapshot of the cache is copied right away, so the changes made during the write belong to the next
+        save. The saves are written one after the other in the order they're requested.
+
+        Returns
+        -------
+        Future
+            Completed once the snapshot is written.
+        """
+
+        with self._lock:
+            future = self._submit_save(path)
+            self._pending_saves = [pending for pending in self._pending_saves if not pending.done()] + [future]
+
+        return future
+
+    def _submit_save(self, path: Optional[str] = None) -> Future:
+        """Take the snapshot and queue its write on the save thread, which writes the snapshots in their order."""
+
+        with self._lock:
+            write = self._snapshot(path)
+            if self._save_executor is None:
+                self._save_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embestore-save")
+
+            return self._save_executor.submit(write)
+
+    def wait_for_save(self, timeout: Optional[float] = None) -> None:
+        """Block until the saves started by ``save_async`` are written, such as on shutdown. The first error of the
+        saves is raised.
+        """
+
+        with self._lock:
+            pending_saves, self._pending_saves = self._pending_saves, []
+        done, not_done = wait(pending_saves, timeout=timeout)
+        with self._lock:
+            self._pending_saves.extend(not_done)
+        for future in done:
+            future.result()
+
+    def _snapshot(self, path: Optional[str] = None) -> Callable[[], None]:
+        """Copy what has to be saved and return the function writing it."""
+
+        if path is None and self._segment_log is not None:
+            changes = self._cache.changes_table()
+            self._cache.reset_changes()
+            if len(changes) == 0:
+                return lambda: None
+            if self._segment_log.compatible(changes):
+                return partial(self._segment_log.append, changes)
+            return partial(self._segment_log.compact, self._cache.to_table())
+
+        if path is None:
             if self.cache_path is None:
+                if self._cache.persistent:
+                    self._cache.flush()
+                    return lambda: None
                 raise ValueError("Miss the path to save the file!")
-            self.cache_df.to_parquet(self.cache_path)
+            path = self.cache_path
+
+        return partial(write_parquet, self._cache.to_table(), path)
+
+    def _checkpoint_if_due(self) -> None:
+        if self._checkpoint_interval is None or time.monotonic() - self._last_checkpoint < self._checkpoint_interval:
+            return
+
+        self._last_checkpoint = time.monotonic()
+        self.save_async()
 
     def _get_embeddings_from_cache(self, keys: List[Text]) -> Optional[np.ndarray]:
         """Search the cache result from the cache dataframe.
@@ -167,9 +754,10 @@ class EmbeddingStore(ABC):
             Embedding results.
         """
 
-        results = self.cache_df.loc[self.cache_df.index.isin(keys), VALID_COLUMN_ATTRIBUTE].to_list()
+        with self._lock:
+            embeddings, found = self._cache.get(keys)
 
-        return np.array(results) if len(results) > 0 else None
+        return embeddings[found] if found.any() else None
 
     @abstractmethod
     def _retrieve_embeddings_from_model(self, sentences: List[Text]) -> np.ndarray:
@@ -187,3 +775,123 @@ class EmbeddingStore(ABC):
         """
 
         pass
+
+
+class AsyncEmbeddingStore(EmbeddingStore):
+    """Retrieve sentence embeddings from asyncio code.
+
+    The cache hits are returned without suspending the coroutine, only the missing sentences await the asynchronous
+    model. The coroutines and threads missing the same sentence at once share the result of a single model call.
+    The synchronous retrievals run the model on a new event loop, or on the event loop of a background thread when
+    they're called from a running event loop.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._model_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def aretrieve_embeddings(self, sentences: List[Text]) -> np.ndarray:
+        """Retrieve the sentence embeddings from the cache, if the sentence embedding doesn't
+        existed in cache then await the result from the model.
+        """
+
+        embeddings, _ = await self._aretrieve(sentences)
+
+        return embeddings
+
+    async def aretrieve_dataframe_embeddings(self, sentences: List[Text]) -> pd.DataFrame:
+        """Retrieve the sentence embeddings formed by data frame, the missing sentences are awaited from the model."""
+
+        embeddings, counts = await self._aretrieve(sentences)
+
+        return self._build_dataframe(list(sentences), embeddings, counts)
+
+    async def _aretrieve(self, sentences: List[Text]) -> Tuple[np.ndarray, np.ndarray]:
+        embeddings, found, futures, owned_futures = self._claim_misses(sentences)
+        try:
+            if owned_futures and self._batcher is not None:
+                self._batcher.submit(owned_futures)
+            elif owned_futures:
+                try:
+                    await self._aresolve(owned_futures)
+                except BaseException:
+                    self._track_fulfilled(futures)
+                    raise
+
+            pending_futures = [asyncio.wrap_future(future) for future in futures.values() if not future.done()]
+            if pending_futures:
+                await asyncio.wait(pending_futures)
+
+            return self._complete(sentences, embeddings, found, futures)
+        finally:
+            if self._demoted:
+                await asyncio.to_thread(self._demote)
+
+    async def _aresolve(self, owned_futures: Dict[Text, Future]) -> None:
+        """Await the claimed sentences from the model by chunks of ``batch_size``, up to ``max_in_flight`` at once."""
+
+        semaphore = asyncio.Semaphore(self._max_in_flight)
+
+        async def resolve_chunk(chunk_futures: Dict[Text, Future]) -> None:
+            async with semaphore:
+                try:
+                    if self._l2_cache is not None:
+                        chunk_futures = await asyncio.to_thread(self._resolve_from_l2, chunk_futures)
+                        if not chunk_futures:
+                            return
+                    embeddings_from_model = await self._aretrieve_embeddings_from_model(sentences=list(chunk_futures))
+                    self._fulfil(chunk_futures, embeddings_from_model)
+                except BaseException as error:
+                    self._reject(chunk_futures, error)
+                    raise
+                if self._l2_cache is not None and self._l2_cache.write_through:
+                    await asyncio.to_thread(self._write_through, list(chunk_futures), embeddings_from_model)
+
+        results = await asyncio.gather(
+            *[
+                resolve_chunk(dict(chunk))
+                for chunk in chunks(owned_futures.items(), self._batch_size or len(owned_futures))
+            ],
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    def _retrieve_embeddings_from_model(self, sentences: List[Text]) -> np.ndarray:
+        """Run the asynchronous model on its own event loop for the synchronous retrievals, ``asyncio.run`` can't be
+        called from the thread of a running event loop."""
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._aretrieve_embeddings_from_model(sentences))
+
+        return asyncio.run_coroutine_threadsafe(
+            self._aretrieve_embeddings_from_model(sentences), self._get_model_loop()
+        ).result()
+
+    def _get_model_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._model_loop is None:
+                self._model_loop = asyncio.new_event_loop()
+                threading.Thread(target=self._model_loop.run_forever, name="embestore-model-loop", daemon=True).start()
+
+            return self._model_loop
+
+    @abstractmethod
+    async def _aretrieve_embeddings_from_model(self, sentences: List[Text]) -> np.ndarray:
+        """Await the embedding results from the customized model.
+
+        Parameters
+        ----------
+        sentences : List[Text]
+            Sentences to embed.
+
+        Returns
+        -------
+        np.ndarray
+            Embedding results.
+        """
+
+        pass
@@ -0,0 +1,73 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, Text
+
+DEFAULT_MAX_BATCH_LATENCY_MS = 5.0
+DEFAULT_MAX_BATCH_SIZE = 64
+
+
+class MicroBatcher:
+    """Coalesce the sentences submitted by concurrent callers into shared batches.
+
+    A dispatcher thread waits up to ``max_latency_ms`` after the first pending sentence, or until ``max_size``
+    sentences are pending, then hands them to ``resolve`` as one batch. The callers wait on the futures of their
+    sentences, ``resolve`` has to fulfil or reject every future of the batch.
+
+    Parameters
+    ----------
+    resolve : Callable[[Dict[Text, Future]], None]
+        Resolves the futures of a batch of sentences, its errors are ignored by the dispatcher.
+    max_latency_ms : float
+        Maximum time a sentence waits for the other ones before its batch is sent.
+    max_size : int
+        Maximum number of sentences of a batch.
+    """
+
+    def __init__(
+        self,
+        resolve: Callable[[Dict[Text, Future]], None],
+        max_latency_ms: float = DEFAULT_MAX_BATCH_LATENCY_MS,
+        max_size: int = DEFAULT_MAX_BATCH_SIZE,
+    ) -> None:
+        if max_latency_ms < 0:
+            raise ValueError("max_latency_ms can't be negative")
+        if max_size <= 0:
+            raise ValueError("max_size must be larger than 0")
+
+        self._resolve = resolve
+        self.max_latency_ms = max_latency_ms
+        self.max_size = max_size
+        self._pending: Dict[Text, Future] = {}
+        self._first_submit = 0.0
+        self._condition = threading.Condition()
+        self._dispatcher: Optional[threading.Thread] = None
+
+    def submit(self, futures: Dict[Text, Future]) -> None:
+        """Queue the sentences with the futures to resolve."""
+
+        with self._condition:
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch, name="embestore-batcher", daemon=True)
+                self._dispatcher.start()
+            if not self._pending:
+                self._first_submit = time.monotonic()
+            self._pending.update(futures)
+            self._condition.notify()
+
+    def _dispatch(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                deadline = self._first_submit + self.max_latency_ms / 1000
+                while len(self._pending) < self.max_size and time.monotonic() < deadline:
+                    self._condition.wait(deadline - time.monotonic())
+
+                sentences = list(self._pending)[: self.max_size]
+                batch = {sentence: self._pending.pop(sentence) for sentence in sentences}
+
+            try:
+                self._resolve(batch)
+            except BaseException:
+                pass
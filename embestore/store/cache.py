@@ -0,0 +1,498 @@
+import sys
+from enum import Enum, IntEnum
+from typing import Dict, Iterator, List, Optional, Sequence, Text, Tuple
+
+import numpy as np
+import pyarrow as pa
+
+VALID_ROW_ATTRIBUTE = "sentence"
+VALID_COLUMN_ATTRIBUTE = "embedding"
+LFU_COUNTER_COLUMN = "count"
+SCALE_COLUMN = "scale"
+OFFSET_COLUMN = "offset"
+CHANGE_COLUMN = "change"
+STORAGE_DTYPE_METADATA = b"embestore.storage_dtype"
+
+DEFAULT_INITIAL_CAPACITY = 1024
+ROW_GROUP_SIZE = 8192
+EMBEDDING_DTYPE = np.float32
+INT8_LEVELS = 255
+
+
+class Change(IntEnum):
+    UPSERT = 0
+    COUNT = 1
+    DELETE = 2
+
+
+class StorageDtype(str, Enum):
+    FLOAT32 = "float32"
+    FLOAT16 = "float16"
+    INT8 = "int8"
+
+    @classmethod
+    def has_value(cls, value):
+        return value in cls._value2member_map_
+
+
+def quantize_int8(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Scalar quantize every vector to int8 over its own value range.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray, np.ndarray]
+        The int8 vectors with the float32 scale and offset of each vector.
+    """
+
+    embeddings = np.asarray(embeddings, dtype=EMBEDDING_DTYPE)
+    offsets = embeddings.min(axis=1)
+    scales = (embeddings.max(axis=1) - offsets) / INT8_LEVELS
+    scales[scales == 0] = 1
+    quantized = np.rint((embeddings - offsets[:, None]) / scales[:, None]) - 128
+
+    return np.clip(quantized, -128, 127).astype(np.int8), scales, offsets
+
+
+def dequantize_int8(quantized: np.ndarray, scales: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    return (quantized.astype(EMBEDDING_DTYPE) + 128) * scales[:, None] + offsets[:, None]
+
+
+class ArrayCache:
+    """Sentence embeddings kept in a contiguous preallocated matrix.
+
+    Every cached sentence owns one row slot of the matrix. The slot is found through a hash map and the released
+    slots are recycled from a free-slot list, so lookups and inserts only cost the size of the batch. The hash map
+    keeps the sentences in least recently used first order.
+
+    The matrix holds float32, float16 or int8 values depending on ``storage_dtype``. The int8 vectors keep their
+    own scale and offset, the embeddings are always returned as float32.
+
+    With ``track_changes`` the inserted, counted and removed keys are recorded until ``reset_changes``, so only the
+    changes have to be persisted.
+
+    With ``max_nbytes`` the matrix doesn't double past the rows fitting in that many bytes, it only grows by the rows
+    an insert can't do without, and ``shrink`` releases the rows left free once the entries are evicted.
+    """
+
+    persistent = False
+    evicting = False
+
+    def __init__(
+        self, initial_capacity: int = DEFAULT_INITIAL_CAPACITY, storage_dtype: Text = StorageDtype.FLOAT32.value
+    ) -> None:
+        if initial_capacity <= 0:
+            raise ValueError("initial_capacity must be larger than 0")
+        if not StorageDtype.has_value(storage_dtype):
+            raise ValueError("storage_dtype should be within " + ", ".join([dtype.value for dtype in StorageDtype]))
+
+        self._initial_capacity = initial_capacity
+        self.storage_dtype = StorageDtype(storage_dtype).value
+        self._matrix: Optional[np.ndarray] = None
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._scales: Optional[np.ndarray] = None
+        self._offsets: Optional[np.ndarray] = None
+        self._slots: Dict[Text, int] = {}
+        self._high_water = 0
+        self._free_slots: List[int] = []
+        self._key_nbytes = 0
+        self._changes: Dict[Text, Change] = {}
+        self.track_changes = False
+        self.max_nbytes: Optional[int] = None
+        self.version = 0
+
+    @property
+    def quantized(self) -> bool:
+        return self.storage_dtype == StorageDtype.INT8.value
+
+    @property
+    def dim(self) -> Optional[int]:
+        return None if self._matrix is None else self._matrix.shape[1]
+
+    @property
+    def capacity(self) -> int:
+        return 0 if self._matrix is None else self._matrix.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the cached entries, the embedding and counter of the occupied rows and the key strings."""
+
+        if self._matrix is None:
+            return 0
+
+        return len(self) * self._row_nbytes(self.dim) + self._key_nbytes
+
+    @property
+    def allocated_nbytes(self) -> int:
+        """Bytes held by the cache, every row of the preallocated arrays whether it's occupied or free and the key
+        strings."""
+
+        if self._matrix is None:
+            return 0
+
+        return self.capacity * self._row_nbytes(self.dim) + self._key_nbytes
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: Text) -> bool:
+        return key in self._slots
+
+    def __iter__(self) -> Iterator[Text]:
+        return iter(self._slots)
+
+    def keys(self) -> List[Text]:
+        return list(self._slots)
+
+    def get(self, keys: Sequence[Text]) -> Tuple[np.ndarray, np.ndarray]:
+        """Search the embeddings of the keys.
+
+        Parameters
+        ----------
+        keys : Sequence[Text]
+            The keys to index the cache values.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            Embeddings of the keys, rows of the missing keys are filled with zeros, and the mask of the found keys.
+        """
+
+        slots = self._lookup(keys)
+        found = slots >= 0
+        embeddings = np.zeros((len(keys), self.dim or 0), dtype=EMBEDDING_DTYPE)
+        if found.any():
+            embeddings[found] = self._decode(slots[found])
+
+        return embeddings, found
+
+    def key_counts(self) -> Tuple[List[Text], np.ndarray]:
+        """Every cached key with its access count, least recently used first, without decoding any embedding."""
+
+        keys, slots = self._entries()
+
+        return keys, self._counts[slots]
+
+    def counts(self, keys: Sequence[Text]) -> np.ndarray:
+        """Access counts of the keys, missing keys are counted as 0."""
+
+        slots = self._lookup(keys)
+        counts = np.zeros(len(keys), dtype=np.int64)
+        counts[slots >= 0] = self._counts[slots[slots >= 0]]
+
+        return counts
+
+    def put(self, keys: Sequence[Text], embeddings: np.ndarray, counts: Optional[Sequence[int]] = None) -> None:
+        """Insert or overwrite the embeddings of the keys, the keys become the most recently used ones."""
+
+        if len(keys) == 0:
+            return
+
+        embeddings = np.asarray(embeddings)
+        if embeddings.ndim != 2 or embeddings.shape[0] != len(keys):
+            raise ValueError("embeddings should be a matrix with one row per key")
+
+        if self.quantized:
+            self._put(keys, *quantize_int8(embeddings), counts=counts)
+        else:
+            self._put(keys, embeddings, counts=counts)
+
+    def validate(self, keys: Sequence[Text], embeddings: Optional[np.ndarray] = None) -> None:
+        """Raise the ``ValueError`` a ``put`` of the keys and embeddings would raise, before anything is changed. Only
+        the keys are checked without embeddings."""
+
+        if embeddings is None:
+            return
+        if embeddings.ndim != 2 or embeddings.shape[0] != len(keys):
+            raise ValueError("embeddings should be a matrix with one row per key")
+        if self.dim is not None and embeddings.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension should be {self.dim}, got {embeddings.shape[1]}")
+
+    def reserve(self, capacity: int, dim: int) -> None:
+        """Make room for ``capacity`` entries at once, instead of doubling the matrix while they're inserted."""
+
+        if self._matrix is None:
+            self._allocate(capacity, dim)
+        elif capacity > self.capacity:
+            self._allocate(capacity, self.dim)
+
+    def shrink(self) -> None:
+        """Move the entries to the first rows and release the other ones, once less than half of the rows are used."""
+
+        if self._matrix is None or len(self) > self.capacity // 2:
+            return
+
+        keys, slots = self._entries()
+        self._allocate(max(len(keys), 1), self.dim, slots)
+        self._slots = dict(zip(keys, range(len(keys))))
+        self._high_water = len(keys)
+        self._free_slots = []
+        self.version += 1
+
+    def touch(self, keys: Sequence[Text]) -> np.ndarray:
+        """Count one access per occurrence of the cached keys and mark them as the most recently used ones.
+
+        Returns
+        -------
+        np.ndarray
+            Access counts of the keys after the update, missing keys are counted as 0.
+        """
+
+        slots = self._lookup(keys)
+        found = slots >= 0
+        np.add.at(self._counts, slots[found], 1)
+        for key, is_found in zip(keys, found):
+            if is_found:
+                self._mark_used(key)
+                self._record_change(key, Change.COUNT)
+        self.version += 1
+
+        counts = np.zeros(len(keys), dtype=np.int64)
+        counts[found] = self._counts[slots[found]]
+
+        return counts
+
+    def remove(self, keys: Sequence[Text]) -> None:
+        for key in keys:
+            slot = self._slots.pop(key, None)
+            if slot is not None:
+                self._free_slots.append(slot)
+                self._key_nbytes -= sys.getsizeof(key)
+                self._record_change(key, Change.DELETE)
+        self.version += 1
+
+    def clear(self) -> None:
+        if self.track_changes:
+            for key in self.keys():
+                self._record_change(key, Change.DELETE)
+        self._slots.clear()
+        self._free_slots = list(range(self._high_water - 1, -1, -1))
+        self._key_nbytes = 0
+        self.version += 1
+
+    def flush(self) -> None:
+        """Write the cache to its own storage, only the persistent caches have one."""
+
+        pass
+
+    def items(self) -> Tuple[List[Text], np.ndarray, np.ndarray]:
+        """Copy out every cached key with its embedding and access count, least recently used first."""
+
+        keys, slots = self._entries()
+        embeddings = self._decode(slots) if self._matrix is not None else np.zeros((0, 0), dtype=EMBEDDING_DTYPE)
+
+        return keys, embeddings, self._counts[slots]
+
+    def to_table(self) -> pa.Table:
+        """Arrow table of the cache in its storage dtype, least recently used first.
+
+        The embeddings are fixed size lists of the stored values, float16 values are kept as their uint16 bit
+        patterns since parquet has no half float type. The int8 vectors come with their scale and offset columns.
+        """
+
+        keys, slots = self._entries()
+
+        return self._build_table(keys, slots)
+
+    def changes_table(self) -> pa.Table:
+        """Arrow table of the changes recorded since the last ``reset_changes``, in the order of the changes.
+
+        The ``change`` column tells the kind of each change, the embedding is zeros unless it was inserted.
+        """
+
+        keys = list(self._changes)
+        changes = np.fromiter(self._changes.values(), dtype=np.int8, count=len(keys))
+        slots = self._lookup(keys)
+        slots[changes == Change.DELETE] = -1
+        table = self._build_table(keys, slots, with_embedding=changes == Change.UPSERT)
+
+        return table.append_column(CHANGE_COLUMN, pa.array(changes, type=pa.int8())).replace_schema_metadata(
+            table.schema.metadata
+        )
+
+    def reset_changes(self) -> None:
+        self._changes.clear()
+
+    def _record_change(self, key: Text, change: Change) -> None:
+        if not self.track_changes:
+            return
+
+        previous = self._changes.pop(key, None)
+        self._changes[key] = Change.UPSERT if change == Change.COUNT and previous == Change.UPSERT else change
+
+    def _build_table(
+        self, keys: List[Text], slots: np.ndarray, with_embedding: Optional[np.ndarray] = None
+    ) -> pa.Table:
+        """Arrow table of the slots, slots below 0 and rows outside ``with_embedding`` get a zero embedding."""
+
+        dim = self.dim or 1
+        present = slots >= 0
+        if with_embedding is not None:
+            present &= with_embedding
+        values = np.zeros((len(keys), dim), dtype=self.storage_dtype)
+        counts = np.zeros(len(keys), dtype=np.int64)
+        scales = np.ones(len(keys), dtype=EMBEDDING_DTYPE)
+        offsets = np.zeros(len(keys), dtype=EMBEDDING_DTYPE)
+        if self._matrix is not None:
+            values[present] = self._matrix[slots[present]]
+            counts[slots >= 0] = self._counts[slots[slots >= 0]]
+            if self.quantized:
+                scales[present] = self._scales[slots[present]]
+                offsets[present] = self._offsets[slots[present]]
+        if self.storage_dtype == StorageDtype.FLOAT16.value:
+            values = values.view(np.uint16)
+
+        columns = {
+            VALID_ROW_ATTRIBUTE: pa.array(keys, type=pa.string()),
+            VALID_COLUMN_ATTRIBUTE: pa.FixedSizeListArray.from_arrays(pa.array(values.reshape(-1)), dim),
+            LFU_COUNTER_COLUMN: pa.array(counts),
+        }
+        if self.quantized:
+            columns[SCALE_COLUMN] = pa.array(scales)
+            columns[OFFSET_COLUMN] = pa.array(offsets)
+
+        return pa.table(columns).replace_schema_metadata({STORAGE_DTYPE_METADATA: self.storage_dtype})
+
+    def put_table(self, table: pa.Table) -> List[Text]:
+        """Insert the rows of an arrow table, either written by ``to_table`` or a float embedding table.
+
+        The stored values are copied as they are when the table has the storage dtype of the cache.
+
+        Returns
+        -------
+        List[Text]
+            Inserted keys.
+        """
+
+        keys = table.column(VALID_ROW_ATTRIBUTE).to_pylist()
+        if not keys:
+            return keys
+
+        metadata = table.schema.metadata or {}
+        storage_dtype = metadata.get(STORAGE_DTYPE_METADATA, StorageDtype.FLOAT32.value.encode()).decode()
+        values = table.column(VALID_COLUMN_ATTRIBUTE).combine_chunks().flatten().to_numpy(zero_copy_only=False)
+        if len(values) % len(keys) != 0:
+            raise ValueError("Embeddings should have the same dimension")
+        values = values.reshape(len(keys), -1)
+        if storage_dtype == StorageDtype.FLOAT16.value:
+            values = values.view(np.float16)
+        counts = table.column(LFU_COUNTER_COLUMN).to_numpy().astype(np.int64)
+
+        if storage_dtype == StorageDtype.INT8.value:
+            scales = table.column(SCALE_COLUMN).to_numpy()
+            offsets = table.column(OFFSET_COLUMN).to_numpy()
+            if self.quantized:
+                self._put(keys, values, scales, offsets, counts=counts)
+            else:
+                self.put(keys, dequantize_int8(values, scales, offsets), counts=counts)
+        elif storage_dtype == self.storage_dtype:
+            self._put(keys, values, counts=counts)
+        else:
+            self.put(keys, values, counts=counts)
+
+        return keys
+
+    def _put(
+        self,
+        keys: Sequence[Text],
+        values: np.ndarray,
+        scales: Optional[np.ndarray] = None,
+        offsets: Optional[np.ndarray] = None,
+        counts: Optional[Sequence[int]] = None,
+    ) -> None:
+        if self._matrix is not None and values.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension should be {self.dim}, got {values.shape[1]}")
+        self._reserve_slots(len({key for key in keys if self._lookup_one(key) < 0}), values.shape[1])
+
+        slots = np.empty(len(keys), dtype=np.int64)
+        for i, key in enumerate(keys):
+            slot = self._lookup_one(key)
+            if slot < 0:
+                slot = self._allocate_slot()
+                self._key_nbytes += sys.getsizeof(key)
+                self._counts[slot] = 0
+                self._slots[key] = slot
+            else:
+                self._mark_used(key)
+            self._record_change(key, Change.UPSERT)
+            slots[i] = slot
+
+        self._matrix[slots] = values
+        if self.quantized:
+            self._scales[slots] = scales
+            self._offsets[slots] = offsets
+        if counts is not None:
+            self._counts[slots] = counts
+        self.version += 1
+
+    def _decode(self, slots: np.ndarray) -> np.ndarray:
+        if self.quantized:
+            return dequantize_int8(self._matrix[slots], self._scales[slots], self._offsets[slots])
+
+        return self._matrix[slots].astype(EMBEDDING_DTYPE, copy=False)
+
+    def _entries(self) -> Tuple[List[Text], np.ndarray]:
+        """Every cached key with its slot."""
+
+        return list(self._slots), np.fromiter(self._slots.values(), dtype=np.int64, count=len(self._slots))
+
+    def _lookup(self, keys: Sequence[Text]) -> np.ndarray:
+        return np.fromiter((self._lookup_one(key) for key in keys), dtype=np.int64, count=len(keys))
+
+    def _lookup_one(self, key: Text) -> int:
+        return self._slots.get(key, -1)
+
+    def _mark_used(self, key: Text) -> None:
+        self._slots[key] = self._slots.pop(key)
+
+    def _row_nbytes(self, dim: int) -> int:
+        row_nbytes = np.dtype(self.storage_dtype).itemsize * dim + self._counts.itemsize
+        if self.quantized:
+            row_nbytes += 2 * np.dtype(EMBEDDING_DTYPE).itemsize
+
+        return row_nbytes
+
+    def _reserve_slots(self, count: int, dim: int) -> None:
+        """Make room for ``count`` new keys at once, the matrix doubles unless it would go over ``max_nbytes``."""
+
+        needed = self._high_water + max(count - len(self._free_slots), 0)
+        if self._matrix is not None and needed <= self.capacity:
+            return
+
+        capacity = self._initial_capacity if self._matrix is None else self.capacity * 2
+        while capacity < needed:
+            capacity *= 2
+        if self.max_nbytes is not None:
+            capacity = min(capacity, (self.max_nbytes - self._key_nbytes) // self._row_nbytes(dim))
+        self._allocate(max(capacity, needed, 1), dim)
+
+    def _allocate_slot(self) -> int:
+        if self._free_slots:
+            return self._free_slots.pop()
+
+        slot = self._high_water
+        if slot >= self.capacity:
+            self._allocate(max(self.capacity * 2, self._initial_capacity), self.dim)
+        self._high_water += 1
+
+        return slot
+
+    def _allocate(self, capacity: int, dim: int, slots: Optional[np.ndarray] = None) -> None:
+        """Reallocate the arrays with ``capacity`` rows, the rows of ``slots`` become the first ones if given,
+        otherwise every row is kept in place."""
+
+        size = self.capacity if slots is None else len(slots)
+        rows = slice(0, size) if slots is None else slots
+        matrix = np.empty((capacity, dim), dtype=self.storage_dtype)
+        counts = np.zeros(capacity, dtype=np.int64)
+        if self._matrix is not None:
+            matrix[:size] = self._matrix[rows]
+            counts[:size] = self._counts[rows]
+        self._matrix, self._counts = matrix, counts
+
+        if self.quantized:
+            scales = np.ones(capacity, dtype=EMBEDDING_DTYPE)
+            offsets = np.zeros(capacity, dtype=EMBEDDING_DTYPE)
+            if self._scales is not None:
+                scales[:size] = self._scales[rows]
+                offsets[:size] = self._offsets[rows]
+            self._scales, self._offsets = scales, offsets
@@ -0,0 +1,252 @@
+import hashlib
+import os
+import sys
+from typing import Dict, Iterator, List, Literal, Sequence, Text, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from embestore.store.cache import (
+    DEFAULT_INITIAL_CAPACITY,
+    EMBEDDING_DTYPE,
+    VALID_ROW_ATTRIBUTE,
+    ArrayCache,
+    Change,
+    StorageDtype,
+)
+
+EMBEDDINGS_FILE = "embeddings.npy"
+COUNTS_FILE = "counts.npy"
+SCALES_FILE = "scales.npy"
+OFFSETS_FILE = "offsets.npy"
+KEYS_FILE = "keys.arrow"
+HASHES_FILE = "hashes.npy"
+HASH_SLOTS_FILE = "hash_slots.npy"
+
+
+def key_hash(key: Text) -> int:
+    """Stable 64 bits hash of the key, the same in every process unlike ``hash``."""
+
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class MmapArrayCache(ArrayCache):
+    """Array cache backed by memory-mapped files in the ``path`` directory.
+
+    The embeddings, counters and quantization parameters are ``.npy`` files mapped in memory, the keys of the slots
+    are an arrow file and the key index is a sorted array of the key hashes with their slots. Nothing is read at
+    open, only the pages of the touched rows become resident and the processes opening the same directory share
+    them through the OS page cache.
+
+    Keys inserted after the open are indexed in memory until ``flush`` writes the key files. Only one process should
+    open the directory in ``r+`` mode, the other processes can use the ``c`` copy-on-write mode whose writes are
+    private to the process and can't be flushed.
+
+    Parameters
+    ----------
+    path : str
+        Directory of the cache files, created if it doesn't exist.
+    storage_dtype : Text
+        Storage dtype of a new cache, an existing cache keeps the dtype of its files.
+    mode : Literal["r+", "c"]
+        Memory map mode.
+    """
+
+    persistent = True
+
+    def __init__(
+        self,
+        path: str,
+        initial_capacity: int = DEFAULT_INITIAL_CAPACITY,
+        storage_dtype: Text = StorageDtype.FLOAT32.value,
+        mode: Literal["r+", "c"] = "r+",
+    ) -> None:
+        if mode not in ("r+", "c"):
+            raise ValueError("mode should be within r+, c")
+
+        super().__init__(initial_capacity=initial_capacity, storage_dtype=storage_dtype)
+        self.path = path
+        self.mode = mode
+        self._disk_keys = pa.array([], type=pa.string())
+        self._disk_hashes = np.zeros(0, dtype=np.uint64)
+        self._disk_hash_slots = np.zeros(0, dtype=np.int64)
+        self._disk_size = 0
+        self._removed: Dict[Text, int] = {}
+
+        os.makedirs(path, exist_ok=True)
+        if os.path.isfile(self._file(KEYS_FILE)):
+            self._open()
+
+    def _file(self, name: Text) -> str:
+        return os.path.join(self.path, name)
+
+    def _open(self) -> None:
+        self._matrix = np.load(self._file(EMBEDDINGS_FILE), mmap_mode=self.mode)
+        self._counts = np.load(self._file(COUNTS_FILE), mmap_mode=self.mode)
+        self.storage_dtype = StorageDtype(self._matrix.dtype.name).value
+        if self.quantized:
+            self._scales = np.load(self._file(SCALES_FILE), mmap_mode=self.mode)
+            self._offsets = np.load(self._file(OFFSETS_FILE), mmap_mode=self.mode)
+
+        source = pa.memory_map(self._file(KEYS_FILE))
+        self._disk_keys = pa.ipc.open_file(source).read_all().column(VALID_ROW_ATTRIBUTE).combine_chunks()
+        self._disk_hashes = np.load(self._file(HASHES_FILE), mmap_mode="r")
+        self._disk_hash_slots = np.load(self._file(HASH_SLOTS_FILE), mmap_mode="r")
+
+        self._disk_size = len(self._disk_keys) - self._disk_keys.null_count
+        self._high_water = len(self._disk_keys)
+        self._free_slots = np.flatnonzero(self._disk_keys.is_null().to_numpy(zero_copy_only=False)).tolist()
+        self._key_nbytes = (pc.sum(pc.binary_length(self._disk_keys)).as_py() or 0) + self._disk_size * (
+            sys.getsizeof("")
+        )
+
+    def __len__(self) -> int:
+        return self._disk_size - len(self._removed) + len(self._slots)
+
+    def __contains__(self, key: Text) -> bool:
+        return self._lookup_one(key) >= 0
+
+    def __iter__(self) -> Iterator[Text]:
+        return iter(self.keys())
+
+    def keys(self) -> List[Text]:
+        return self._entries()[0]
+
+    def remove(self, keys: Sequence[Text]) -> None:
+        on_disk = [key for key in keys if key not in self._slots]
+        super().remove([key for key in keys if key in self._slots])
+
+        for key in on_disk:
+            slot = self._lookup_disk(key)
+            if slot >= 0:
+                self._removed[key] = slot
+                self._free_slots.append(slot)
+                self._key_nbytes -= sys.getsizeof(key)
+                self._record_change(key, Change.DELETE)
+
+    def clear(self) -> None:
+        super().clear()
+        self._disk_keys = pa.nulls(self._high_water, type=pa.string())
+        self._disk_hashes = np.zeros(0, dtype=np.uint64)
+        self._disk_hash_slots = np.zeros(0, dtype=np.int64)
+        self._disk_size = 0
+        self._removed.clear()
+
+    def flush(self) -> None:
+        """Write the memory-mapped arrays and the key index to the files."""
+
+        if self.mode == "c":
+            raise ValueError("Copy-on-write cache can't be flushed")
+        if self._matrix is None:
+            return
+
+        for array in (self._matrix, self._counts, self._scales, self._offsets):
+            if isinstance(array, np.memmap):
+                array.flush()
+
+        disk_keys = self._disk_keys.to_pylist() + [None] * (self._high_water - len(self._disk_keys))
+        for slot in self._removed.values():
+            disk_keys[slot] = None
+        for key, slot in self._slots.items():
+            disk_keys[slot] = key
+
+        removed_slots = np.fromiter(self._removed.values(), dtype=np.int64, count=len(self._removed))
+        kept = ~np.isin(self._disk_hash_slots, removed_slots)
+        hashes = np.concatenate(
+            [
+                self._disk_hashes[kept],
+                np.fromiter((key_hash(key) for key in self._slots), dtype=np.uint64, count=len(self._slots)),
+            ]
+        )
+        hash_slots = np.concatenate(
+            [self._disk_hash_slots[kept], np.fromiter(self._slots.values(), dtype=np.int64, count=len(self._slots))]
+        )
+        order = np.argsort(hashes, kind="stable")
+
+        keys_table = pa.table({VALID_ROW_ATTRIBUTE: pa.array(disk_keys, type=pa.string())})
+        with pa.OSFile(self._file(KEYS_FILE) + ".tmp", "wb") as sink:
+            with pa.ipc.new_file(sink, keys_table.schema) as writer:
+                writer.write_table(keys_table)
+        self._save_array(HASHES_FILE, hashes[order])
+        self._save_array(HASH_SLOTS_FILE, hash_slots[order])
+        os.replace(self._file(KEYS_FILE) + ".tmp", self._file(KEYS_FILE))
+
+        self._slots.clear()
+        self._removed.clear()
+        self._open()
+
+    def _save_array(self, name: Text, array: np.ndarray) -> None:
+        with open(self._file(name) + ".tmp", "wb") as file:
+            np.save(file, array)
+        os.replace(self._file(name) + ".tmp", self._file(name))
+
+    def _entries(self) -> Tuple[List[Text], np.ndarray]:
+        """Keys flushed to the files in slot order, followed by the keys inserted since the last flush."""
+
+        valid = self._disk_keys.is_valid().to_numpy(zero_copy_only=False)
+        valid[list(self._removed.values())] = False
+        disk_slots = np.flatnonzero(valid)
+        keys = pc.take(self._disk_keys, pa.array(disk_slots, type=pa.int64())).to_pylist()
+        slots = np.fromiter(self._slots.values(), dtype=np.int64, count=len(self._slots))
+
+        return keys + list(self._slots), np.concatenate([disk_slots, slots])
+
+    def _lookup_one(self, key: Text) -> int:
+        slot = self._slots.get(key, -1)
+        if slot < 0:
+            slot = self._lookup_disk(key)
+
+        return slot
+
+    def _lookup_disk(self, key: Text) -> int:
+        if len(self._disk_hashes) == 0 or key in self._removed:
+            return -1
+
+        hashed = np.uint64(key_hash(key))
+        position = int(np.searchsorted(self._disk_hashes, hashed))
+        while position < len(self._disk_hashes) and self._disk_hashes[position] == hashed:
+            slot = int(self._disk_hash_slots[position])
+            if self._disk_keys[slot].as_py() == key:
+                return slot
+            position += 1
+
+        return -1
+
+    def _mark_used(self, key: Text) -> None:
+        if key in self._slots:
+            super()._mark_used(key)
+
+    def shrink(self) -> None:
+        """The slots of the flushed keys are kept, only the touched pages of the files are resident anyway."""
+
+        pass
+
+    def _allocate(self, capacity: int, dim: int) -> None:
+        if self.mode == "c":
+            super()._allocate(capacity, dim)
+            return
+
+        size = self.capacity
+        arrays = {
+            EMBEDDINGS_FILE: (self._matrix, (capacity, dim), self.storage_dtype),
+            COUNTS_FILE: (self._counts, (capacity,), np.int64),
+        }
+        if self.quantized:
+            arrays[SCALES_FILE] = (self._scales, (capacity,), EMBEDDING_DTYPE)
+            arrays[OFFSETS_FILE] = (self._offsets, (capacity,), EMBEDDING_DTYPE)
+
+        grown = {}
+        for name, (array, shape, dtype) in arrays.items():
+            tmp_path = self._file(name) + ".tmp"
+            new_array = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=dtype, shape=shape)
+            if array is not None:
+                new_array[:size] = array[:size]
+            new_array.flush()
+            del new_array
+            os.replace(tmp_path, self._file(name))
+            grown[name] = np.load(self._file(name), mmap_mode="r+")
+
+        self._matrix, self._counts = grown[EMBEDDINGS_FILE], grown[COUNTS_FILE]
+        if self.quantized:
+            self._scales, self._offsets = grown[SCALES_FILE], grown[OFFSETS_FILE]
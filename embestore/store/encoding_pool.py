@@ -0,0 +1,175 @@
+import multiprocessing as mp
+import os
+import queue
+import threading
+from multiprocessing import shared_memory
+from typing import List, Optional, Text, Tuple
+
+import numpy as np
+
+from embestore.store.cache import EMBEDDING_DTYPE
+from embestore.utils import chunks
+
+READY = "ready"
+POLL_SECONDS = 1.0
+
+
+def _attach(name: Text, attached: Optional[shared_memory.SharedMemory]) -> shared_memory.SharedMemory:
+    if attached is not None and attached.name == name:
+        return attached
+    if attached is not None:
+        attached.close()
+
+    return shared_memory.SharedMemory(name=name)
+
+
+def _encode_worker(model_name: Text, threads: int, tasks: mp.Queue, results: mp.Queue) -> None:
+    """Load the model with ``threads`` torch threads, then encode the shards of the tasks into the shared block."""
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(threads)
+    try:
+        model = SentenceTransformer(model_name).eval()
+    except BaseException as error:
+        results.put((READY, repr(error)))
+        return
+    results.put((READY, len(model.encode([""])[0])))
+
+    block: Optional[shared_memory.SharedMemory] = None
+    for task in iter(tasks.get, None):
+        task_id, sentences, block_name, offset, capacity, dim = task
+        try:
+            block = _attach(block_name, block)
+            matrix = np.ndarray((capacity, dim), dtype=EMBEDDING_DTYPE, buffer=block.buf)
+            embeddings = model.encode(sentences, batch_size=len(sentences), convert_to_numpy=True)
+            end = offset + len(sentences)
+            matrix[offset:end] = embeddings
+            del matrix
+            results.put((task_id, None))
+        except BaseException as error:
+            results.put((task_id, repr(error)))
+
+    if block is not None:
+        block.close()
+
+
+class EncodingPool:
+    """Worker processes holding a ``SentenceTransformer`` model each, the sentences are sharded across them.
+
+    Every worker runs torch with ``threads_per_process`` threads, so the processes together use the cores a single
+    process leaves idle. The workers write their embeddings straight into a shared memory block read by the caller,
+    instead of pickling them back. The block is kept and grown between the calls.
+
+    Parameters
+    ----------
+    model_name : Text
+        Name or path of the sentence transformer model.
+    processes : int
+        Number of worker processes.
+    threads_per_process : Optional[int]
+        Torch threads of every worker, by default the CPU count divided by the number of processes.
+    """
+
+    def __init__(self, model_name: Text, processes: int, threads_per_process: Optional[int] = None) -> None:
+        if processes <= 0:
+            raise ValueError("processes must be larger than 0")
+        if threads_per_process is not None and threads_per_process <= 0:
+            raise ValueError("threads_per_process must be larger than 0")
+
+        self.model_name = model_name
+        self.processes = processes
+        self.threads_per_process = threads_per_process or max(1, (os.cpu_count() or 1) // processes)
+        self._lock = threading.Lock()
+        self._block: Optional[shared_memory.SharedMemory] = None
+        self._capacity = 0
+        self._task_id = 0
+
+        context = mp.get_context("spawn")
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        self._workers = [
+            context.Process(
+                target=_encode_worker,
+                args=(model_name, self.threads_per_process, self._tasks, self._results),
+                daemon=True,
+            )
+            for _ in range(processes)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+        dims = [self._get_result()[1] for _ in self._workers]
+        errors = [dim for dim in dims if isinstance(dim, str)]
+        if errors:
+            self.close()
+            raise RuntimeError(f"Encoding worker failed to load the model: {errors[0]}")
+        self.dim = dims[0]
+
+    def _get_result(self) -> Tuple:
+        while True:
+            try:
+                return self._results.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                if not all(worker.is_alive() for worker in self._workers):
+                    raise RuntimeError("An encoding worker exited unexpectedly")
+
+    def _reserve(self, rows: int) -> None:
+        if rows <= self._capacity:
+            return
+
+        capacity = max(rows, 2 * self._capacity)
+        if self._block is not None:
+            self._block.close()
+            self._block.unlink()
+        self._block = shared_memory.SharedMemory(
+            create=True, size=capacity * self.dim * np.dtype(EMBEDDING_DTYPE).itemsize
+        )
+        self._capacity = capacity
+
+    def encode(self, sentences: List[Text]) -> np.ndarray:
+        """Encode the sentences by one shard per worker and read the embeddings from the shared block."""
+
+        if len(sentences) == 0:
+            return np.zeros((0, self.dim), dtype=EMBEDDING_DTYPE)
+
+        with self._lock:
+            self._reserve(len(sentences))
+            shard_size = -(-len(sentences) // self.processes)
+            task_ids = set()
+            for index, shard in enumerate(chunks(sentences, shard_size)):
+                self._task_id += 1
+                task_ids.add(self._task_id)
+                self._tasks.put((self._task_id, shard, self._block.name, index * shard_size, self._capacity, self.dim))
+
+            errors = []
+            while task_ids:
+                task_id, error = self._get_result()
+                task_ids.discard(task_id)
+                if error is not None:
+                    errors.append(error)
+            if errors:
+                raise RuntimeError(f"Encoding worker failed: {errors[0]}")
+
+            matrix = np.ndarray((self._capacity, self.dim), dtype=EMBEDDING_DTYPE, buffer=self._block.buf)
+            embeddings = matrix[: len(sentences)].copy()
+            del matrix
+
+            return embeddings
+
+    def close(self) -> None:
+        """Stop the workers and release the shared block."""
+
+        for worker in self._workers:
+            if worker.is_alive():
+                self._tasks.put(None)
+        for worker in self._workers:
+            worker.join(timeout=POLL_SECONDS * 5)
+            if worker.is_alive():
+                worker.terminate()
+        if self._block is not None:
+            self._block.close()
+            self._block.unlink()
+            self._block = None
+            self._capacity = 0
@@ -0,0 +1,518 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from enum import Enum
+from typing import Callable, Dict, Iterable, List, Optional, Text, Type
+
+import numpy as np
+
+
+class EvictionPolicy(str, Enum):
+    LFU = "lfu"
+    LRU = "lru"
+    WTINYLFU = "w-tinylfu"
+    ARC = "arc"
+    TWO_QUEUE = "2q"
+
+    @classmethod
+    def has_value(cls, value):
+        return value in cls._value2member_map_
+
+
+class EvictionStrategy(ABC):
+    """Bookkeeping of the cached keys which decides the keys to evict.
+
+    The strategies only track the keys, the embeddings stay in the cache. A new policy is added by a new
+    ``EvictionPolicy`` member and a strategy class registered with ``register_eviction_strategy``.
+    """
+
+    requires_max_size = False
+
+    def __init__(self, max_size: Optional[int] = None) -> None:
+        if max_size is not None and max_size <= 0:
+            raise ValueError("max_size must be larger than 0")
+
+        self.max_size = max_size
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @abstractmethod
+    def __contains__(self, key: Text) -> bool:
+        pass
+
+    @abstractmethod
+    def touch(self, key: Text) -> None:
+        """Record a cache hit of the key."""
+
+        pass
+
+    @abstractmethod
+    def insert(self, key: Text, frequency: int = 1) -> List[Text]:
+        """Record a new key, the keys exceeding ``max_size`` are evicted by the insert itself.
+
+        Parameters
+        ----------
+        key : Text
+            Key inserted into the cache.
+        frequency : int
+            Access count of the key, used when the cache is loaded from a file.
+
+        Returns
+        -------
+        List[Text]
+            Evicted keys, they should be removed from the cache.
+        """
+
+        pass
+
+    @abstractmethod
+    def evict(self) -> Optional[Text]:
+        """Evict one key regardless of ``max_size``, return None if there is nothing to evict."""
+
+        pass
+
+    @abstractmethod
+    def remove(self, key: Text) -> None:
+        pass
+
+    def _overflow(self) -> bool:
+        return self.max_size is not None and len(self) > self.max_size
+
+
+EVICTION_STRATEGIES: Dict[EvictionPolicy, Type[EvictionStrategy]] = {}
+
+
+def register_eviction_strategy(policy: EvictionPolicy) -> Callable[[Type[EvictionStrategy]], Type[EvictionStrategy]]:
+    def register(strategy: Type[EvictionStrategy]) -> Type[EvictionStrategy]:
+        EVICTION_STRATEGIES[policy] = strategy
+        return strategy
+
+    return register
+
+
+def create_eviction_strategy(policy: Text, max_size: Optional[int] = None) -> EvictionStrategy:
+    if not EvictionPolicy.has_value(policy):
+        raise ValueError("eviction_policy should be within " + ", ".join([policy.value for policy in EvictionPolicy]))
+
+    return EVICTION_STRATEGIES[EvictionPolicy(policy)](max_size=max_size)
+
+
+@register_eviction_strategy(EvictionPolicy.LRU)
+class LRUEviction(EvictionStrategy):
+    """Least recently used keys are evicted first, every operation is O(1)."""
+
+    def __init__(self, max_size: Optional[int] = None) -> None:
+        super().__init__(max_size)
+        self._keys: "OrderedDict[Text, None]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: Text) -> bool:
+        return key in self._keys
+
+    def touch(self, key: Text) -> None:
+        self._keys.move_to_end(key)
+
+    def insert(self, key: Text, frequency: int = 1) -> List[Text]:
+        self._keys[key] = None
+        self._keys.move_to_end(key)
+
+        evicted = []
+        while self._overflow():
+            evicted.append(self.evict())
+
+        return evicted
+
+    def evict(self) -> Optional[Text]:
+        return self._keys.popitem(last=False)[0] if self._keys else None
+
+    def remove(self, key: Text) -> None:
+        self._keys.pop(key, None)
+
+
+@register_eviction_strategy(EvictionPolicy.LFU)
+class LFUEviction(EvictionStrategy):
+    """Least frequently used keys are evicted first, ties are broken by recency.
+
+    The keys are grouped into buckets by access frequency, so a hit only moves the key to the next bucket. The
+    minimum frequency is only searched again when its bucket runs out while keys loaded with higher counts remain.
+    """
+
+    def __init__(self, max_size: Optional[int] = None) -> None:
+        super().__init__(max_size)
+        self._frequencies: Dict[Text, int] = {}
+        self._buckets: Dict[int, "OrderedDict[Text, None]"] = {}
+        self._min_frequency: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._frequencies)
+
+    def __contains__(self, key: Text) -> bool:
+        return key in self._frequencies
+
+    def frequency(self, key: Text) -> int:
+        return self._frequencies.get(key, 0)
+
+    def touch(self, key: Text) -> None:
+        frequency = self._frequencies[key]
+        self._unlink(key, frequency)
+        self._link(key, frequency + 1)
+
+    def insert(self, key: Text, frequency: int = 1) -> List[Text]:
+        if key in self._frequencies:
+            self.remove(key)
+
+        evicted = []
+        while self.max_size is not None and len(self) >= self.max_size:
+            evicted.append(self.evict())
+        self._link(key, max(frequency, 1))
+
+        return evicted
+
+    def evict(self) -> Optional[Text]:
+        if not self._buckets:
+            return None
+        if self._min_frequency is None:
+            self._min_frequency = min(self._buckets)
+
+        key, _ = self._buckets[self._min_frequency].popitem(last=False)
+        self._drop_bucket_if_empty(self._min_frequency)
+        del self._frequencies[key]
+
+        return key
+
+    def remove(self, key: Text) -> None:
+        frequency = self._frequencies.pop(key, None)
+        if frequency is not None:
+            del self._buckets[frequency][key]
+            self._drop_bucket_if_empty(frequency)
+
+    def _link(self, key: Text, frequency: int) -> None:
+        self._frequencies[key] = frequency
+        self._buckets.setdefault(frequency, OrderedDict())[key] = None
+        if frequency == 1 or len(self._frequencies) == 1:
+            self._min_frequency = frequency
+        elif self._min_frequency is not None and frequency < self._min_frequency:
+            self._min_frequency = frequency
+
+    def _unlink(self, key: Text, frequency: int) -> None:
+        del self._buckets[frequency][key]
+        if not self._buckets[frequency]:
+            del self._buckets[frequency]
+            if self._min_frequency == frequency:
+                # A touched key always lands in the next bucket, so it's the new minimum.
+                self._min_frequency = frequency + 1
+
+    def _drop_bucket_if_empty(self, frequency: int) -> None:
+        if not self._buckets[frequency]:
+            del self._buckets[frequency]
+            if self._min_frequency == frequency:
+                self._min_frequency = None
+
+
+class CountMinSketch:
+    """Approximate access frequencies in a fixed memory, used as the admission filter of W-TinyLFU.
+
+    The counters saturate at 15 and are halved once the number of increments reaches ``sample_size``, so the
+    estimates follow the recent popularity of the keys.
+    """
+
+    DEPTH = 4
+    MAX_COUNT = 15
+    _SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+    _MASK = (1 << 64) - 1
+
+    def __init__(self, width: int, sample_size: Optional[int] = None) -> None:
+        self.width = 1 << max(width - 1, 1).bit_length()
+        self._shift = 64 - self.width.bit_length() + 1
+        self.sample_size = sample_size if sample_size is not None else 10 * width
+        self._table = np.zeros((self.DEPTH, self.width), dtype=np.uint8)
+        self._rows = np.arange(self.DEPTH)
+        self._additions = 0
+
+    def _indexes(self, key: Text) -> List[int]:
+        hashed = hash(key) & self._MASK
+        return [((hashed ^ seed) * seed & self._MASK) >> self._shift for seed in self._SEEDS]
+
+    def increment(self, key: Text, count: int = 1) -> None:
+        indexes = self._indexes(key)
+        counters = self._table[self._rows, indexes]
+        self._table[self._rows, indexes] = np.minimum(counters.astype(np.int64) + count, self.MAX_COUNT)
+
+        self._additions += count
+        if self._additions >= self.sample_size:
+            self._table >>= 1
+            self._additions //= 2
+
+    def estimate(self, key: Text) -> int:
+        return int(self._table[self._rows, self._indexes(key)].min())
+
+
+def _pop_oldest(keys: "OrderedDict[Text, None]") -> Text:
+    return keys.popitem(last=False)[0]
+
+
+class _BoundedEvictionStrategy(EvictionStrategy):
+    """Strategies whose structures are sized by ``max_size``."""
+
+    requires_max_size = True
+
+    def __init__(self, max_size: Optional[int] = None) -> None:
+        if max_size is None:
+            raise ValueError(f"max_size can't be None for {type(self).__name__}")
+        super().__init__(max_size)
+
+
+@register_eviction_strategy(EvictionPolicy.WTINYLFU)
+class WTinyLFUEviction(_BoundedEvictionStrategy):
+    """W-TinyLFU, a small LRU window in front of a segmented LRU main space.
+
+    A key leaving the window only enters the main space if the count-min sketch estimates it more frequent than the
+    main space victim, so a scan of one-off sentences can't flush the hot keys.
+    """
+
+    WINDOW_RATIO = 0.01
+    PROTECTED_RATIO = 0.8
+
+    def __init__(self, max_size: Optional[int] = None) -> None:
+        super().__init__(max_size)
+        self._window_size = max(1, round(self.max_size * self.WINDOW_RATIO))
+        self._main_size = self.max_size - self._window_size
+        self._protected_size = int(self._main_size * self.PROTECTED_RATIO)
+        self._window: "OrderedDict[Text, None]" = OrderedDict()
+        self._probation: "OrderedDict[Text, None]" = OrderedDict()
+        self._protected: "OrderedDict[Text, None]" = OrderedDict()
+        self.sketch = CountMinSketch(width=self.max_size)
+
+    def __len__(self) -> int:
+        return len(self._window) + len(self._probation) + len(self._protected)
+
+    def __contains__(self, key: Text) -> bool:
+        return key in self._window or key in self._probation or key in self._protected
+
+    def touch(self, key: Text) -> None:
+        self.sketch.increment(key)
+        if key in self._window:
+            self._window.move_to_end(key)
+        elif key in self._probation:
+            del self._probation[key]
+            self._protected[key] = None
+            if len(self._protected) > self._protected_size:
+                self._probation[_pop_oldest(self._protected)] = None
+        else:
+            self._protected.move_to_end(key)
+
+    def insert(self, key: Text, frequency: int = 1) -> List[Text]:
+        self.remove(key)
+        self.sketch.increment(key, min(max(frequency, 1), CountMinSketch.MAX_COUNT))
+        self._window[key] = None
+
+        evicted = []
+        while len(self._window) > self._window_size:
+            candidate = _pop_oldest(self._window)
+            if len(self._probation) + len(self._protected) < self._main_size:
+                self._probation[candidate] = None
+                continue
+
+            victims = self._probation or self._protected
+            victim = next(iter(victims)) if victims else None
+            if victim is not None and self.sketch.estimate(candidate) > self.sketch.estimate(victim):
+                del victims[victim]
+                self._probation[candidate] = None
+                evicted.append(victim)
+            else:
+                evicted.append(candidate)
+
+        return evicted
+
+    def evict(self) -> Optional[Text]:
+        for keys in (self._probation, self._protected, self._window):
+            if keys:
+                return _pop_oldest(keys)
+
+        return None
+
+    def remove(self, key: Text) -> None:
+        for keys in (self._window, self._probation, self._protected):
+            keys.pop(key, None)
+
+
+@register_eviction_strategy(EvictionPolicy.ARC)
+class ARCEviction(_BoundedEvictionStrategy):
+    """Adaptive replacement cache.
+
+    Keys seen once live in ``t1`` and keys seen again in ``t2``, the ghost lists ``b1`` and ``b2`` remember the keys
+    recently evicted from them and move the target size ``p`` of ``t1`` towards the list which would have hit.
+    """
+
+    def __init__(self, max_size: Optional[int] = None) -> None:
+        super().__init__(max_size)
+        self.p = 0
+        self._t1: "OrderedDict[Text, None]" = OrderedDict()
+        self._t2: "OrderedDict[Text, None]" = OrderedDict()
+        self._b1: "OrderedDict[Text, None]" = OrderedDict()
+        self._b2: "OrderedDict[Text, None]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._t1) + len(self._t2)
+
+    def __contains__(self, key: Text) -> bool:
+        return key in self._t1 or key in self._t2
+
+    def touch(self, key: Text) -> None:
+        if key in self._t1:
+            del self._t1[key]
+            self._t2[key] = None
+        else:
+            self._t2.move_to_end(key)
+
+    def insert(self, key: Text, frequency: int = 1) -> List[Text]:
+        self.remove(key)
+        evicted = []
+
+        if key in self._b1:
+            self.p = min(self.max_size, self.p + max(len(self._b2) // len(self._b1), 1))
+            del self._b1[key]
+            evicted.extend(self._replace(in_b2=False))
+            self._t2[key] = None
+        elif key in self._b2:
+            self.p = max(0, self.p - max(len(self._b1) // len(self._b2), 1))
+            del self._b2[key]
+            evicted.extend(self._replace(in_b2=True))
+            self._t2[key] = None
+        else:
+            if len(self._t1) + len(self._b1) >= self.max_size:
+                if len(self._t1) < self.max_size:
+                    _pop_oldest(self._b1)
+                    evicted.extend(self._replace(in_b2=False))
+                else:
+                    evicted.append(_pop_oldest(self._t1))
+            else:
+                if len(self) + len(self._b1) + len(self._b2) >= 2 * self.max_size and self._b2:
+                    _pop_oldest(self._b2)
+                evicted.extend(self._replace(in_b2=False))
+            (self._t2 if frequency > 1 else self._t1)[key] = None
+
+        return evicted
+
+    def _replace(self, in_b2: bool) -> List[Text]:
+        if len(self) < self.max_size:
+            return []
+
+        return [self.evict(in_b2=in_b2)]
+
+    def evict(self, in_b2: bool = False) -> Optional[Text]:
+        if self._t1 and (len(self._t1) > self.p or (in_b2 and len(self._t1) == self.p) or not self._t2):
+            key = _pop_oldest(self._t1)
+            self._b1[key] = None
+        elif self._t2:
+            key = _pop_oldest(self._t2)
+            self._b2[key] = None
+        else:
+            return None
+
+        return key
+
+    def remove(self, key: Text) -> None:
+        self._t1.pop(key, None)
+        self._t2.pop(key, None)
+
+
+@register_eviction_strategy(EvictionPolicy.TWO_QUEUE)
+class TwoQueueEviction(_BoundedEvictionStrategy):
+    """2Q, new keys wait in the FIFO ``a1in`` and only the keys requested again after leaving it, as remembered by
+    the ghost FIFO ``a1out``, are promoted to the LRU ``am``.
+    """
+
+    IN_RATIO = 0.25
+    OUT_RATIO = 0.5
+
+    def __init__(self, max_size: Optional[int] = None) -> None:
+        super().__init__(max_size)
+        self._in_size = max(1, int(self.max_size * self.IN_RATIO))
+        self._out_size = max(1, int(self.max_size * self.OUT_RATIO))
+        self._a1in: "OrderedDict[Text, None]" = OrderedDict()
+        self._a1out: "OrderedDict[Text, None]" = OrderedDict()
+        self._am: "OrderedDict[Text, None]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._a1in) + len(self._am)
+
+    def __contains__(self, key: Text) -> bool:
+        return key in self._a1in or key in self._am
+
+    def touch(self, key: Text) -> None:
+        if key in self._am:
+            self._am.move_to_end(key)
+
+    def insert(self, key: Text, frequency: int = 1) -> List[Text]:
+        self.remove(key)
+        if key in self._a1out:
+            del self._a1out[key]
+            self._am[key] = None
+        elif frequency > 1:
+            self._am[key] = None
+        else:
+            self._a1in[key] = None
+
+        evicted = []
+        while self._overflow():
+            evicted.append(self.evict())
+
+        return evicted
+
+    def evict(self) -> Optional[Text]:
+        if self._a1in and (len(self._a1in) > self._in_size or not self._am):
+            key = _pop_oldest(self._a1in)
+            self._a1out[key] = None
+            if len(self._a1out) > self._out_size:
+                _pop_oldest(self._a1out)
+        elif self._am:
+            key = _pop_oldest(self._am)
+        else:
+            return None
+
+        return key
+
+    def remove(self, key: Text) -> None:
+        self._a1in.pop(key, None)
+        self._am.pop(key, None)
+
+
+def replay_trace(trace: Iterable[Text], max_size: int, policies: Optional[Iterable[Text]] = None) -> Dict[Text, float]:
+    """Replay a recorded sentence stream on the eviction policies.
+
+    Parameters
+    ----------
+    trace : Iterable[Text]
+        Requested sentences in the order of the requests.
+    max_size : int
+        Cache size of every policy.
+    policies : Optional[Iterable[Text]]
+        Policies to replay, defaults to every registered policy.
+
+    Returns
+    -------
+    Dict[Text, float]
+        Hit ratio of each policy.
+    """
+
+    strategies = {
+        policy: create_eviction_strategy(policy, max_size=max_size)
+        for policy in (policies or [policy.value for policy in EvictionPolicy])
+    }
+    hits = dict.fromkeys(strategies, 0)
+    requests = 0
+
+    for key in trace:
+        requests += 1
+        for policy, strategy in strategies.items():
+            if key in strategy:
+                hits[policy] += 1
+                strategy.touch(key)
+            else:
+                strategy.insert(key)
+
+    return {policy: hits[policy] / requests if requests else 0.0 for policy in strategies}
@@ -1,37 +1,132 @@
-from typing import List, Literal, Optional, Text
+from typing import List, Literal, Optional, Sequence, Text, Union
 
 import numpy as np
-from jina import Client, DocumentArray
 
-from embestore.store.base import EmbeddingStore
+from embestore.store.backend import CacheBackend
+from embestore.store.base import AsyncEmbeddingStore
+from embestore.store.cache import ArrayCache
+from embestore.store.jina_connection import (
+    BLOB_ENDPOINT,
+    DEFAULT_MAX_FAILURES,
+    DEFAULT_RECOVERY_SECONDS,
+    DEFAULT_RETRIES,
+    JinaConnectionPool,
+    response_embeddings,
+)
 
 
-class JinaEmbeddingStore(EmbeddingStore):
+class JinaEmbeddingStore(AsyncEmbeddingStore):
     def __init__(
         self,
-        embedding_grpc: Text = "grpc://0.0.0.0:54321",
+        embedding_grpc: Union[Text, Sequence[Text]] = "grpc://0.0.0.0:54321",
         max_size: Optional[int] = None,
-        eviction_policy: Optional[Literal["lfu", "lru"]] = None,
+        eviction_policy: Optional[Literal["lfu", "lru", "w-tinylfu", "arc", "2q"]] = None,
         cache_path: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        storage_dtype: Literal["float32", "float16", "int8"] = "float32",
+        cache: Optional[ArrayCache] = None,
+        persistence: Literal["full", "append"] = "full",
+        checkpoint_interval: Optional[float] = None,
+        max_batch_latency_ms: Optional[float] = None,
+        max_batch_size: int = 64,
+        batch_size: Optional[int] = 100,
+        max_in_flight: Optional[int] = None,
+        timeout: Optional[float] = None,
+        retries: int = DEFAULT_RETRIES,
+        max_failures: int = DEFAULT_MAX_FAILURES,
+        recovery_seconds: float = DEFAULT_RECOVERY_SECONDS,
+        l2_cache: Optional[CacheBackend] = None,
     ) -> None:
         """Retrieve the sentence embedding from deployed Jina service, if the cache is existed then return the cache
-        results directly
+        results directly. The store keeps one gRPC channel to the service for all its requests, and the
+        ``aretrieve_embeddings`` coroutine awaits the service from an asyncio channel. With several replicas of the
+        service, every batch goes to the healthy replica with the fewest outstanding requests and the failed batches
+        are retried on the other replicas. The embeddings are requested from the ``/encode_blob`` endpoint of the
+        executor, which returns them as one contiguous matrix.
 
         Args:
-            embedding_grpc (Text): Jina service grpc.
+            embedding_grpc (Union[Text, Sequence[Text]]): Jina service grpc, or the grpc of every replica.
             cache_path (Optional[str], optional): Parquet format cache path. Defaults to None.
-            batch_size (int, optional): Maximum size of batch processing from the Jina service. Defaults to 100.
+            max_bytes (Optional[int], optional): Memory budget of the cache in bytes, needs an
+                ``eviction_policy``. Defaults to None.
+            storage_dtype (Text, optional): Precision of the cached embeddings. Defaults to "float32".
+            cache (Optional[ArrayCache], optional): Cache engine, such as a memory-mapped ``MmapArrayCache``.
+                Defaults to an in-memory ``ArrayCache``.
+            persistence (Text, optional): "append" saves only the changes to the ``cache_path`` directory.
+                Defaults to "full".
+            checkpoint_interval (Optional[float], optional): Seconds between the background saves of the cache
+                during the retrievals. Defaults to None.
+            max_batch_latency_ms (Optional[float], optional): Milliseconds the misses of concurrent calls wait to be
+                sent to the service in one batch. Defaults to None, every call sends its own misses.
+            max_batch_size (int, optional): Maximum number of sentences of a coalesced batch. Defaults to 64.
+            batch_size (Optional[int], optional): Maximum number of sentences sent to the Jina service at once.
+                Defaults to 100.
+            max_in_flight (Optional[int], optional): Number of batches sent to the Jina service at once. Defaults
+                to None, one per replica.
+            timeout (Optional[float], optional): Seconds before a batch sent to a replica is retried on another one.
+                Defaults to None.
+            retries (int, optional): Number of times a failed batch is sent again. Defaults to 2.
+            max_failures (int, optional): Consecutive failures after which a replica is left out. Defaults to 3.
+            recovery_seconds (float, optional): Seconds an unhealthy replica is left out. Defaults to 10.
+            l2_cache (Optional[CacheBackend], optional): Second tier cache, such as a ``SqliteCache`` of the
+                evicted entries or a ``RedisCache`` shared by several hosts, searched before the Jina service.
+                Defaults to None.
         """
-        super().__init__(max_size=max_size, eviction_policy=eviction_policy, cache_path=cache_path)
+        hosts = [embedding_grpc] if isinstance(embedding_grpc, str) else list(embedding_grpc)
+        super().__init__(
+            max_size=max_size,
+            eviction_policy=eviction_policy,
+            cache_path=cache_path,
+            max_bytes=max_bytes,
+            storage_dtype=storage_dtype,
+            cache=cache,
+            persistence=persistence,
+            checkpoint_interval=checkpoint_interval,
+            max_batch_latency_ms=max_batch_latency_ms,
+            max_batch_size=max_batch_size,
+            batch_size=batch_size,
+            max_in_flight=max_in_flight or len(hosts),
+            l2_cache=l2_cache,
+        )
         self.embedding_grpc = embedding_grpc
+        self.connection = JinaConnectionPool(
+            hosts, timeout=timeout, retries=retries, max_failures=max_failures, recovery_seconds=recovery_seconds
+        )
+
+    def health_check(self, timeout: float = 1.0) -> bool:
+        """Whether a replica of the Jina service is reachable, the unreachable ones are marked unhealthy."""
+
+        return any(self.connection.health_check(timeout=timeout))
+
+    def close(self) -> None:
+        self.connection.close()
+
+    async def aclose(self) -> None:
+        await self.connection.aclose()
+
+    @staticmethod
+    def _documents(sentences: List[Text]):
+        from jina import DocumentArray
+
+        document_array = DocumentArray().empty(len(sentences))
+        document_array.texts = sentences
+
+        return document_array
 
     def _retrieve_embeddings_from_model(self, sentences: List[Text]) -> np.ndarray:
-        jina_client = Client(host=self.embedding_grpc)
         embedding_results = np.array([])
 
         if len(sentences) > 0:
-            document_array = DocumentArray().empty(len(sentences))
-            document_array.texts = sentences
-            embedding_results = jina_client.post("/", document_array).embeddings
+            embedding_results = self.connection.post(self._documents(sentences), BLOB_ENDPOINT, response_embeddings)
+
+        return embedding_results
+
+    async def _aretrieve_embeddings_from_model(self, sentences: List[Text]) -> np.ndarray:
+        embedding_results = np.array([])
+
+        if len(sentences) > 0:
+            embedding_results = await self.connection.apost(
+                self._documents(sentences), BLOB_ENDPOINT, response_embeddings
+            )
 
         return embedding_results
@@ -0,0 +1,376 @@
+import asyncio
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Set, Text, Tuple
+
+import grpc
+import numpy as np
+
+if TYPE_CHECKING:
+    from jina import DocumentArray
+    from jina.types.request.data import DataRequest
+
+BLOB_ENDPOINT = "/encode_blob"
+BLOB_DTYPE_TAG = "dtype"
+BLOB_SHAPE_TAG = "shape"
+DEFAULT_RETRIES = 2
+DEFAULT_MAX_FAILURES = 3
+DEFAULT_RECOVERY_SECONDS = 10.0
+GRPC_OPTIONS = [
+    ("grpc.max_send_message_length", -1),
+    ("grpc.max_receive_message_length", -1),
+    ("grpc.keepalive_time_ms", 30000),
+]
+
+
+def response_docs(response: "DataRequest") -> "DocumentArray":
+    return response.docs
+
+
+def response_embeddings(response: "DataRequest") -> np.ndarray:
+    """Embeddings of the response.
+
+    The response of the executor ``/encode_blob`` endpoint is one document holding the raw bytes of the embedding
+    matrix, with its dtype and shape in the tags. The matrix is read from the bytes without a copy, instead of
+    deserializing one document per embedding. The responses of executors without this endpoint fall back to the
+    embeddings of their documents.
+    """
+
+    data = response.proto.data
+    if data.WhichOneof("documents") == "docs" and len(data.docs.docs) == 1:
+        document = data.docs.docs[0]
+        if document.blob and BLOB_DTYPE_TAG in document.tags:
+            shape = tuple(int(size) for size in document.tags[BLOB_SHAPE_TAG])
+            return np.frombuffer(document.blob, dtype=np.dtype(document.tags[BLOB_DTYPE_TAG])).reshape(shape)
+
+    return response.docs.embeddings
+
+
+async def _close_aio_channels(channels: List[grpc.aio.Channel]) -> None:
+    for channel in channels:
+        await channel.close()
+
+
+class JinaConnection:
+    """Long-lived gRPC channel to a Jina gateway.
+
+    The channel is opened once and reused by every request, so a request only costs its RPC instead of the channel
+    setup of a new ``jina.Client``. The requests failing because the gateway is unavailable reconnect the channel and
+    are retried once. The coroutines use their own asyncio channel, opened once per event loop, and the channels of
+    the closed event loops are closed by the next coroutine.
+
+    Parameters
+    ----------
+    host : Text
+        Jina gateway address, such as ``grpc://0.0.0.0:54321``.
+    timeout : Optional[float]
+        Seconds before a request is cancelled.
+    """
+
+    def __init__(self, host: Text, timeout: Optional[float] = None) -> None:
+        self.host = host
+        self.target = host.split("://", 1)[-1]
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._channel: Optional[grpc.Channel] = None
+        self._aio_channels: Dict[asyncio.AbstractEventLoop, grpc.aio.Channel] = {}
+
+    def _get_channel(self) -> grpc.Channel:
+        with self._lock:
+            if self._channel is None:
+                self._channel = grpc.insecure_channel(self.target, options=GRPC_OPTIONS)
+            return self._channel
+
+    def _stub(self):
+        from jina.proto import jina_pb2_grpc
+
+        return jina_pb2_grpc.JinaRPCStub(self._get_channel())
+
+    async def _aio_stub(self):
+        from jina.proto import jina_pb2_grpc
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            channel = self._aio_channels.get(loop)
+            if channel is None:
+                channel = self._aio_channels[loop] = grpc.aio.insecure_channel(self.target, options=GRPC_OPTIONS)
+            stale_channels = [
+                self._aio_channels.pop(stale_loop) for stale_loop in list(self._aio_channels) if stale_loop.is_closed()
+            ]
+        for stale_channel in stale_channels:
+            await stale_channel.close()
+
+        return jina_pb2_grpc.JinaRPCStub(channel)
+
+    @staticmethod
+    def _request(document_array: "DocumentArray", endpoint: Text):
+        from jina.clients.request import request_generator
+
+        return next(iter(request_generator(endpoint, document_array, request_size=len(document_array))))
+
+    @staticmethod
+    def _check(response: "DataRequest") -> "DataRequest":
+        from jina.proto import jina_pb2
+
+        if response.header.status.code == jina_pb2.StatusProto.ERROR:
+            raise RuntimeError(f"Jina request failed: {response.header.status.description}")
+        return response
+
+    def post(
+        self,
+        document_array: "DocumentArray",
+        endpoint: Text = "/",
+        decode: Callable[["DataRequest"], Any] = response_docs,
+    ) -> Any:
+        """Send the documents to the endpoint in one request and return the processed documents, or what ``decode``
+        reads from the response."""
+
+        request = self._request(document_array, endpoint)
+        for attempt in range(2):
+            try:
+                return decode(self._check(next(iter(self._stub().Call(iter([request]), timeout=self.timeout)))))
+            except grpc.RpcError as error:
+                if attempt > 0 or error.code() != grpc.StatusCode.UNAVAILABLE:
+                    raise
+                self.reconnect()
+
+    async def apost(
+        self,
+        document_array: "DocumentArray",
+        endpoint: Text = "/",
+        decode: Callable[["DataRequest"], Any] = response_docs,
+    ) -> Any:
+        """Send the documents to the endpoint from the asyncio channel."""
+
+        request = self._request(document_array, endpoint)
+        for attempt in range(2):
+            try:
+                stub = await self._aio_stub()
+                async for response in stub.Call(iter([request]), timeout=self.timeout):
+                    return decode(self._check(response))
+                raise RuntimeError("Jina gateway closed the stream without any response")
+            except grpc.RpcError as error:
+                if attempt > 0 or error.code() != grpc.StatusCode.UNAVAILABLE:
+                    raise
+                with self._lock:
+                    channel = self._aio_channels.pop(asyncio.get_running_loop(), None)
+                if channel is not None:
+                    await channel.close()
+
+    def is_healthy(self, timeout: float = 1.0) -> bool:
+        """Whether the channel connects to the gateway within the timeout."""
+
+        try:
+            grpc.channel_ready_future(self._get_channel()).result(timeout=timeout)
+        except grpc.FutureTimeoutError:
+            return False
+
+        return True
+
+    def reconnect(self) -> None:
+        """Replace the channel by a new one, such as after the gateway restarted."""
+
+        self.close()
+
+    def close(self) -> None:
+        """Close the channels. The asyncio channels are closed on their event loop while it's running, otherwise on
+        the running loop of the caller or on a new one."""
+
+        channel, aio_channels = self._detach()
+        if channel is not None:
+            channel.close()
+
+        orphaned_channels = []
+        for loop, aio_channel in aio_channels.items():
+            if loop.is_running():
+                asyncio.run_coroutine_threadsafe(aio_channel.close(), loop)
+            else:
+                orphaned_channels.append(aio_channel)
+        if not orphaned_channels:
+            return
+        try:
+            asyncio.get_running_loop().create_task(_close_aio_channels(orphaned_channels))
+        except RuntimeError:
+            asyncio.run(_close_aio_channels(orphaned_channels))
+
+    async def aclose(self) -> None:
+        """Close the channels, the asyncio channels of the other running event loops are closed on their loop."""
+
+        channel, aio_channels = self._detach()
+        if channel is not None:
+            channel.close()
+
+        current_loop = asyncio.get_running_loop()
+        for loop, aio_channel in aio_channels.items():
+            if loop is not current_loop and loop.is_running():
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(aio_channel.close(), loop))
+            else:
+                await aio_channel.close()
+
+    def _detach(self) -> Tuple[Optional[grpc.Channel], Dict[asyncio.AbstractEventLoop, grpc.aio.Channel]]:
+        with self._lock:
+            channel, self._channel = self._channel, None
+            aio_channels, self._aio_channels = self._aio_channels, {}
+
+        return channel, aio_channels
+
+
+class JinaConnectionPool:
+    """Connections to several replicas of a Jina gateway, every request is sent to the least busy healthy one.
+
+    A request goes to the healthy endpoint with the fewest outstanding requests, the ties are broken in turn. A
+    request failing with a gRPC error is retried on another endpoint, and an endpoint failing ``max_failures`` times
+    in a row is left out for ``recovery_seconds`` before it's tried again. When every endpoint is unhealthy the
+    requests are still sent to them rather than failing at once.
+
+    Parameters
+    ----------
+    hosts : Sequence[Text]
+        Jina gateway addresses.
+    timeout : Optional[float]
+        Seconds before a request to one endpoint is cancelled and retried on another one.
+    retries : int
+        Number of times a failed request is sent again.
+    max_failures : int
+        Consecutive failures after which an endpoint is marked unhealthy.
+    recovery_seconds : float
+        Seconds an unhealthy endpoint is left out.
+    """
+
+    def __init__(
+        self,
+        hosts: Sequence[Text],
+        timeout: Optional[float] = None,
+        retries: int = DEFAULT_RETRIES,
+        max_failures: int = DEFAULT_MAX_FAILURES,
+        recovery_seconds: float = DEFAULT_RECOVERY_SECONDS,
+    ) -> None:
+        if len(hosts) == 0:
+            raise ValueError("At least one Jina endpoint is required")
+        if retries < 0:
+            raise ValueError("retries must not be negative")
+        if max_failures <= 0:
+            raise ValueError("max_failures must be larger than 0")
+
+        self.connections = [JinaConnection(host, timeout=timeout) for host in hosts]
+        self.retries = retries
+        self.max_failures = max_failures
+        self.recovery_seconds = recovery_seconds
+        self._lock = threading.Lock()
+        self._outstanding = [0] * len(hosts)
+        self._failures = [0] * len(hosts)
+        self._unhealthy_until = [0.0] * len(hosts)
+        self._turn = 0
+
+    def __len__(self) -> int:
+        return len(self.connections)
+
+    @property
+    def hosts(self) -> List[Text]:
+        return [connection.host for connection in self.connections]
+
+    @property
+    def unhealthy_hosts(self) -> List[Text]:
+        now = time.monotonic()
+        return [connection.host for connection, until in zip(self.connections, self._unhealthy_until) if until > now]
+
+    def outstanding(self) -> List[int]:
+        """Number of requests waiting for every endpoint."""
+
+        with self._lock:
+            return list(self._outstanding)
+
+    def _acquire(self, tried: Set[int]) -> int:
+        with self._lock:
+            now = time.monotonic()
+            untried = [index for index in range(len(self)) if index not in tried] or list(range(len(self)))
+            candidates = [index for index in untried if self._unhealthy_until[index] <= now] or untried
+            turn = self._turn
+            index = min(candidates, key=lambda i: (self._outstanding[i], (i - turn) % len(self)))
+            self._turn = (index + 1) % len(self)
+            self._outstanding[index] += 1
+
+            return index
+
+    def _release(self, index: int, failed: bool) -> None:
+        with self._lock:
+            self._outstanding[index] -= 1
+            self._record(index, healthy=not failed)
+
+    def _record(self, index: int, healthy: bool) -> None:
+        if healthy:
+            self._failures[index] = 0
+            self._unhealthy_until[index] = 0.0
+        else:
+            self._failures[index] += 1
+            if self._failures[index] >= self.max_failures:
+                self._unhealthy_until[index] = time.monotonic() + self.recovery_seconds
+
+    def post(
+        self,
+        document_array: "DocumentArray",
+        endpoint: Text = "/",
+        decode: Callable[["DataRequest"], Any] = response_docs,
+    ) -> Any:
+        """Send the documents to the least busy endpoint, retried on the other endpoints when it fails."""
+
+        tried: Set[int] = set()
+        for attempt in range(self.retries + 1):
+            index = self._acquire(tried)
+            failed = False
+            try:
+                return self.connections[index].post(document_array, endpoint, decode)
+            except grpc.RpcError:
+                failed = True
+                tried.add(index)
+                if attempt == self.retries:
+                    raise
+            finally:
+                self._release(index, failed)
+
+    async def apost(
+        self,
+        document_array: "DocumentArray",
+        endpoint: Text = "/",
+        decode: Callable[["DataRequest"], Any] = response_docs,
+    ) -> Any:
+        """Send the documents to the least busy endpoint from the asyncio channels."""
+
+        tried: Set[int] = set()
+        for attempt in range(self.retries + 1):
+            index = self._acquire(tried)
+            failed = False
+            try:
+                return await self.connections[index].apost(document_array, endpoint, decode)
+            except grpc.RpcError:
+                failed = True
+                tried.add(index)
+                if attempt == self.retries:
+                    raise
+            finally:
+                self._release(index, failed)
+
+    def health_check(self, timeout: float = 1.0) -> List[bool]:
+        """Check every endpoint, the unreachable ones are marked unhealthy and reconnected."""
+
+        healthy = [connection.is_healthy(timeout=timeout) for connection in self.connections]
+        with self._lock:
+            for index, is_healthy in enumerate(healthy):
+                if is_healthy:
+                    self._record(index, healthy=True)
+                else:
+                    self._failures[index] = self.max_failures - 1
+                    self._record(index, healthy=False)
+        for connection, is_healthy in zip(self.connections, healthy):
+            if not is_healthy:
+                connection.reconnect()
+
+        return healthy
+
+    def close(self) -> None:
+        for connection in self.connections:
+            connection.close()
+
+    async def aclose(self) -> None:
+        for connection in self.connections:
+            await connection.aclose()
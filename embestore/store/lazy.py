@@ -0,0 +1,60 @@
+import threading
+from concurrent.futures import Future
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LazyModel(Generic[T]):
+    """Model loaded by ``load`` on its first use, so a process only serving cache hits never pays for it.
+
+    The threads using the model while it's loading wait for the same load. ``warm_up`` starts the load in a
+    background thread instead. A failed load, the warm-up one included, is attempted again by the next ``get``.
+    """
+
+    def __init__(self, load: Callable[[], T], warm_up: bool = False) -> None:
+        self._load = load
+        self._lock = threading.Lock()
+        self._future: Optional[Future] = None
+        if warm_up:
+            self.warm_up()
+
+    @property
+    def loaded(self) -> bool:
+        future = self._future
+        return future is not None and future.done() and future.exception() is None
+
+    def get(self) -> T:
+        with self._lock:
+            future, owner = self._future, self._future is None
+            if owner:
+                future = self._future = Future()
+
+        if owner:
+            try:
+                future.set_result(self._load())
+            except BaseException as error:
+                with self._lock:
+                    self._future = None
+                future.set_exception(error)
+
+        return future.result()
+
+    def get_if_loaded(self) -> Optional[T]:
+        """The model if it's loaded, without loading it."""
+
+        return self._future.result() if self.loaded else None
+
+    def warm_up(self) -> threading.Thread:
+        """Load the model in a background thread."""
+
+        thread = threading.Thread(target=self._warm_up, name="embestore-warm-up", daemon=True)
+        thread.start()
+
+        return thread
+
+    def _warm_up(self) -> None:
+        try:
+            self.get()
+        except BaseException:
+            pass
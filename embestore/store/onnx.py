@@ -0,0 +1,240 @@
+import inspect
+import json
+import os
+import re
+from typing import List, Literal, Optional, Text
+
+import numpy as np
+
+from embestore.store.backend import CacheBackend
+from embestore.store.base import EmbeddingStore
+from embestore.store.cache import EMBEDDING_DTYPE, ArrayCache
+from embestore.store.lazy import LazyModel
+from embestore.utils import chunks
+
+MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model.int8.onnx"
+CONFIG_FILE = "embestore_onnx.json"
+TOKENIZER_FILE = "tokenizer.json"
+DEFAULT_ONNX_DIR = os.path.join(os.path.expanduser("~"), ".cache", "embestore", "onnx")
+DEFAULT_ENCODE_BATCH_SIZE = 32
+OPSET_VERSION = 14
+
+
+def _is_mean_pooling(config: dict) -> bool:
+    if "pooling_mode" in config:
+        return config["pooling_mode"] == "mean"
+
+    return [key for key, value in config.items() if key.startswith("pooling_mode_") and value] == [
+        "pooling_mode_mean_tokens"
+    ]
+
+
+def export_onnx(model_name: Text, path: str) -> None:
+    """Export the transformer of the sentence transformer model to ``path``/model.onnx, with its tokenizer and the
+    pooling settings. Only the token embeddings are exported, the pooling runs on the outputs of the session. The
+    attention is exported as plain operators rather than the fused torch kernel, ONNX Runtime optimizes them better.
+    """
+
+    import torch
+    from sentence_transformers import SentenceTransformer, models
+
+    model = SentenceTransformer(model_name, device="cpu").eval()
+    transformer = model[0].auto_model
+    if hasattr(transformer, "set_attn_implementation"):
+        transformer.set_attn_implementation("eager")
+    pooling = next((module for module in model if isinstance(module, models.Pooling)), None)
+    if pooling is None or not _is_mean_pooling(pooling.get_config_dict()):
+        raise ValueError("Only sentence transformers with mean pooling can be exported to ONNX")
+
+    class TokenEmbeddings(torch.nn.Module):
+        def __init__(self, transformer: torch.nn.Module, input_names: List[Text]) -> None:
+            super().__init__()
+            self.transformer = transformer
+            self.input_names = input_names
+
+        def forward(self, *inputs):
+            return self.transformer(**dict(zip(self.input_names, inputs))).last_hidden_state
+
+    os.makedirs(path, exist_ok=True)
+    example = model.tokenizer(["embestore export"], return_tensors="pt")
+    input_names = list(example.keys())
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["token_embeddings"]}
+    export_options = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(transformer, input_names),
+            tuple(example[name] for name in input_names),
+            os.path.join(path, MODEL_FILE),
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes=dynamic_axes,
+            opset_version=OPSET_VERSION,
+            **export_options,
+        )
+
+    if not model.tokenizer.is_fast:
+        raise ValueError("Only sentence transformers with a fast tokenizer can be exported to ONNX")
+    model.tokenizer.save_pretrained(path)
+    config = {
+        "model_name": model_name,
+        "max_seq_length": model.max_seq_length,
+        "normalize": any(isinstance(module, models.Normalize) for module in model),
+        "pad_token": model.tokenizer.pad_token,
+        "pad_token_id": model.tokenizer.pad_token_id,
+    }
+    with open(os.path.join(path, CONFIG_FILE), "w") as file:
+        json.dump(config, file)
+
+
+def quantize_onnx(path: str) -> None:
+    """Write the int8 dynamically quantized weights of ``path``/model.onnx to ``path``/model.int8.onnx."""
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(
+        os.path.join(path, MODEL_FILE), os.path.join(path, QUANTIZED_MODEL_FILE), weight_type=QuantType.QInt8
+    )
+
+
+class OnnxModel:
+    """ONNX Runtime session of an exported model with its tokenizer, they don't need torch nor transformers."""
+
+    def __init__(self, path: str, model_file: Text = MODEL_FILE, threads: Optional[int] = None) -> None:
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(path, CONFIG_FILE)) as file:
+            config = json.load(file)
+        self.normalize = config["normalize"]
+        self.tokenizer = Tokenizer.from_file(os.path.join(path, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=config["pad_token_id"], pad_token=config["pad_token"])
+
+        options = ort.SessionOptions()
+        if threads is not None:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            os.path.join(path, model_file), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+
+    def encode(self, sentences: List[Text]) -> np.ndarray:
+        """Mean pooled, and normalized if the sentence transformer is, embeddings of one padded batch."""
+
+        encodings = self.tokenizer.encode_batch(sentences)
+        inputs = {
+            "input_ids": np.array([encoding.ids for encoding in encodings], dtype=np.int64),
+            "attention_mask": np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64),
+            "token_type_ids": np.array([encoding.type_ids for encoding in encodings], dtype=np.int64),
+        }
+        token_embeddings = self.session.run(None, {name: inputs[name] for name in self.input_names})[0]
+
+        mask = inputs["attention_mask"][:, :, None].astype(EMBEDDING_DTYPE)
+        embeddings = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+
+        return embeddings
+
+
+class OnnxEmbeddingStore(EmbeddingStore):
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        eviction_policy: Optional[Literal["lfu", "lru", "w-tinylfu", "arc", "2q"]] = None,
+        cache_path: Optional[str] = None,
+        model_name: Text = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+        max_bytes: Optional[int] = None,
+        storage_dtype: Literal["float32", "float16", "int8"] = "float32",
+        cache: Optional[ArrayCache] = None,
+        persistence: Literal["full", "append"] = "full",
+        checkpoint_interval: Optional[float] = None,
+        max_batch_latency_ms: Optional[float] = None,
+        max_batch_size: int = 64,
+        batch_size: Optional[int] = 1024,
+        max_in_flight: int = 1,
+        onnx_path: Optional[str] = None,
+        quantize: bool = False,
+        threads: Optional[int] = None,
+        encode_batch_size: int = DEFAULT_ENCODE_BATCH_SIZE,
+        warm_up: bool = False,
+        l2_cache: Optional[CacheBackend] = None,
+    ) -> None:
+        """Retrieve the sentence embeddings from a sentence transformer model run by ONNX Runtime on CPU.
+
+        The model is exported to ONNX once and kept in ``onnx_path``, the next stores only load the exported files
+        and don't import torch. The mean pooling and the normalization of the sentence transformer run on the token
+        embeddings returned by the session. The model is exported and loaded on the first cache miss, or in a
+        background thread with ``warm_up``.
+
+        Args:
+            model_name (Text): Sentence transformer model with mean pooling.
+            onnx_path (Optional[str], optional): Directory of the exported model. Defaults to a directory named after
+                the model in ``~/.cache/embestore/onnx``.
+            quantize (bool, optional): Run the int8 dynamically quantized model, quantized once next to the exported
+                one. Defaults to False.
+            threads (Optional[int], optional): Intra-op threads of the session. Defaults to None, ONNX Runtime
+                picks the number of physical cores.
+            encode_batch_size (int, optional): Number of sentences of a forward pass, the sentences are sorted by
+                length so a pass pads sentences of similar lengths. Defaults to 32.
+            warm_up (bool, optional): Load the model in a background thread right away. Defaults to False.
+            l2_cache (Optional[CacheBackend], optional): Second tier cache, such as a ``SqliteCache`` of the
+                evicted entries or a ``RedisCache`` shared by several hosts. Defaults to None.
+        """
+
+        if encode_batch_size <= 0:
+            raise ValueError("encode_batch_size must be larger than 0")
+        if threads is not None and threads <= 0:
+            raise ValueError("threads must be larger than 0")
+
+        super().__init__(
+            max_size=max_size,
+            eviction_policy=eviction_policy,
+            cache_path=cache_path,
+            max_bytes=max_bytes,
+            storage_dtype=storage_dtype,
+            cache=cache,
+            persistence=persistence,
+            checkpoint_interval=checkpoint_interval,
+            max_batch_latency_ms=max_batch_latency_ms,
+            max_batch_size=max_batch_size,
+            batch_size=batch_size,
+            max_in_flight=max_in_flight,
+            l2_cache=l2_cache,
+        )
+        self.model_name = model_name
+        self.onnx_path = onnx_path or os.path.join(DEFAULT_ONNX_DIR, re.sub(r"[^\w.-]+", "--", model_name))
+        self.quantize = quantize
+        self.encode_batch_size = encode_batch_size
+        self.threads = threads
+        self._model = LazyModel(self._load_model, warm_up=warm_up)
+
+    @property
+    def model(self) -> OnnxModel:
+        """The ONNX Runtime model, exported and loaded on the first access."""
+
+        return self._model.get()
+
+    def _load_model(self) -> OnnxModel:
+        if not os.path.isfile(os.path.join(self.onnx_path, MODEL_FILE)):
+            export_onnx(self.model_name, self.onnx_path)
+        model_file = MODEL_FILE
+        if self.quantize:
+            model_file = QUANTIZED_MODEL_FILE
+            if not os.path.isfile(os.path.join(self.onnx_path, QUANTIZED_MODEL_FILE)):
+                quantize_onnx(self.onnx_path)
+
+        return OnnxModel(self.onnx_path, model_file=model_file, threads=self.threads)
+
+    def _retrieve_embeddings_from_model(self, sentences: List[Text]) -> np.ndarray:
+        model = self.model
+        order = np.argsort([-len(sentence) for sentence in sentences], kind="stable")
+        embeddings = None
+        for rows in chunks(order, self.encode_batch_size):
+            batch_embeddings = model.encode([sentences[row] for row in rows])
+            if embeddings is None:
+                embeddings = np.empty((len(sentences), batch_embeddings.shape[1]), dtype=EMBEDDING_DTYPE)
+            embeddings[rows] = batch_embeddings
+
+        return embeddings if embeddings is not None else np.zeros((0, 0), dtype=EMBEDDING_DTYPE)
@@ -0,0 +1,222 @@
+import os
+import re
+import threading
+from enum import Enum
+from typing import Dict, List, Optional, Text, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from embestore.store.cache import CHANGE_COLUMN, LFU_COUNTER_COLUMN, ROW_GROUP_SIZE, VALID_ROW_ATTRIBUTE, Change
+
+SEGMENT_PREFIX = "segment"
+COMPACTED_PREFIX = "compacted"
+DEFAULT_MAX_SEGMENTS = 16
+_FILE_PATTERN = re.compile(rf"^({SEGMENT_PREFIX}|{COMPACTED_PREFIX})-(\d+)\.parquet$")
+
+
+def write_parquet(table: pa.Table, path: str) -> None:
+    """Write the table to a temporary file renamed over ``path``, readers never see a partial file."""
+
+    pq.write_table(table, path + ".tmp", row_group_size=ROW_GROUP_SIZE)
+    os.replace(path + ".tmp", path)
+
+
+class Persistence(str, Enum):
+    FULL = "full"
+    APPEND = "append"
+
+    @classmethod
+    def has_value(cls, value):
+        return value in cls._value2member_map_
+
+
+def merge_changes(table: pa.Table) -> pa.Table:
+    """Replay a change table into the cache table it leads to, ordered by the last change of every key.
+
+    Rows without any ``change`` column are inserts. The embeddings come from the last insert of the key and the
+    access count from its last change, the keys deleted after their last insert are dropped.
+    """
+
+    keys = table.column(VALID_ROW_ATTRIBUTE).to_pylist()
+    if CHANGE_COLUMN in table.column_names:
+        changes = table.column(CHANGE_COLUMN).to_numpy()
+        table = table.drop([CHANGE_COLUMN])
+    else:
+        changes = np.full(len(keys), Change.UPSERT, dtype=np.int8)
+
+    embedding_rows: Dict[Text, int] = {}
+    last_rows: Dict[Text, int] = {}
+    for row, (key, change) in enumerate(zip(keys, changes)):
+        if change == Change.DELETE:
+            embedding_rows.pop(key, None)
+            last_rows.pop(key, None)
+        elif change == Change.UPSERT or key in embedding_rows:
+            if change == Change.UPSERT:
+                embedding_rows[key] = row
+            last_rows.pop(key, None)
+            last_rows[key] = row
+
+    merged = table.take(pa.array([embedding_rows[key] for key in last_rows], type=pa.int64()))
+    counts = table.column(LFU_COUNTER_COLUMN).take(pa.array(list(last_rows.values()), type=pa.int64()))
+
+    return merged.set_column(merged.schema.get_field_index(LFU_COUNTER_COLUMN), LFU_COUNTER_COLUMN, counts)
+
+
+class SegmentLog:
+    """Append-only log of cache changes stored as numbered parquet segments in the ``path`` directory.
+
+    Every ``append`` writes a small segment with the changes since the previous save instead of rewriting the whole
+    cache. Once there are more than ``max_segments`` segments, a background thread merges them into a compacted
+    file and deletes the merged files. Every file is written to a temporary name and renamed, so a crash never
+    leaves a partial file behind.
+
+    Parameters
+    ----------
+    path : str
+        Directory of the segments, created if it doesn't exist.
+    max_segments : int
+        Number of segments after which they're compacted.
+    """
+
+    def __init__(self, path: str, max_segments: int = DEFAULT_MAX_SEGMENTS) -> None:
+        if max_segments <= 0:
+            raise ValueError("max_segments must be larger than 0")
+
+        self.path = path
+        self.max_segments = max_segments
+        self._lock = threading.Lock()
+        self._compaction: Optional[threading.Thread] = None
+        self._compaction_error: Optional[BaseException] = None
+
+        os.makedirs(path, exist_ok=True)
+        files = self._files()
+        self._sequence = files[-1][1] if files else 0
+        self._schema = pq.read_schema(self._file(*files[-1])) if files else None
+
+    @property
+    def segment_count(self) -> int:
+        return sum(prefix == SEGMENT_PREFIX for prefix, _ in self._live_files())
+
+    def _file(self, prefix: Text, sequence: int) -> str:
+        return os.path.join(self.path, f"{prefix}-{sequence:010d}.parquet")
+
+    def _files(self) -> List[Tuple[Text, int]]:
+        files = []
+        for name in os.listdir(self.path):
+            match = _FILE_PATTERN.match(name)
+            if match:
+                files.append((match.group(1), int(match.group(2))))
+
+        return sorted(files, key=lambda file: (file[1], file[0] == SEGMENT_PREFIX))
+
+    def _live_files(self) -> List[Tuple[Text, int]]:
+        """The latest compacted file followed by the segments appended after it."""
+
+        files = self._files()
+        compacted = [file for file in files if file[0] == COMPACTED_PREFIX]
+        if compacted:
+            base = compacted[-1]
+            files = [base] + [file for file in files if file[0] == SEGMENT_PREFIX and file[1] > base[1]]
+
+        return files
+
+    def _next_sequence(self) -> int:
+        with self._lock:
+            self._sequence += 1
+            return self._sequence
+
+    def compatible(self, table: pa.Table) -> bool:
+        """Whether the change table can be appended to the segments, their columns, types and dtype should match."""
+
+        if self._schema is None:
+            return True
+
+        def _strip(schema: pa.Schema) -> pa.Schema:
+            if CHANGE_COLUMN in schema.names:
+                schema = schema.remove(schema.get_field_index(CHANGE_COLUMN))
+            return schema
+
+        return _strip(self._schema).equals(_strip(table.schema), check_metadata=True)
+
+    def append(self, table: pa.Table) -> None:
+        """Write the change table as a new segment and start a background compaction if there are too many."""
+
+        write_parquet(table, self._file(SEGMENT_PREFIX, self._next_sequence()))
+        self._schema = table.schema
+        if self.segment_count > self.max_segments:
+            self.compact(background=True)
+
+    def read(self) -> Optional[pa.Table]:
+        """Merge the compacted file and the segments into the cache table, None if nothing was written."""
+
+        with self._lock:
+            tables = [self._read_with_changes(file) for file in self._live_files()]
+        if not tables:
+            return None
+
+        return merge_changes(pa.concat_tables(tables))
+
+    def compact(self, table: Optional[pa.Table] = None, background: bool = False) -> None:
+        """Replace the files by one compacted file.
+
+        Parameters
+        ----------
+        table : Optional[pa.Table]
+            Full cache table to write, by default the merged files.
+        background : bool
+            Merge in a background thread, only when there's no compaction running already.
+        """
+
+        if background:
+            with self._lock:
+                if self._compaction is not None and self._compaction.is_alive():
+                    return
+                self._compaction = threading.Thread(target=self._compact_in_background, daemon=True)
+                self._compaction.start()
+            return
+
+        self.wait_for_compaction()
+        self._compact(table)
+
+    def wait_for_compaction(self, timeout: Optional[float] = None) -> None:
+        """Block until the running background compaction ends, its error is raised here."""
+
+        compaction = self._compaction
+        if compaction is not None:
+            compaction.join(timeout)
+        if self._compaction_error is not None:
+            error, self._compaction_error = self._compaction_error, None
+            raise error
+
+    def _compact_in_background(self) -> None:
+        try:
+            self._compact()
+        except BaseException as error:
+            self._compaction_error = error
+
+    def _compact(self, table: Optional[pa.Table] = None) -> None:
+        if table is None:
+            with self._lock:
+                files = self._live_files()
+            if not files:
+                return
+            table = merge_changes(pa.concat_tables([self._read_with_changes(file) for file in files]))
+            sequence = files[-1][1]
+        else:
+            sequence = self._next_sequence()
+
+        write_parquet(table, self._file(COMPACTED_PREFIX, sequence))
+        self._schema = table.schema
+        with self._lock:
+            for prefix, file_sequence in self._files():
+                if file_sequence < sequence or (file_sequence == sequence and prefix == SEGMENT_PREFIX):
+                    os.remove(self._file(prefix, file_sequence))
+
+    def _read_with_changes(self, file: Tuple[Text, int]) -> pa.Table:
+        table = pq.read_table(self._file(*file))
+        if CHANGE_COLUMN not in table.column_names:
+            table = table.append_column(CHANGE_COLUMN, pa.array(np.full(len(table), Change.UPSERT, dtype=np.int8)))
+
+        return table
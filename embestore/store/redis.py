@@ -0,0 +1,135 @@
+import re
+from itertools import chain
+from typing import TYPE_CHECKING, Optional, Sequence, Text, Tuple
+
+import numpy as np
+
+from embestore.store.backend import CacheBackend
+from embestore.store.cache import EMBEDDING_DTYPE
+from embestore.utils import chunks
+
+if TYPE_CHECKING:
+    import redis
+
+DEFAULT_REDIS_URL = "redis://localhost:6379/0"
+DEFAULT_PREFIX = "embestore:"
+DEFAULT_COMMAND_KEYS = 1000
+SCAN_COUNT = 1000
+
+
+class RedisCache(CacheBackend):
+    """Embeddings kept on a Redis server, shared by the stores of every host using it.
+
+    The embeddings are the raw bytes of their float32 vectors under the prefixed sentence. A call sends one pipeline
+    of ``MGET`` or ``MSET`` commands of up to ``command_keys`` keys each, so a whole request batch costs a single
+    round trip. The connections come from a pool shared by the threads of the store.
+
+    The backend is written through, every model result is stored on the server right away. The sentence embeddings
+    never change, so the entries kept by the in-process cache of the store, its near cache, never go stale.
+
+    Parameters
+    ----------
+    url : Text
+        Redis URL of the server.
+    prefix : Text
+        Prefix of the keys, the stores of different models sharing a server need their own prefix.
+    ttl : Optional[int]
+        Seconds the entries are kept, by default until the server evicts them.
+    max_connections : Optional[int]
+        Size of the connection pool, by default unbounded.
+    command_keys : int
+        Keys of a single ``MGET``, ``MSET`` or ``DEL`` command.
+    client : Optional[redis.Redis]
+        Client to use instead of connecting to ``url``, such as a ``fakeredis`` client.
+    """
+
+    write_through = True
+
+    def __init__(
+        self,
+        url: Text = DEFAULT_REDIS_URL,
+        prefix: Text = DEFAULT_PREFIX,
+        ttl: Optional[int] = None,
+        max_connections: Optional[int] = None,
+        command_keys: int = DEFAULT_COMMAND_KEYS,
+        client: Optional["redis.Redis"] = None,
+    ) -> None:
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be larger than 0")
+        if command_keys <= 0:
+            raise ValueError("command_keys must be larger than 0")
+
+        if client is None:
+            import redis
+
+            client = redis.Redis(connection_pool=redis.ConnectionPool.from_url(url, max_connections=max_connections))
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.command_keys = command_keys
+
+    def _key(self, key: Text) -> bytes:
+        return (self.prefix + key).encode("utf-8")
+
+    def _scan(self):
+        """Keys of the prefix, the glob characters of the prefix are escaped."""
+
+        return self.client.scan_iter(match=re.sub(r"([*?\[\]\\])", r"\\\1", self.prefix) + "*", count=SCAN_COUNT)
+
+    def __len__(self) -> int:
+        """Number of keys of the prefix, counted by scanning the server."""
+
+        return sum(1 for _ in self._scan())
+
+    def size(self) -> Optional[int]:
+        return None
+
+    def __contains__(self, key: Text) -> bool:
+        return bool(self.client.exists(self._key(key)))
+
+    def get(self, keys: Sequence[Text]) -> Tuple[np.ndarray, np.ndarray]:
+        unique_keys = list(dict.fromkeys(keys))
+        pipeline = self.client.pipeline(transaction=False)
+        for chunk in chunks(unique_keys, self.command_keys):
+            pipeline.mget([self._key(key) for key in chunk])
+        values = dict(zip(unique_keys, chain.from_iterable(pipeline.execute()))) if unique_keys else {}
+
+        found = np.fromiter((values[key] is not None for key in keys), dtype=bool, count=len(keys))
+        found_values = [values[key] for key, hit in zip(keys, found) if hit]
+        dim = len(found_values[0]) // np.dtype(EMBEDDING_DTYPE).itemsize if found_values else 0
+        embeddings = np.zeros((len(keys), dim), dtype=EMBEDDING_DTYPE)
+        if found_values:
+            embeddings[found] = np.frombuffer(b"".join(found_values), dtype=EMBEDDING_DTYPE).reshape(-1, dim)
+
+        return embeddings, found
+
+    def put(self, keys: Sequence[Text], embeddings: np.ndarray) -> None:
+        if len(keys) == 0:
+            return
+
+        embeddings = np.ascontiguousarray(embeddings, dtype=EMBEDDING_DTYPE)
+        if embeddings.ndim != 2 or embeddings.shape[0] != len(keys):
+            raise ValueError("embeddings should be a matrix with one row per key")
+
+        pipeline = self.client.pipeline(transaction=False)
+        for chunk in chunks(zip(keys, embeddings), self.command_keys):
+            mapping = {self._key(key): embedding.tobytes() for key, embedding in chunk}
+            if self.ttl is None:
+                pipeline.mset(mapping)
+            else:
+                for key, value in mapping.items():
+                    pipeline.set(key, value, ex=self.ttl)
+        pipeline.execute()
+
+    def remove(self, keys: Sequence[Text]) -> None:
+        pipeline = self.client.pipeline(transaction=False)
+        for chunk in chunks(keys, self.command_keys):
+            pipeline.delete(*[self._key(key) for key in chunk])
+        pipeline.execute()
+
+    def clear(self) -> None:
+        for chunk in chunks(self._scan(), self.command_keys):
+            self.client.delete(*chunk)
+
+    def close(self) -> None:
+        self.client.connection_pool.disconnect()
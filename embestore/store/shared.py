@@ -0,0 +1,520 @@
+import fcntl
+import inspect
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from typing import Callable, Iterator, List, Optional, Sequence, Text, Tuple, TypeVar
+
+import numpy as np
+import pyarrow as pa
+
+from embestore.store.cache import EMBEDDING_DTYPE, ArrayCache, Change, StorageDtype
+from embestore.store.disk import key_hash
+
+T = TypeVar("T")
+
+MAGIC = 0x656D6265
+LAYOUT_VERSION = 1
+DEFAULT_KEY_BYTES_PER_ENTRY = 256
+OPTIMISTIC_READS = 8
+ALIGNMENT = 64
+EMPTY = -1
+STORAGE_DTYPES = [dtype.value for dtype in StorageDtype]
+UNTRACKED_BLOCKS = "track" in inspect.signature(shared_memory.SharedMemory).parameters
+
+# Header fields, int64 each.
+(
+    H_MAGIC,
+    H_LAYOUT_VERSION,
+    H_CAPACITY,
+    H_DIM,
+    H_STORAGE_DTYPE,
+    H_KEY_BYTES,
+    H_SIZE,
+    H_SEQUENCE,
+    H_VERSION,
+    H_HAND,
+    H_FREE,
+    H_HEAP_USED,
+    H_LIVE_KEY_BYTES,
+) = range(13)
+HEADER_FIELDS = 16
+
+
+def _bucket_count(capacity: int) -> int:
+    return 1 << max(1, int(2 * capacity - 1).bit_length())
+
+
+def _layout(capacity: int, dim: int, storage_dtype: Text, key_bytes: int) -> List[Tuple[Text, Tuple, np.dtype]]:
+    return [
+        ("header", (HEADER_FIELDS,), np.dtype(np.int64)),
+        ("buckets", (_bucket_count(capacity),), np.dtype(np.int64)),
+        ("hashes", (capacity,), np.dtype(np.uint64)),
+        ("key_offsets", (capacity,), np.dtype(np.int64)),
+        ("key_lengths", (capacity,), np.dtype(np.int64)),
+        ("free_slots", (capacity,), np.dtype(np.int64)),
+        ("counts", (capacity,), np.dtype(np.int64)),
+        ("referenced", (capacity,), np.dtype(np.uint8)),
+        ("scales", (capacity,), np.dtype(EMBEDDING_DTYPE)),
+        ("offsets", (capacity,), np.dtype(EMBEDDING_DTYPE)),
+        ("matrix", (capacity, dim), np.dtype(storage_dtype)),
+        ("heap", (key_bytes,), np.dtype(np.uint8)),
+    ]
+
+
+def _aligned_nbytes(shape: Tuple, dtype: np.dtype) -> int:
+    return -(-int(np.prod(shape)) * dtype.itemsize // ALIGNMENT) * ALIGNMENT
+
+
+def _open_block(name: Text, size: Optional[int] = None) -> shared_memory.SharedMemory:
+    """Create or attach the block without the resource tracker, which would unlink it when the process exits while
+    the other processes still use it."""
+
+    create = size is not None
+    if UNTRACKED_BLOCKS:
+        return shared_memory.SharedMemory(name=name, create=create, size=size or 0, track=False)
+
+    block = shared_memory.SharedMemory(name=name, create=create, size=size or 0)
+    resource_tracker.unregister(block._name, "shared_memory")
+
+    return block
+
+
+class SharedMemoryArrayCache(ArrayCache):
+    """Array cache living in a named shared memory block, shared by every process of the host opening the name.
+
+    The embeddings, the counters, the hash index of the keys and the key bytes are arrays over the same block, the
+    processes read them in place without copying. The first process opening the name creates the block with a fixed
+    ``capacity``, the next ones attach to it.
+
+    The writes are serialized by a lock file and bump a sequence number around their changes. The reads don't take
+    the lock, they're retried when the sequence number changed meanwhile, and only fall back to the lock after
+    ``OPTIMISTIC_READS`` attempts. The access counts are incremented without the lock, concurrent hits of the same
+    key in several processes may count once.
+
+    Once full, the cache evicts by itself with the CLOCK policy, an approximation of LRU whose reference bits and
+    hand are in the block too, so the evictions are the same for every process. The stores using this cache don't
+    take an ``eviction_policy``. The order of ``keys`` and ``items`` is the slot order.
+
+    The block outlives the processes, ``unlink`` removes it once the deployment stops.
+
+    Parameters
+    ----------
+    name : Text
+        Name of the shared memory block, the processes opening the same name share the cache.
+    capacity : int
+        Number of cached embeddings.
+    dim : int
+        Embedding dimension.
+    storage_dtype : Text
+        Storage dtype of the embeddings.
+    key_bytes : Optional[int]
+        Bytes for the UTF-8 encoded keys, by default 256 bytes per entry. The oldest entries are evicted when the
+        keys don't fit.
+    """
+
+    evicting = True
+
+    def __init__(
+        self,
+        name: Text,
+        capacity: int,
+        dim: int,
+        storage_dtype: Text = StorageDtype.FLOAT32.value,
+        key_bytes: Optional[int] = None,
+    ) -> None:
+        if dim <= 0:
+            raise ValueError("dim must be larger than 0")
+        if key_bytes is not None and key_bytes <= 0:
+            raise ValueError("key_bytes must be larger than 0")
+
+        super().__init__(initial_capacity=capacity, storage_dtype=storage_dtype)
+        self.name = name
+        self.lock_path = os.path.join(tempfile.gettempdir(), f"embestore-{name}.lock")
+        self._thread_lock = threading.RLock()
+        self._local = threading.local()
+        self._lock_pid: Optional[int] = None
+        self._lock_file = None
+
+        key_bytes = key_bytes or capacity * DEFAULT_KEY_BYTES_PER_ENTRY
+        with self._locked():
+            try:
+                self._block = _open_block(name)
+                created = False
+            except FileNotFoundError:
+                layout = _layout(capacity, dim, self.storage_dtype, key_bytes)
+                self._block = _open_block(name, size=sum(_aligned_nbytes(shape, dtype) for _, shape, dtype in layout))
+                created = True
+            self._map(created, capacity, dim, key_bytes)
+
+    def _map(self, created: bool, capacity: int, dim: int, key_bytes: int) -> None:
+        header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=self._block.buf)
+        if created:
+            header[:] = 0
+            header[[H_MAGIC, H_LAYOUT_VERSION, H_KEY_BYTES]] = [MAGIC, LAYOUT_VERSION, key_bytes]
+            header[[H_CAPACITY, H_DIM, H_STORAGE_DTYPE]] = [capacity, dim, STORAGE_DTYPES.index(self.storage_dtype)]
+        elif header[H_MAGIC] != MAGIC or header[H_LAYOUT_VERSION] != LAYOUT_VERSION:
+            raise ValueError(f"Shared memory block {self.name} isn't an embedding cache")
+        else:
+            shared = (int(header[H_CAPACITY]), int(header[H_DIM]), STORAGE_DTYPES[int(header[H_STORAGE_DTYPE])])
+            if shared != (capacity, dim, self.storage_dtype):
+                raise ValueError(f"Shared cache {self.name} has capacity, dim and storage dtype {shared}")
+
+        offset = 0
+        arrays = {}
+        for array_name, shape, dtype in _layout(capacity, dim, self.storage_dtype, int(header[H_KEY_BYTES])):
+            arrays[array_name] = np.ndarray(shape, dtype=dtype, buffer=self._block.buf, offset=offset)
+            offset += _aligned_nbytes(shape, dtype)
+
+        self._header = arrays["header"]
+        self._buckets = arrays["buckets"]
+        self._hashes = arrays["hashes"]
+        self._key_offsets = arrays["key_offsets"]
+        self._key_lengths = arrays["key_lengths"]
+        self._free = arrays["free_slots"]
+        self._counts = arrays["counts"]
+        self._referenced = arrays["referenced"]
+        self._scales = arrays["scales"]
+        self._offsets = arrays["offsets"]
+        self._matrix = arrays["matrix"]
+        self._heap = arrays["heap"]
+        # Indexing memoryviews returns plain ints, much faster than numpy scalars in the probe loop.
+        self._views = tuple(
+            memoryview(array)
+            for array in (self._buckets, self._hashes, self._key_offsets, self._key_lengths, self._heap)
+        )
+        if created:
+            self._reset()
+
+    @property
+    def version(self) -> int:
+        """Number of changes made by every process, the stores rebuild their data frame view when it changes."""
+
+        return int(self._header[H_VERSION]) if hasattr(self, "_header") else 0
+
+    @version.setter
+    def version(self, value: int) -> None:
+        # Set by ArrayCache.__init__ only, the version is counted in the shared header.
+        pass
+
+    @property
+    def nbytes(self) -> int:
+        row_nbytes = self._matrix.strides[0] + self._counts.itemsize
+        if self.quantized:
+            row_nbytes += self._scales.itemsize + self._offsets.itemsize
+
+        return len(self) * row_nbytes + int(self._header[H_LIVE_KEY_BYTES])
+
+    @property
+    def allocated_nbytes(self) -> int:
+        return self._block.size
+
+    def __len__(self) -> int:
+        return int(self._header[H_SIZE])
+
+    def __contains__(self, key: Text) -> bool:
+        return bool(self._lookup([key])[0] >= 0)
+
+    def __iter__(self) -> Iterator[Text]:
+        return iter(self.keys())
+
+    def keys(self) -> List[Text]:
+        return self._read(lambda: self._entries()[0])
+
+    def get(self, keys: Sequence[Text]) -> Tuple[np.ndarray, np.ndarray]:
+        return self._read(lambda: super(SharedMemoryArrayCache, self).get(keys))
+
+    def counts(self, keys: Sequence[Text]) -> np.ndarray:
+        return self._read(lambda: super(SharedMemoryArrayCache, self).counts(keys))
+
+    def key_counts(self) -> Tuple[List[Text], np.ndarray]:
+        return self._read(lambda: super(SharedMemoryArrayCache, self).key_counts())
+
+    def reserve(self, capacity: int, dim: int) -> None:
+        """The capacity is fixed when the block is created, only the dimension is checked."""
+
+        if dim != self.dim:
+            raise ValueError(f"Embedding dimension should be {self.dim}, got {dim}")
+
+    def touch(self, keys: Sequence[Text]) -> np.ndarray:
+        slots = self._lookup(keys)
+        found = slots >= 0
+        np.add.at(self._counts, slots[found], 1)
+        self._referenced[slots[found]] = 1
+        for key, is_found in zip(keys, found):
+            if is_found:
+                self._record_change(key, Change.COUNT)
+        self._header[H_VERSION] += 1
+
+        counts = np.zeros(len(keys), dtype=np.int64)
+        counts[found] = self._counts[slots[found]]
+
+        return counts
+
+    def remove(self, keys: Sequence[Text]) -> None:
+        with self._locked(write=True):
+            for key in keys:
+                slot, bucket = self._find(key)
+                if slot >= 0:
+                    self._unlink(slot, bucket)
+                    self._record_change(key, Change.DELETE)
+
+    def clear(self) -> None:
+        with self._locked(write=True):
+            if self.track_changes:
+                for key in self._entries()[0]:
+                    self._record_change(key, Change.DELETE)
+            self._reset()
+
+    def items(self) -> Tuple[List[Text], np.ndarray, np.ndarray]:
+        with self._locked():
+            return super().items()
+
+    def to_table(self) -> pa.Table:
+        with self._locked():
+            return super().to_table()
+
+    def changes_table(self) -> pa.Table:
+        with self._locked():
+            return super().changes_table()
+
+    def unlink(self) -> None:
+        """Remove the shared memory block and its lock file, the processes still attached keep their mapping."""
+
+        if not UNTRACKED_BLOCKS:
+            resource_tracker.register(self._block._name, "shared_memory")
+        self._block.unlink()
+        if os.path.exists(self.lock_path):
+            os.remove(self.lock_path)
+
+    def close(self) -> None:
+        """Detach this process from the block."""
+
+        for name in list(vars(self)):
+            if isinstance(getattr(self, name), (np.ndarray, tuple)):
+                setattr(self, name, None)
+        self._block.close()
+
+    @contextmanager
+    def _locked(self, write: bool = False) -> Iterator[None]:
+        """Hold the lock of the threads of this process and the lock file shared with the other processes. A write
+        makes the sequence number odd until it's done, so the optimistic readers retry."""
+
+        with self._thread_lock:
+            depth = getattr(self._local, "depth", 0)
+            if depth == 0:
+                fcntl.flock(self._lock_fd(), fcntl.LOCK_EX)
+            self._local.depth = depth + 1
+            writing = write and not getattr(self._local, "writing", False)
+            if writing:
+                self._local.writing = True
+                self._header[H_SEQUENCE] += 1
+            try:
+                yield
+            finally:
+                if writing:
+                    self._header[H_SEQUENCE] += 1
+                    self._header[H_VERSION] += 1
+                    self._local.writing = False
+                self._local.depth = depth
+                if depth == 0:
+                    fcntl.flock(self._lock_fd(), fcntl.LOCK_UN)
+
+    def _lock_fd(self) -> int:
+        # A forked process shares the open file of its parent, and with it the lock, so it opens its own.
+        if self._lock_pid != os.getpid():
+            self._lock_file = open(self.lock_path, "a+")
+            self._lock_pid = os.getpid()
+
+        return self._lock_file.fileno()
+
+    def _read(self, read: Callable[[], T]) -> T:
+        """Run ``read`` without the lock and keep its result if no write happened meanwhile."""
+
+        if getattr(self._local, "depth", 0) == 0:
+            for _ in range(OPTIMISTIC_READS):
+                sequence = int(self._header[H_SEQUENCE])
+                if sequence % 2 == 1:
+                    continue
+                try:
+                    result = read()
+                except (IndexError, ValueError, UnicodeDecodeError):
+                    continue
+                if int(self._header[H_SEQUENCE]) == sequence:
+                    return result
+
+        with self._locked():
+            return read()
+
+    def _reset(self) -> None:
+        self._buckets[:] = EMPTY
+        self._key_lengths[:] = EMPTY
+        self._referenced[:] = 0
+        self._free[:] = np.arange(self.capacity - 1, -1, -1)
+        self._header[[H_SIZE, H_HAND, H_HEAP_USED, H_LIVE_KEY_BYTES]] = 0
+        self._header[H_FREE] = self.capacity
+
+    def _key(self, slot: int) -> Text:
+        start = int(self._key_offsets[slot])
+        end = start + int(self._key_lengths[slot])
+
+        return self._heap[start:end].tobytes().decode("utf-8")
+
+    def _find(self, key: Text) -> Tuple[int, int]:
+        """Slot of the key, or -1, with the bucket holding it or the empty bucket ending its probe."""
+
+        encoded_key = key.encode("utf-8")
+        hashed = key_hash(key)
+        buckets, hashes, key_offsets, key_lengths, heap = self._views
+        mask = len(buckets) - 1
+        bucket = hashed & mask
+        while True:
+            slot = buckets[bucket]
+            if slot == EMPTY:
+                return -1, bucket
+            if hashes[slot] == hashed and key_lengths[slot] == len(encoded_key):
+                start = key_offsets[slot]
+                end = start + len(encoded_key)
+                if heap[start:end] == encoded_key:
+                    return slot, bucket
+            bucket = (bucket + 1) & mask
+
+    def _lookup(self, keys: Sequence[Text]) -> np.ndarray:
+        return self._read(lambda: np.fromiter((self._find(key)[0] for key in keys), dtype=np.int64, count=len(keys)))
+
+    def _lookup_one(self, key: Text) -> int:
+        return self._find(key)[0]
+
+    def _entries(self) -> Tuple[List[Text], np.ndarray]:
+        slots = np.flatnonzero(self._key_lengths >= 0)
+
+        return [self._key(slot) for slot in slots], slots
+
+    def _mark_used(self, key: Text) -> None:
+        slot = self._lookup_one(key)
+        if slot >= 0:
+            self._referenced[slot] = 1
+
+    def validate(self, keys: Sequence[Text], embeddings: Optional[np.ndarray] = None) -> None:
+        super().validate(keys, embeddings)
+        self._validate_key_bytes([key.encode("utf-8") for key in keys])
+
+    def _validate_key_bytes(self, encoded_keys: List[bytes]) -> None:
+        if encoded_keys and max(map(len, encoded_keys)) > len(self._heap):
+            raise ValueError(f"Keys should be shorter than the {len(self._heap)} key bytes of the cache")
+
+    def _put(
+        self,
+        keys: Sequence[Text],
+        values: np.ndarray,
+        scales: Optional[np.ndarray] = None,
+        offsets: Optional[np.ndarray] = None,
+        counts: Optional[Sequence[int]] = None,
+    ) -> None:
+        if values.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension should be {self.dim}, got {values.shape[1]}")
+        encoded_keys = [key.encode("utf-8") for key in keys]
+        self._validate_key_bytes(encoded_keys)
+
+        with self._locked(write=True):
+            slots = np.empty(len(keys), dtype=np.int64)
+            for i, (key, encoded_key) in enumerate(zip(keys, encoded_keys)):
+                slot = self._find(key)[0]
+                if slot < 0:
+                    slot = self._insert(key, encoded_key)
+                else:
+                    self._referenced[slot] = 1
+                self._record_change(key, Change.UPSERT)
+                slots[i] = slot
+
+            # A key of the batch evicted by a later one leaves its slot free or to the later key, so only the last
+            # row of every slot still in use is written.
+            last_rows = len(slots) - 1 - np.unique(slots[::-1], return_index=True)[1]
+            kept = last_rows[self._key_lengths[slots[last_rows]] >= 0]
+            self._matrix[slots[kept]] = values[kept]
+            if self.quantized:
+                self._scales[slots[kept]] = np.asarray(scales)[kept]
+                self._offsets[slots[kept]] = np.asarray(offsets)[kept]
+            if counts is not None:
+                self._counts[slots[kept]] = np.asarray(counts)[kept]
+
+    def _insert(self, key: Text, encoded_key: bytes) -> int:
+        while self._header[H_FREE] == 0:
+            self._evict()
+        while self._header[H_HEAP_USED] + len(encoded_key) > len(self._heap):
+            if self._header[H_HEAP_USED] > self._header[H_LIVE_KEY_BYTES]:
+                self._compact_keys()
+            else:
+                self._evict()
+
+        self._header[H_FREE] -= 1
+        slot = int(self._free[self._header[H_FREE]])
+        start = int(self._header[H_HEAP_USED])
+        end = start + len(encoded_key)
+        self._heap[start:end] = np.frombuffer(encoded_key, dtype=np.uint8)
+        self._key_offsets[slot] = start
+        self._key_lengths[slot] = len(encoded_key)
+        self._hashes[slot] = np.uint64(key_hash(key))
+        self._counts[slot] = 0
+        self._referenced[slot] = 0
+        self._buckets[self._find(key)[1]] = slot
+        self._header[[H_SIZE, H_HEAP_USED, H_LIVE_KEY_BYTES]] += [1, len(encoded_key), len(encoded_key)]
+
+        return slot
+
+    def _evict(self) -> None:
+        """Evict the first slot of the CLOCK hand without its reference bit, clearing the bits on the way."""
+
+        hand = int(self._header[H_HAND])
+        while True:
+            slot = hand
+            hand = (hand + 1) % self.capacity
+            if self._key_lengths[slot] < 0:
+                continue
+            if self._referenced[slot]:
+                self._referenced[slot] = 0
+                continue
+            break
+        self._header[H_HAND] = hand
+
+        key = self._key(slot)
+        self._unlink(slot, self._find(key)[1])
+        self._record_change(key, Change.DELETE)
+
+    def _unlink(self, slot: int, bucket: int) -> None:
+        """Free the slot and delete its bucket, shifting back the next buckets of the probe so no tombstone is left."""
+
+        mask = len(self._buckets) - 1
+        position = bucket
+        while True:
+            position = (position + 1) & mask
+            moved_slot = int(self._buckets[position])
+            if moved_slot == EMPTY:
+                break
+            home = int(self._hashes[moved_slot]) & mask
+            if (position - home) & mask >= (position - bucket) & mask:
+                self._buckets[bucket] = moved_slot
+                bucket = position
+        self._buckets[bucket] = EMPTY
+
+        self._header[H_LIVE_KEY_BYTES] -= self._key_lengths[slot]
+        self._key_lengths[slot] = EMPTY
+        self._free[self._header[H_FREE]] = slot
+        self._header[[H_FREE, H_SIZE]] += [1, -1]
+
+    def _compact_keys(self) -> None:
+        """Move the bytes of the cached keys to the start of the heap, over the bytes of the removed keys."""
+
+        slots = np.flatnonzero(self._key_lengths >= 0)
+        start = 0
+        for slot in slots[np.argsort(self._key_offsets[slots], kind="stable")]:
+            length = int(self._key_lengths[slot])
+            source = int(self._key_offsets[slot])
+            source_end = source + length
+            end = start + length
+            self._heap[start:end] = self._heap[source:source_end]
+            self._key_offsets[slot] = start
+            start = end
+        self._header[H_HEAP_USED] = start
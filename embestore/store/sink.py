@@ -0,0 +1,128 @@
+import os
+import struct
+from enum import Enum
+from typing import Iterable, List, Optional, Text, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from embestore.store.cache import EMBEDDING_DTYPE, ROW_GROUP_SIZE, VALID_COLUMN_ATTRIBUTE, VALID_ROW_ATTRIBUTE
+
+NPY_HEADER_SIZE = 128
+
+
+class SinkFormat(str, Enum):
+    PARQUET = "parquet"
+    NPY = "npy"
+
+    @classmethod
+    def has_value(cls, value):
+        return value in cls._value2member_map_
+
+
+def _npy_header(rows: int, dim: int) -> bytes:
+    """Version 1.0 ``.npy`` header padded to a fixed size, so it can be rewritten once the row count is known."""
+
+    header = "{'descr': %r, 'fortran_order': False, 'shape': (%d, %d), }" % (
+        np.lib.format.dtype_to_descr(np.dtype(EMBEDDING_DTYPE)),
+        rows,
+        dim,
+    )
+    header = header.ljust(NPY_HEADER_SIZE - 11) + "\n"
+
+    return np.lib.format.MAGIC_PREFIX + b"\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1")
+
+
+def write_npy(batches: Iterable[Tuple[List[Text], np.ndarray]], path: str) -> int:
+    """Stream the embedding batches into a float32 ``.npy`` matrix, the sentences aren't written.
+
+    Returns
+    -------
+    int
+        Number of written rows.
+    """
+
+    rows, dim = 0, 0
+    try:
+        with open(path + ".tmp", "wb") as file:
+            file.write(_npy_header(rows, dim))
+            for _, embeddings in batches:
+                embeddings = np.ascontiguousarray(embeddings, dtype=EMBEDDING_DTYPE)
+                if rows == 0:
+                    dim = embeddings.shape[1]
+                elif embeddings.shape[1] != dim:
+                    raise ValueError("Embeddings should have the same dimension")
+                file.write(embeddings.tobytes())
+                rows += len(embeddings)
+            file.seek(0)
+            file.write(_npy_header(rows, dim))
+    except BaseException:
+        os.remove(path + ".tmp")
+        raise
+    os.replace(path + ".tmp", path)
+
+    return rows
+
+
+def write_parquet_embeddings(batches: Iterable[Tuple[List[Text], np.ndarray]], path: str) -> int:
+    """Stream the sentences and their float32 embeddings into a parquet file, one row group per batch at most.
+
+    Returns
+    -------
+    int
+        Number of written rows.
+    """
+
+    rows = 0
+    writer: Optional[pq.ParquetWriter] = None
+    try:
+        for sentences, embeddings in batches:
+            embeddings = np.asarray(embeddings, dtype=EMBEDDING_DTYPE)
+            table = pa.table(
+                {
+                    VALID_ROW_ATTRIBUTE: pa.array(sentences, type=pa.string()),
+                    VALID_COLUMN_ATTRIBUTE: pa.FixedSizeListArray.from_arrays(
+                        pa.array(embeddings.reshape(-1)), embeddings.shape[1]
+                    ),
+                }
+            )
+            if writer is None:
+                writer = pq.ParquetWriter(path + ".tmp", table.schema)
+            writer.write_table(table, row_group_size=ROW_GROUP_SIZE)
+            rows += len(sentences)
+    except BaseException:
+        if writer is not None:
+            writer.close()
+            os.remove(path + ".tmp")
+        raise
+
+    if writer is None:
+        return 0
+    writer.close()
+    os.replace(path + ".tmp", path)
+
+    return rows
+
+
+def write_embeddings(
+    batches: Iterable[Tuple[List[Text], np.ndarray]], path: str, sink_format: Optional[Text] = None
+) -> int:
+    """Stream the embedding batches into a parquet or ``.npy`` file, the format is guessed from the extension by
+    default.
+
+    Returns
+    -------
+    int
+        Number of written rows.
+    """
+
+    if sink_format is None:
+        sink_format = os.path.splitext(path)[1].lstrip(".")
+    if not SinkFormat.has_value(sink_format):
+        raise ValueError("sink_format should be within " + ", ".join([sink.value for sink in SinkFormat]))
+
+    if sink_format == SinkFormat.NPY.value:
+        return write_npy(batches, path)
+
+    return write_parquet_embeddings(batches, path)
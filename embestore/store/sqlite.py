@@ -0,0 +1,146 @@
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Sequence, Text, Tuple
+
+import numpy as np
+
+from embestore.store.backend import CacheBackend
+from embestore.store.cache import EMBEDDING_DTYPE
+from embestore.utils import chunks
+
+# Stay below the 999 host parameters of the older SQLite builds.
+MAX_QUERY_KEYS = 900
+
+SCHEMA = """
+BEGIN IMMEDIATE;
+CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, embedding BLOB NOT NULL, accessed REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS embeddings_accessed ON embeddings (accessed);
+CREATE TABLE IF NOT EXISTS size (rows INTEGER NOT NULL);
+INSERT INTO size SELECT COUNT(*) FROM embeddings WHERE NOT EXISTS (SELECT 1 FROM size);
+CREATE TRIGGER IF NOT EXISTS embeddings_insert AFTER INSERT ON embeddings BEGIN UPDATE size SET rows = rows + 1; END;
+CREATE TRIGGER IF NOT EXISTS embeddings_delete AFTER DELETE ON embeddings BEGIN UPDATE size SET rows = rows - 1; END;
+COMMIT;
+"""
+
+
+class SqliteCache(CacheBackend):
+    """Embeddings kept in a local SQLite file, the second tier below the in-memory cache of a store.
+
+    The store demotes the entries evicted from its cache to this tier, and looks the missing sentences up here before
+    calling the model. The file is in WAL mode, so the threads and processes opening it read while another one writes.
+    The embeddings are stored as the raw bytes of their float32 vectors.
+
+    With ``max_size``, the least recently used rows are deleted once the file holds more rows.
+
+    Parameters
+    ----------
+    path : str
+        SQLite file, created if it doesn't exist.
+    max_size : Optional[int]
+        Maximum number of rows, by default the file isn't bounded.
+    """
+
+    def __init__(self, path: str, max_size: Optional[int] = None) -> None:
+        if max_size is not None and max_size <= 0:
+            raise ValueError("max_size must be larger than 0")
+
+        self.path = path
+        self.max_size = max_size
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Connection of the calling thread, SQLite connections can't be shared by threads."""
+
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+
+        return connection
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT rows FROM size").fetchone()[0]
+
+    def __contains__(self, key: Text) -> bool:
+        return self._connection().execute("SELECT 1 FROM embeddings WHERE key = ?", (key,)).fetchone() is not None
+
+    def get(self, keys: Sequence[Text]) -> Tuple[np.ndarray, np.ndarray]:
+        """Search the embeddings of the keys, the found keys become the most recently used ones.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            Embeddings of the keys, rows of the missing keys are filled with zeros, and the mask of the found keys.
+        """
+
+        connection = self._connection()
+        blobs = {}
+        for chunk in chunks(list(dict.fromkeys(keys)), MAX_QUERY_KEYS):
+            query = f"SELECT key, embedding FROM embeddings WHERE key IN ({', '.join('?' * len(chunk))})"
+            blobs.update(connection.execute(query, chunk).fetchall())
+
+        found = np.fromiter((key in blobs for key in keys), dtype=bool, count=len(keys))
+        dim = len(next(iter(blobs.values()), b"")) // np.dtype(EMBEDDING_DTYPE).itemsize
+        embeddings = np.zeros((len(keys), dim), dtype=EMBEDDING_DTYPE)
+        for row in np.flatnonzero(found):
+            embeddings[row] = np.frombuffer(blobs[keys[row]], dtype=EMBEDDING_DTYPE)
+
+        if blobs and self.max_size is not None:
+            accessed = time.time()
+            connection.executemany(
+                "UPDATE embeddings SET accessed = ? WHERE key = ?", [(accessed, key) for key in blobs]
+            )
+
+        return embeddings, found
+
+    def put(self, keys: Sequence[Text], embeddings: np.ndarray) -> None:
+        """Insert or overwrite the embeddings of the keys in one transaction."""
+
+        if len(keys) == 0:
+            return
+
+        embeddings = np.ascontiguousarray(embeddings, dtype=EMBEDDING_DTYPE)
+        if embeddings.ndim != 2 or embeddings.shape[0] != len(keys):
+            raise ValueError("embeddings should be a matrix with one row per key")
+
+        accessed = time.time()
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN")
+            connection.executemany(
+                "INSERT INTO embeddings VALUES (?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+                "embedding = excluded.embedding, accessed = excluded.accessed",
+                [(key, embedding.tobytes(), accessed) for key, embedding in zip(keys, embeddings)],
+            )
+            if self.max_size is not None:
+                connection.execute(
+                    "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY accessed LIMIT "
+                    "MAX((SELECT rows FROM size) - ?, 0))",
+                    (self.max_size,),
+                )
+
+    def remove(self, keys: Sequence[Text]) -> None:
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN")
+            connection.executemany("DELETE FROM embeddings WHERE key = ?", [(key,) for key in keys])
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM embeddings")
+
+    def close(self) -> None:
+        """Close the connections of every thread."""
+
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self._local = threading.local()
@@ -1,21 +1,94 @@
-from typing import List, Literal, Optional, Text
+from typing import TYPE_CHECKING, List, Literal, Optional, Text
 
 import numpy as np
-from sentence_transformers import SentenceTransformer
 
+from embestore.store.backend import CacheBackend
 from embestore.store.base import EmbeddingStore
+from embestore.store.cache import ArrayCache
+from embestore.store.encoding_pool import EncodingPool
+from embestore.store.lazy import LazyModel
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
 
 class TorchEmbeddingStore(EmbeddingStore):
     def __init__(
         self,
         max_size: Optional[int] = None,
-        eviction_policy: Optional[Literal["lfu", "lru"]] = None,
+        eviction_policy: Optional[Literal["lfu", "lru", "w-tinylfu", "arc", "2q"]] = None,
         cache_path: Optional[str] = None,
         model_name: Text = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+        max_bytes: Optional[int] = None,
+        storage_dtype: Literal["float32", "float16", "int8"] = "float32",
+        cache: Optional[ArrayCache] = None,
+        persistence: Literal["full", "append"] = "full",
+        checkpoint_interval: Optional[float] = None,
+        max_batch_latency_ms: Optional[float] = None,
+        max_batch_size: int = 64,
+        batch_size: Optional[int] = 1024,
+        max_in_flight: int = 1,
+        processes: Optional[int] = None,
+        threads_per_process: Optional[int] = None,
+        warm_up: bool = False,
+        l2_cache: Optional[CacheBackend] = None,
     ) -> None:
-        super().__init__(max_size, eviction_policy, cache_path)
-        self.model = SentenceTransformer(model_name).eval()
+        """Retrieve the sentence embeddings from a local sentence transformer model.
+
+        With ``processes``, the model runs in a pool of worker processes with ``threads_per_process`` torch threads
+        each, the missing sentences are sharded across them and their embeddings come back through shared memory.
+        Otherwise the model runs in the calling process.
+
+        The model, or the pool, is only loaded on the first cache miss, so torch isn't even imported by a store
+        serving cache hits. With ``warm_up`` it's loaded in a background thread right away.
+        """
+
+        super().__init__(
+            max_size=max_size,
+            eviction_policy=eviction_policy,
+            cache_path=cache_path,
+            max_bytes=max_bytes,
+            storage_dtype=storage_dtype,
+            cache=cache,
+            persistence=persistence,
+            checkpoint_interval=checkpoint_interval,
+            max_batch_latency_ms=max_batch_latency_ms,
+            max_batch_size=max_batch_size,
+            batch_size=batch_size,
+            max_in_flight=max_in_flight,
+            l2_cache=l2_cache,
+        )
+        self.model_name = model_name
+        self.processes = processes
+        self.threads_per_process = threads_per_process
+        self._model = LazyModel(self._load_model, warm_up=warm_up)
+
+    @property
+    def model(self) -> Optional["SentenceTransformer"]:
+        """The in-process model, loaded on the first access. None with an encoding pool."""
+
+        return self._model.get() if self.processes is None else None
+
+    @property
+    def encoding_pool(self) -> Optional[EncodingPool]:
+        """The pool of encoding processes, started on the first access. None without ``processes``."""
+
+        return self._model.get() if self.processes is not None else None
+
+    def _load_model(self):
+        if self.processes is not None:
+            return EncodingPool(self.model_name, self.processes, threads_per_process=self.threads_per_process)
+
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(self.model_name).eval()
+
+    def close(self) -> None:
+        """Stop the encoding processes."""
+
+        encoding_pool = self._model.get_if_loaded()
+        if isinstance(encoding_pool, EncodingPool):
+            encoding_pool.close()
 
     def _retrieve_embeddings_from_model(self, sentences: List[Text]) -> np.ndarray:
-        return self.model.encode(sentences)
+        return self._model.get().encode(sentences)
@@ -15,6 +15,13 @@ install_requires = [
 extras_require = {
     "jina": ["jina>=3.13.2,<4.0.0"],
     "sentence-transformers": ["torch>=1.13.1,<2.0.0", "sentence-transformers>=2.2.2,<3.0.0"],
+    "onnx": [
+        "torch>=1.13.1,<2.0.0",
+        "sentence-transformers>=2.2.2,<3.0.0",
+        "onnx>=1.13.0,<2.0.0",
+        "onnxruntime>=1.14.0,<2.0.0",
+    ],
+    "redis": ["redis>=4.5.1,<5.0.0"],
 }
 
 entry_points = {"console_scripts": ["embestore = embestore.cli.main:app"]}
@@ -1,3 +1,4 @@
+import string
 import subprocess
 import time
 from typing import List
@@ -74,3 +75,30 @@ def embestore(request):
 
     else:
         raise ValueError("Not defined embedding store.")
+
+
+@pytest.fixture(scope="session")
+def tiny_sentence_transformer(tmp_path_factory) -> str:
+    """Path of a small randomly initialized BERT sentence transformer, built without downloading any model."""
+
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    path = tmp_path_factory.mktemp("tiny-sentence-transformer")
+    characters = string.ascii_lowercase + string.digits
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + list(characters + string.punctuation)
+    (path / "vocab.txt").write_text("\n".join(vocab + ["##" + character for character in characters]))
+    BertTokenizerFast(vocab_file=str(path / "vocab.txt")).save_pretrained(str(path))
+    config = BertConfig(
+        vocab_size=len(vocab) + len(characters),
+        hidden_size=32,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=64,
+        max_position_embeddings=128,
+    )
+    BertModel(config).save_pretrained(str(path))
+    transformer = models.Transformer(str(path), max_seq_length=128)
+    SentenceTransformer(modules=[transformer, models.Pooling(config.hidden_size)]).save(str(path))
+
+    return str(path)
@@ -0,0 +1,31 @@
+from typing import List, Text
+
+import numpy as np
+
+from embestore.store.base import AsyncEmbeddingStore, EmbeddingStore
+
+DIM = 4
+
+
+class CountingEmbeddingStore(EmbeddingStore):
+    """Store embedding every sentence as its length, the sentences sent to the model are recorded."""
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.model_sentences: List[Text] = []
+
+    def _retrieve_embeddings_from_model(self, sentences: List[Text]) -> np.ndarray:
+        self.model_sentences.extend(sentences)
+        return np.array([[len(sentence)] * DIM for sentence in sentences], dtype=np.float32)
+
+
+class CountingAsyncEmbeddingStore(AsyncEmbeddingStore):
+    """Asynchronous ``CountingEmbeddingStore``."""
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.model_sentences: List[Text] = []
+
+    async def _aretrieve_embeddings_from_model(self, sentences: List[Text]) -> np.ndarray:
+        self.model_sentences.extend(sentences)
+        return np.array([[len(sentence)] * DIM for sentence in sentences], dtype=np.float32)
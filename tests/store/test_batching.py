@@ -0,0 +1,71 @@
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Text
+
+import pytest
+
+from embestore.store.batching import MicroBatcher
+
+
+class RecordingResolver:
+    def __init__(self) -> None:
+        self.batches: List[List[Text]] = []
+
+    def __call__(self, futures: Dict[Text, Future]) -> None:
+        self.batches.append(list(futures))
+        for sentence, future in futures.items():
+            future.set_result(len(sentence))
+
+
+@pytest.mark.unit
+def test_concurrent_submits_are_coalesced():
+    resolver = RecordingResolver()
+    batcher = MicroBatcher(resolver, max_latency_ms=200, max_size=4)
+    futures = [{f"sentence {i}": Future()} for i in range(4)]
+
+    threads = [threading.Thread(target=batcher.submit, args=(future,)) for future in futures]
+    for thread in threads:
+        thread.start()
+    results = [future[f"sentence {i}"].result(timeout=1) for i, future in enumerate(futures)]
+
+    assert results == [10] * 4
+    assert len(resolver.batches) == 1
+    assert sorted(resolver.batches[0]) == [f"sentence {i}" for i in range(4)]
+
+
+@pytest.mark.unit
+def test_batches_are_split_by_max_size():
+    resolver = RecordingResolver()
+    batcher = MicroBatcher(resolver, max_latency_ms=0, max_size=3)
+    futures = {f"sentence {i}": Future() for i in range(7)}
+
+    batcher.submit(futures)
+    for future in futures.values():
+        future.result(timeout=1)
+
+    assert [len(batch) for batch in resolver.batches] == [3, 3, 1]
+
+
+@pytest.mark.unit
+def test_dispatcher_survives_errors():
+    def resolve(futures: Dict[Text, Future]) -> None:
+        for future in futures.values():
+            future.set_exception(RuntimeError("model is down"))
+        raise RuntimeError("model is down")
+
+    batcher = MicroBatcher(resolve, max_latency_ms=0)
+    first, second = Future(), Future()
+    batcher.submit({"first": first})
+    with pytest.raises(RuntimeError):
+        first.result(timeout=1)
+    batcher.submit({"second": second})
+
+    with pytest.raises(RuntimeError):
+        second.result(timeout=1)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("kwargs", [{"max_latency_ms": -1}, {"max_size": 0}])
+def test_invalid_batcher(kwargs):
+    with pytest.raises(ValueError):
+        MicroBatcher(RecordingResolver(), **kwargs)
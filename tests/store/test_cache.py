@@ -0,0 +1,130 @@
+import sys
+
+import numpy as np
+import pytest
+
+from embestore.store.cache import ArrayCache
+
+
+@pytest.mark.unit
+def test_put_and_get():
+    cache = ArrayCache(initial_capacity=2)
+    cache.put(["a", "b", "c"], np.arange(9).reshape(3, 3))
+
+    embeddings, found = cache.get(["c", "d", "a"])
+
+    assert cache.capacity == 4
+    assert found.tolist() == [True, False, True]
+    assert embeddings.tolist() == [[6, 7, 8], [0, 0, 0], [0, 1, 2]]
+
+
+@pytest.mark.unit
+def test_removed_slots_are_reused():
+    cache = ArrayCache(initial_capacity=2)
+    cache.put(["a", "b"], np.ones((2, 3)))
+    cache.remove(["a"])
+    cache.put(["c"], np.zeros((1, 3)))
+
+    assert cache.capacity == 2
+    assert "a" not in cache
+    assert cache.keys() == ["b", "c"]
+
+
+@pytest.mark.unit
+def test_touch_counts_and_moves_to_most_recently_used():
+    cache = ArrayCache()
+    cache.put(["a", "b"], np.ones((2, 3)))
+
+    counts = cache.touch(["a", "a", "missing"])
+
+    assert counts.tolist() == [2, 2, 0]
+    assert cache.keys() == ["b", "a"]
+
+
+@pytest.mark.unit
+def test_put_with_different_dimension():
+    cache = ArrayCache()
+    cache.put(["a"], np.ones((1, 3)))
+
+    cache.validate(["b"])
+    with pytest.raises(ValueError):
+        cache.validate(["b"], np.ones((1, 4)))
+    with pytest.raises(ValueError):
+        cache.put(["b"], np.ones((1, 4)))
+
+
+@pytest.mark.unit
+def test_nbytes_tracks_the_entries():
+    cache = ArrayCache()
+    cache.put(["a", "bb"], np.ones((2, 4)))
+    nbytes = cache.nbytes
+
+    cache.remove(["bb"])
+
+    assert nbytes == 2 * (4 * 4 + 8) + sys.getsizeof("a") + sys.getsizeof("bb")
+    assert cache.nbytes == 4 * 4 + 8 + sys.getsizeof("a")
+
+
+@pytest.mark.unit
+def test_max_nbytes_caps_the_matrix_growth():
+    cache = ArrayCache(initial_capacity=2)
+    cache.max_nbytes = 5 * (4 * 4 + 8) + 3 * sys.getsizeof("a")
+    cache.put(["a", "b", "c"], np.ones((3, 4)))
+
+    cache.put(["d", "e", "f", "g"], np.ones((4, 4)))
+
+    assert cache.capacity == 7
+    assert cache.allocated_nbytes == 7 * (4 * 4 + 8) + 7 * sys.getsizeof("a")
+
+
+@pytest.mark.unit
+def test_shrink_releases_the_free_rows():
+    cache = ArrayCache(initial_capacity=2)
+    cache.put([str(i) for i in range(8)], np.arange(32).reshape(8, 4))
+    cache.remove([str(i) for i in range(6)])
+    cache.touch(["6"])
+
+    cache.shrink()
+
+    assert cache.capacity == 2
+    assert cache.keys() == ["7", "6"]
+    assert cache.get(["6", "7"])[0].tolist() == [[24, 25, 26, 27], [28, 29, 30, 31]]
+    cache.put(["8"], np.zeros((1, 4)))
+    assert cache.capacity == 4
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("storage_dtype, atol", [("float32", 0), ("float16", 1e-3), ("int8", 1e-2)])
+def test_reduced_precision_storage(storage_dtype, atol):
+    embeddings = np.random.default_rng(0).uniform(-1, 1, size=(3, 16)).astype(np.float32)
+    cache = ArrayCache(storage_dtype=storage_dtype)
+    cache.put(["a", "b", "c"], embeddings)
+
+    results, _ = cache.get(["a", "b", "c"])
+
+    assert results.dtype == np.float32
+    assert np.allclose(results, embeddings, atol=atol)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("storage_dtype", ["float32", "float16", "int8"])
+def test_table_round_trip(storage_dtype):
+    embeddings = np.random.default_rng(0).uniform(-1, 1, size=(2, 8))
+    cache = ArrayCache(storage_dtype=storage_dtype)
+    cache.put(["a", "b"], embeddings, counts=[3, 1])
+
+    loaded_cache = ArrayCache(storage_dtype=storage_dtype)
+    loaded_cache.put_table(cache.to_table())
+
+    assert loaded_cache.keys() == ["a", "b"]
+    assert loaded_cache.counts(["a", "b"]).tolist() == [3, 1]
+    assert np.array_equal(loaded_cache.get(["a", "b"])[0], cache.get(["a", "b"])[0])
+
+
+@pytest.mark.unit
+def test_int8_storage_is_smaller():
+    float_cache, int8_cache = ArrayCache(), ArrayCache(storage_dtype="int8")
+    for cache in (float_cache, int8_cache):
+        cache.put(["a"], np.ones((1, 384)))
+
+    assert int8_cache.nbytes < float_cache.nbytes / 2
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from embestore.store.disk import MmapArrayCache
+
+
+@pytest.mark.unit
+def test_flushed_cache_is_reopened(tmp_path):
+    embeddings = np.random.default_rng(0).uniform(-1, 1, size=(3, 8))
+    cache = MmapArrayCache(str(tmp_path), initial_capacity=2)
+    cache.put(["a", "b", "c"], embeddings, counts=[1, 2, 3])
+    cache.flush()
+
+    reopened_cache = MmapArrayCache(str(tmp_path))
+    results, found = reopened_cache.get(["c", "missing", "a"])
+
+    assert isinstance(reopened_cache._matrix, np.memmap)
+    assert len(reopened_cache) == 3
+    assert found.tolist() == [True, False, True]
+    assert np.allclose(results[[0, 2]], embeddings[[2, 0]])
+    assert reopened_cache.counts(["a", "b", "c"]).tolist() == [1, 2, 3]
+
+
+@pytest.mark.unit
+def test_remove_and_insert_after_reopen(tmp_path):
+    cache = MmapArrayCache(str(tmp_path), storage_dtype="int8")
+    cache.put(["a", "b"], np.ones((2, 4)))
+    cache.flush()
+
+    reopened_cache = MmapArrayCache(str(tmp_path))
+    reopened_cache.remove(["a"])
+    reopened_cache.put(["c"], np.zeros((1, 4)))
+    reopened_cache.flush()
+
+    cache = MmapArrayCache(str(tmp_path))
+    assert cache.storage_dtype == "int8"
+    assert sorted(cache.keys()) == ["b", "c"]
+    assert "a" not in cache
+    assert np.allclose(cache.get(["c"])[0], 0)
+
+
+@pytest.mark.unit
+def test_copy_on_write_cache_keeps_the_files(tmp_path):
+    cache = MmapArrayCache(str(tmp_path))
+    cache.put(["a"], np.ones((1, 4)))
+    cache.flush()
+
+    reader_cache = MmapArrayCache(str(tmp_path), mode="c")
+    reader_cache.put(["a", "b"], np.zeros((2, 4)))
+
+    with pytest.raises(ValueError):
+        reader_cache.flush()
+    assert MmapArrayCache(str(tmp_path)).keys() == ["a"]
+    assert np.allclose(MmapArrayCache(str(tmp_path)).get(["a"])[0], 1)
@@ -1,14 +1,36 @@
+import asyncio
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from random import randrange
-from typing import List, Text
+from typing import List, Optional, Text
 
 import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
 
-from embestore.store.base import VALID_COLUMN_ATTRIBUTE, EmbeddingStore
+from embestore.store.base import (
+    LFU_COUNTER_COLUMN,
+    VALID_COLUMN_ATTRIBUTE,
+    VALID_ROW_ATTRIBUTE,
+    AsyncEmbeddingStore,
+    EmbeddingStore,
+)
+from embestore.store.cache import ArrayCache
+from embestore.store.disk import MmapArrayCache
 
 
 class MockEmbeddingStore(EmbeddingStore):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.model_calls: List[List[Text]] = []
+
     def _retrieve_embeddings_from_model(self, sentences: List[Text]) -> np.ndarray:
+        self.model_calls.append(sentences)
         return np.ones((len(sentences), 768))
 
 
@@ -55,6 +77,564 @@ def test_cache_with_the_lfu_policy():
     assert "I want some dinner" in mock_embestore.cache_df.index
 
 
+@pytest.mark.unit
+def test_cache_with_the_lfu_policy_evicts_the_least_frequent():
+    mock_embestore = MockEmbeddingStore(max_size=2, eviction_policy="lfu")
+    _ = mock_embestore.retrieve_embeddings(["I want some dinner", "Bella Chiao", "I want some dinner"])
+    _ = mock_embestore.retrieve_embeddings(["Hello Work"])
+
+    assert mock_embestore.cache_df.index.to_list() == ["I want some dinner", "Hello Work"]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("eviction_policy", ["w-tinylfu", "arc", "2q"])
+def test_cache_with_the_admission_aware_policies(eviction_policy):
+    mock_embestore = MockEmbeddingStore(max_size=2, eviction_policy=eviction_policy)
+    results = mock_embestore.retrieve_embeddings(["I want some dinner", "Bella Chiao", "Hello Work"])
+
+    assert results.shape == (3, 768)
+    assert len(mock_embestore.cache_df) <= 2
+
+
+@pytest.mark.unit
+def test_cache_with_the_memory_budget():
+    query_sentences = ["I want some dinner", "Bella Chiao", "Hello Work"]
+
+    mock_embestore = MockEmbeddingStore(max_bytes=4000, eviction_policy="lru")
+    _ = mock_embestore.retrieve_embeddings(query_sentences)
+
+    assert 0 < mock_embestore.memory_usage <= 4000
+    assert mock_embestore.cache_df.index.to_list() == ["Hello Work"]
+
+
+@pytest.mark.unit
+def test_memory_budget_bounds_the_allocated_rows():
+    row_nbytes = 768 * 4 + 8
+    mock_embestore = MockEmbeddingStore(max_bytes=10 * row_nbytes, eviction_policy="lru")
+
+    for i in range(0, 100, 5):
+        mock_embestore.retrieve_embeddings([f"sentence {j}" for j in range(i, i + 5)])
+
+    assert len(mock_embestore.cache) < 10
+    assert mock_embestore.memory_usage <= 15 * row_nbytes
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "kwargs, message",
+    [
+        ({"eviction_policy": "lru"}, "max_size and max_bytes"),
+        ({"max_size": 4}, "eviction_policy can't be None with max_size"),
+        ({"max_bytes": 4000}, "eviction_policy can't be None with max_bytes"),
+        ({"max_bytes": 0, "eviction_policy": "lru"}, "max_bytes must be larger than 0"),
+        ({"max_bytes": 4000, "eviction_policy": "arc"}, "max_size can't be None with the arc eviction_policy"),
+    ],
+)
+def test_invalid_cache_budget(kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        MockEmbeddingStore(**kwargs)
+
+
+@pytest.mark.unit
+def test_only_missing_sentences_are_retrieved_from_model():
+    mock_embestore = MockEmbeddingStore()
+    _ = mock_embestore.retrieve_embeddings(["I want some dinner", "Bella Chiao", "I want some dinner"])
+    results = mock_embestore.retrieve_dataframe_embeddings(["Bella Chiao", "Hello Work"])
+
+    assert mock_embestore.model_calls == [["I want some dinner", "Bella Chiao"], ["Hello Work"]]
+    assert results[LFU_COUNTER_COLUMN].to_list() == [2, 1]
+    assert mock_embestore.cache_df.index.to_list() == ["I want some dinner", "Bella Chiao", "Hello Work"]
+
+
+@pytest.mark.unit
+def test_hit_and_miss_stats():
+    mock_embestore = MockEmbeddingStore()
+    mock_embestore.retrieve_embeddings(["I want some dinner", "Bella Chiao"])
+    mock_embestore.retrieve_embeddings(["Bella Chiao", "Hello Work"])
+
+    assert mock_embestore.stats == {"hits": 1, "misses": 3, "hit_rate": 0.25, "size": 3}
+    mock_embestore.reset_stats()
+    assert mock_embestore.stats["hits"] == mock_embestore.stats["misses"] == 0
+
+
+@pytest.mark.unit
+def test_save_and_load_cache(tmp_path):
+    cache_path = str(tmp_path / "cache.parquet")
+    query_sentences = ["I want some dinner", "Bella Chiao"]
+
+    mock_embestore = MockEmbeddingStore(cache_path=cache_path)
+    _ = mock_embestore.retrieve_embeddings(query_sentences)
+    mock_embestore.save()
+
+    loaded_embestore = MockEmbeddingStore(cache_path=cache_path)
+    results = loaded_embestore.retrieve_embeddings(query_sentences)
+
+    assert loaded_embestore.model_calls == []
+    assert results.tolist() == np.ones((2, 768)).tolist()
+
+
+@pytest.mark.unit
+def test_load_cache_saved_as_data_frame(tmp_path):
+    cache_path = str(tmp_path / "cache.parquet")
+    df = pd.DataFrame(
+        {VALID_ROW_ATTRIBUTE: ["I want some dinner"], VALID_COLUMN_ATTRIBUTE: [np.ones(768)], LFU_COUNTER_COLUMN: [2.0]}
+    )
+    df.set_index(VALID_ROW_ATTRIBUTE).to_parquet(cache_path)
+
+    mock_embestore = MockEmbeddingStore(cache_path=cache_path)
+
+    assert mock_embestore.cache_df[LFU_COUNTER_COLUMN].to_list() == [2]
+    assert mock_embestore.retrieve_embeddings(["I want some dinner"]).tolist() == np.ones((1, 768)).tolist()
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "kwargs, expected_keys",
+    [({"top_n": 2}, ["b", "d"]), ({"keys": ["c", "a", "missing"]}, ["a", "c"]), ({}, ["a", "b", "c", "d"])],
+)
+def test_load_cache_subset(tmp_path, kwargs, expected_keys):
+    cache_path = str(tmp_path / "cache.parquet")
+    mock_embestore = MockEmbeddingStore()
+    mock_embestore.cache.put(["a", "b", "c", "d"], np.ones((4, 768)), counts=[1, 5, 2, 5])
+    mock_embestore.save(cache_path)
+
+    loaded_embestore = MockEmbeddingStore()
+    loaded_embestore.load(cache_path, batch_size=3, **kwargs)
+
+    assert loaded_embestore.cache.keys() == expected_keys
+    assert loaded_embestore.cache.capacity <= 4
+
+
+@pytest.mark.unit
+def test_load_invalid_cache_fails_before_reading_rows(tmp_path, mocker):
+    cache_path = str(tmp_path / "cache.parquet")
+    pq.write_table(pa.table({VALID_ROW_ATTRIBUTE: ["a"], LFU_COUNTER_COLUMN: [1]}), cache_path)
+    iter_batches = mocker.spy(pq.ParquetFile, "iter_batches")
+
+    with pytest.raises(ValueError):
+        MockEmbeddingStore(cache_path=cache_path)
+    assert iter_batches.call_count == 0
+
+
+@pytest.mark.unit
+def test_save_quantized_cache(tmp_path):
+    cache_path = str(tmp_path / "cache.parquet")
+    mock_embestore = MockEmbeddingStore(cache_path=cache_path, storage_dtype="int8")
+    _ = mock_embestore.retrieve_embeddings(["I want some dinner", "Bella Chiao"])
+    mock_embestore.save()
+
+    loaded_embestore = MockEmbeddingStore(cache_path=cache_path, storage_dtype="int8")
+    results = loaded_embestore.retrieve_embeddings(["I want some dinner", "Bella Chiao"])
+
+    assert pq.read_schema(cache_path).field(VALID_COLUMN_ATTRIBUTE).type.value_type == pa.int8()
+    assert loaded_embestore.model_calls == []
+    assert np.allclose(results, 1)
+
+
+@pytest.mark.unit
+def test_memory_mapped_cache(tmp_path):
+    mock_embestore = MockEmbeddingStore(cache=MmapArrayCache(str(tmp_path)))
+    _ = mock_embestore.retrieve_embeddings(["I want some dinner", "Bella Chiao"])
+    mock_embestore.save()
+
+    loaded_embestore = MockEmbeddingStore(max_size=1, eviction_policy="lru", cache=MmapArrayCache(str(tmp_path)))
+
+    assert loaded_embestore.cache_df.index.to_list() == ["Bella Chiao"]
+    assert loaded_embestore.retrieve_embeddings(["Bella Chiao"]).tolist() == np.ones((1, 768)).tolist()
+    assert loaded_embestore.model_calls == []
+
+
+@pytest.mark.unit
+def test_memory_mapped_cache_is_not_read_without_eviction(tmp_path, mocker):
+    cache = MmapArrayCache(str(tmp_path))
+    cache.put(["I want some dinner", "Bella Chiao"], np.ones((2, 768)))
+    cache.flush()
+    cache = MmapArrayCache(str(tmp_path))
+    key_counts = mocker.spy(cache, "key_counts")
+    keys = mocker.spy(cache, "keys")
+
+    MockEmbeddingStore(cache=cache)
+
+    assert key_counts.call_count == 0 and keys.call_count == 0
+
+
+@pytest.mark.unit
+def test_append_persistence_saves_the_changes(tmp_path):
+    cache_path = str(tmp_path / "cache")
+    mock_embestore = MockEmbeddingStore(max_size=2, eviction_policy="lru", cache_path=cache_path, persistence="append")
+    mock_embestore.retrieve_embeddings(["I want some dinner", "Bella Chiao"])
+    mock_embestore.save()
+    mock_embestore.retrieve_embeddings(["Hello Work", "Bella Chiao"])
+    mock_embestore.save()
+
+    loaded_embestore = MockEmbeddingStore(
+        max_size=2, eviction_policy="lru", cache_path=cache_path, persistence="append"
+    )
+
+    assert len(os.listdir(cache_path)) == 2
+    assert loaded_embestore.cache_df.index.to_list() == ["Hello Work", "Bella Chiao"]
+    assert loaded_embestore.cache_df[LFU_COUNTER_COLUMN].to_list() == [1, 2]
+
+
+@pytest.mark.unit
+def test_save_async_writes_a_snapshot(tmp_path):
+    cache_path = str(tmp_path / "cache.parquet")
+    mock_embestore = MockEmbeddingStore(cache_path=cache_path)
+    mock_embestore.retrieve_embeddings(["I want some dinner"])
+
+    future = mock_embestore.save_async()
+    mock_embestore.retrieve_embeddings(["Bella Chiao"])
+    mock_embestore.wait_for_save()
+
+    assert future.done()
+    assert os.listdir(tmp_path) == ["cache.parquet"]
+    assert pq.read_table(cache_path).column(VALID_ROW_ATTRIBUTE).to_pylist() == ["I want some dinner"]
+
+
+@pytest.mark.unit
+def test_save_waits_for_the_background_saves(tmp_path, mocker):
+    cache_path = str(tmp_path / "cache.parquet")
+    mock_embestore = MockEmbeddingStore(cache_path=cache_path)
+    written, writing = [], threading.Lock()
+
+    def slow_write_parquet(table: pa.Table, path: str) -> None:
+        assert writing.acquire(blocking=False), "the saves overlap"
+        time.sleep(0.05 if not written else 0)
+        written.append(table.column(VALID_ROW_ATTRIBUTE).to_pylist())
+        pq.write_table(table, path)
+        writing.release()
+
+    mocker.patch("embestore.store.base.write_parquet", slow_write_parquet)
+    mock_embestore.retrieve_embeddings(["I want some dinner"])
+    mock_embestore.save_async()
+    mock_embestore.retrieve_embeddings(["Bella Chiao"])
+    mock_embestore.save()
+
+    assert written == [["I want some dinner"], ["I want some dinner", "Bella Chiao"]]
+    assert pq.read_table(cache_path).column(VALID_ROW_ATTRIBUTE).to_pylist() == written[-1]
+
+
+@pytest.mark.unit
+def test_wait_for_save_raises_the_save_error(tmp_path):
+    mock_embestore = MockEmbeddingStore()
+    mock_embestore.retrieve_embeddings(["I want some dinner"])
+    mock_embestore.save_async(str(tmp_path / "missing" / "cache.parquet"))
+
+    with pytest.raises(FileNotFoundError):
+        mock_embestore.wait_for_save()
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("max_in_flight", [1, 2])
+def test_chunks_cached_before_a_failing_chunk_can_be_evicted(max_in_flight):
+    class FailingEmbeddingStore(MockEmbeddingStore):
+        def _retrieve_embeddings_from_model(self, sentences: List[Text]) -> np.ndarray:
+            if "fail" in sentences:
+                raise RuntimeError("model error")
+            return super()._retrieve_embeddings_from_model(sentences)
+
+    mock_embestore = FailingEmbeddingStore(max_size=2, eviction_policy="lru", batch_size=2, max_in_flight=max_in_flight)
+    with pytest.raises(RuntimeError):
+        mock_embestore.retrieve_embeddings(["a", "b", "fail", "c"])
+    mock_embestore.retrieve_embeddings(["y", "z"])
+
+    assert mock_embestore.cache.keys() == ["y", "z"]
+
+
+@pytest.mark.unit
+def test_checkpoints_during_retrievals(tmp_path):
+    cache_path = str(tmp_path / "cache")
+    mock_embestore = MockEmbeddingStore(cache_path=cache_path, persistence="append", checkpoint_interval=0)
+    mock_embestore.retrieve_embeddings(["I want some dinner"])
+    mock_embestore.retrieve_embeddings(["Bella Chiao"])
+    mock_embestore.wait_for_save()
+
+    loaded_embestore = MockEmbeddingStore(cache_path=cache_path, persistence="append")
+
+    assert mock_embestore.segment_log.segment_count == 2
+    assert loaded_embestore.cache.keys() == ["I want some dinner", "Bella Chiao"]
+
+
+@pytest.mark.unit
+def test_checkpoints_need_a_path():
+    with pytest.raises(ValueError):
+        MockEmbeddingStore(checkpoint_interval=10)
+
+
+@pytest.mark.unit
+def test_iter_embeddings_is_lazy():
+    mock_embestore = MockEmbeddingStore(max_size=4, eviction_policy="lru")
+    sentences = (f"sentence {i % 3}" for i in itertools.count())
+
+    batches = list(itertools.islice(mock_embestore.iter_embeddings(sentences, batch_size=2), 5))
+
+    assert [batch_sentences for batch_sentences, _ in batches[:2]] == [
+        ["sentence 0", "sentence 1"],
+        ["sentence 2", "sentence 0"],
+    ]
+    assert all(embeddings.shape == (2, 768) for _, embeddings in batches)
+    assert mock_embestore.model_calls == [["sentence 0", "sentence 1"], ["sentence 2"]]
+
+
+@pytest.mark.unit
+def test_write_embeddings(tmp_path):
+    path = str(tmp_path / "embeddings.npy")
+    mock_embestore = MockEmbeddingStore()
+
+    rows = mock_embestore.write_embeddings(iter(["I want some dinner", "Bella Chiao", "Hello Work"]), path, 2)
+
+    assert rows == 3
+    assert np.load(path).shape == (3, 768)
+
+
+class SlowEmbeddingStore(MockEmbeddingStore):
+    def __init__(self, *args, error: Optional[Exception] = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.error = error
+
+    def _retrieve_embeddings_from_model(self, sentences: List[Text]) -> np.ndarray:
+        time.sleep(0.05)
+        if self.error is not None:
+            raise self.error
+        super()._retrieve_embeddings_from_model(sentences)
+        return np.array([[len(sentence)] * 4 for sentence in sentences])
+
+
+@pytest.mark.unit
+def test_concurrent_misses_call_the_model_once():
+    query_sentences = ["I want some dinner", "Bella Chiao"]
+    slow_embestore = SlowEmbeddingStore()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(slow_embestore.retrieve_embeddings, [query_sentences] * 8))
+
+    assert slow_embestore.model_calls == [query_sentences]
+    assert all(result[:, 0].tolist() == [18, 11] for result in results)
+    assert slow_embestore.cache.counts(query_sentences).tolist() == [8, 8]
+
+
+@pytest.mark.unit
+def test_concurrent_misses_share_the_model_error():
+    slow_embestore = SlowEmbeddingStore(error=RuntimeError("model is down"))
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(slow_embestore.retrieve_embeddings, ["Bella Chiao"]) for _ in range(4)]
+
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result()
+    assert len(slow_embestore.cache) == 0
+
+
+@pytest.mark.unit
+def test_concurrent_retrievals_with_eviction():
+    mock_embestore = MockEmbeddingStore(max_size=16, eviction_policy="lru")
+    sentence_batches = [[f"sentence {randrange(64)}" for _ in range(8)] for _ in range(200)]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(mock_embestore.retrieve_embeddings, sentence_batches))
+
+    assert all(result.shape == (8, 768) for result in results)
+    assert len(mock_embestore.cache) <= 16
+    assert mock_embestore._in_flight == {}
+
+
+@pytest.mark.unit
+def test_concurrent_misses_are_coalesced():
+    mock_embestore = MockEmbeddingStore(max_batch_latency_ms=200, max_batch_size=4)
+    sentence_batches = [[f"sentence {i}", "Bella Chiao"] for i in range(3)]
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        results = list(executor.map(mock_embestore.retrieve_embeddings, sentence_batches))
+
+    assert all(result.shape == (2, 768) for result in results)
+    assert len(mock_embestore.model_calls) == 1
+    assert sorted(mock_embestore.model_calls[0]) == ["Bella Chiao", "sentence 0", "sentence 1", "sentence 2"]
+
+
+class ChunkRecordingStore(MockEmbeddingStore):
+    def __init__(self, *args, fail_on: Optional[Text] = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.fail_on = fail_on
+        self.running = 0
+        self.max_running = 0
+        self.counter_lock = threading.Lock()
+
+    def _retrieve_embeddings_from_model(self, sentences: List[Text]) -> np.ndarray:
+        with self.counter_lock:
+            self.model_calls.append(sentences)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.02)
+        with self.counter_lock:
+            self.running -= 1
+        if self.fail_on in sentences:
+            raise RuntimeError("model is down")
+        return np.array([[int(sentence)] * 4 for sentence in sentences])
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("max_in_flight", [1, 3])
+def test_misses_are_retrieved_by_chunks(max_in_flight):
+    query_sentences = [str(i) for i in range(7)] + ["3"]
+    chunk_embestore = ChunkRecordingStore(batch_size=2, max_in_flight=max_in_flight)
+
+    results = chunk_embestore.retrieve_embeddings(query_sentences)
+
+    assert results[:, 0].tolist() == [0, 1, 2, 3, 4, 5, 6, 3]
+    assert sorted(map(len, chunk_embestore.model_calls)) == [1, 2, 2, 2]
+    assert chunk_embestore.max_running == max_in_flight
+
+
+@pytest.mark.unit
+def test_chunk_error_rejects_the_remaining_chunks():
+    chunk_embestore = ChunkRecordingStore(batch_size=2, fail_on="1")
+
+    with pytest.raises(RuntimeError):
+        chunk_embestore.retrieve_embeddings([str(i) for i in range(6)])
+    assert chunk_embestore.model_calls == [["0", "1"]]
+    assert chunk_embestore._in_flight == {}
+
+
+def retrieve_in_daemon_thread(embestore: EmbeddingStore, sentences: List[Text], timeout: float = 5) -> np.ndarray:
+    """Retrieve from a daemon thread, so that a retrieval blocked forever fails the test instead of hanging it."""
+
+    result = Future()
+
+    def retrieve() -> None:
+        try:
+            result.set_result(embestore.retrieve_embeddings(sentences))
+        except BaseException as error:
+            result.set_exception(error)
+
+    threading.Thread(target=retrieve, daemon=True).start()
+
+    return result.result(timeout=timeout)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("kwargs", [{}, {"max_in_flight": 2}, {"max_batch_latency_ms": 10}])
+def test_cache_error_is_raised_to_every_retrieval(kwargs):
+    cache = ArrayCache()
+    cache.put(["Bella Chiao"], np.ones((1, 4)))
+    mock_embestore = MockEmbeddingStore(cache=cache, **kwargs)
+
+    for _ in range(2):
+        with pytest.raises(ValueError, match="dimension"):
+            retrieve_in_daemon_thread(mock_embestore, ["I want some dinner"])
+    assert mock_embestore._in_flight == {}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("kwargs", [{"batch_size": 0}, {"max_in_flight": 0}])
+def test_invalid_chunking(kwargs):
+    with pytest.raises(ValueError):
+        MockEmbeddingStore(**kwargs)
+
+
+class MockAsyncEmbeddingStore(AsyncEmbeddingStore):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.model_calls: List[List[Text]] = []
+
+    async def _aretrieve_embeddings_from_model(self, sentences: List[Text]) -> np.ndarray:
+        self.model_calls.append(sentences)
+        await asyncio.sleep(0.01)
+        return np.ones((len(sentences), 768))
+
+
+@pytest.mark.unit
+def test_async_retrieve_embeddings():
+    query_sentences = ["I want some dinner", "Bella Chiao", "I want some dinner"]
+    mock_embestore = MockAsyncEmbeddingStore()
+
+    results = asyncio.run(mock_embestore.aretrieve_embeddings(query_sentences))
+    results_df = asyncio.run(mock_embestore.aretrieve_dataframe_embeddings(query_sentences))
+
+    assert results.tolist() == np.ones((3, 768)).tolist()
+    assert results_df[LFU_COUNTER_COLUMN].to_list() == [4, 2, 4]
+    assert mock_embestore.model_calls == [["I want some dinner", "Bella Chiao"]]
+
+
+@pytest.mark.unit
+def test_async_misses_are_retrieved_by_chunks():
+    mock_embestore = MockAsyncEmbeddingStore(batch_size=2, max_in_flight=2)
+
+    results = asyncio.run(mock_embestore.aretrieve_embeddings([str(i) for i in range(5)]))
+
+    assert results.shape == (5, 768)
+    assert mock_embestore.model_calls == [["0", "1"], ["2", "3"], ["4"]]
+
+
+@pytest.mark.unit
+def test_async_chunks_cached_before_a_failing_chunk_can_be_evicted():
+    class FailingAsyncEmbeddingStore(MockAsyncEmbeddingStore):
+        async def _aretrieve_embeddings_from_model(self, sentences: List[Text]) -> np.ndarray:
+            if "fail" in sentences:
+                raise RuntimeError("model error")
+            return await super()._aretrieve_embeddings_from_model(sentences)
+
+    mock_embestore = FailingAsyncEmbeddingStore(max_size=2, eviction_policy="lru", batch_size=2, max_in_flight=2)
+    with pytest.raises(RuntimeError):
+        asyncio.run(mock_embestore.aretrieve_embeddings(["a", "b", "fail", "c"]))
+    asyncio.run(mock_embestore.aretrieve_embeddings(["y", "z"]))
+
+    assert mock_embestore.cache.keys() == ["y", "z"]
+
+
+@pytest.mark.unit
+def test_async_cache_error_is_raised_to_every_retrieval():
+    cache = ArrayCache()
+    cache.put(["Bella Chiao"], np.ones((1, 4)))
+    mock_embestore = MockAsyncEmbeddingStore(cache=cache)
+
+    for _ in range(2):
+        with pytest.raises(ValueError, match="dimension"):
+            asyncio.run(asyncio.wait_for(mock_embestore.aretrieve_embeddings(["I want some dinner"]), timeout=5))
+    assert mock_embestore._in_flight == {}
+
+
+@pytest.mark.unit
+def test_sync_retrieval_from_a_running_event_loop():
+    mock_embestore = MockAsyncEmbeddingStore()
+
+    async def retrieve_from_coroutine() -> np.ndarray:
+        return mock_embestore.retrieve_embeddings(["Bella Chiao", "I want some dinner"])
+
+    results = asyncio.run(retrieve_from_coroutine())
+
+    assert results.tolist() == np.ones((2, 768)).tolist()
+    assert mock_embestore.model_calls == [["Bella Chiao", "I want some dinner"]]
+
+
+@pytest.mark.unit
+def test_async_cache_hits_do_not_suspend():
+    mock_embestore = MockAsyncEmbeddingStore()
+    mock_embestore.retrieve_embeddings(["Bella Chiao"])
+    coroutine = mock_embestore.aretrieve_embeddings(["Bella Chiao"])
+
+    with pytest.raises(StopIteration) as stop:
+        coroutine.send(None)
+    assert stop.value.value.tolist() == np.ones((1, 768)).tolist()
+
+
+@pytest.mark.unit
+def test_concurrent_coroutines_share_the_model_call():
+    mock_embestore = MockAsyncEmbeddingStore()
+
+    async def retrieve_concurrently():
+        return await asyncio.gather(
+            *[mock_embestore.aretrieve_embeddings(["Bella Chiao", "Hello Work"]) for _ in range(8)]
+        )
+
+    results = asyncio.run(retrieve_concurrently())
+
+    assert len(results) == 8
+    assert mock_embestore.model_calls == [["Bella Chiao", "Hello Work"]]
+    assert mock_embestore.cache.counts(["Bella Chiao"]).tolist() == [8]
+    assert mock_embestore._in_flight == {}
+
+
 @pytest.mark.integration
 @pytest.mark.parametrize("embestore", ["jira_embestore", "torch_embestore"], indirect=True)
 def test_retrieve_embeddings_from_external_source(embestore: EmbeddingStore):
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from sentence_transformers import SentenceTransformer
+
+from embestore.store.encoding_pool import EncodingPool
+from embestore.store.torch import TorchEmbeddingStore
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("kwargs", [{"processes": 0}, {"processes": 2, "threads_per_process": 0}])
+def test_invalid_pool(kwargs):
+    with pytest.raises(ValueError):
+        EncodingPool("unused-model", **kwargs)
+
+
+@pytest.mark.integration
+def test_pool_matches_in_process_encoding(tiny_sentence_transformer):
+    sentences = [f"sentence {i} " + "ab" * (i % 7) for i in range(11)]
+    expected = SentenceTransformer(tiny_sentence_transformer).encode(sentences)
+
+    embestore = TorchEmbeddingStore(model_name=tiny_sentence_transformer, processes=2, threads_per_process=1)
+    try:
+        np.testing.assert_allclose(embestore.retrieve_embeddings(sentences), expected, atol=1e-6)
+        np.testing.assert_allclose(embestore.encoding_pool.encode(sentences[:1]), expected[:1], atol=1e-6)
+        assert embestore.encoding_pool.encode([]).shape == (0, expected.shape[1])
+    finally:
+        embestore.close()
+
+
+@pytest.mark.integration
+def test_pool_fails_to_load_missing_model(tmp_path):
+    with pytest.raises(RuntimeError):
+        EncodingPool(str(tmp_path / "missing"), processes=1)
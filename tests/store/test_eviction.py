@@ -0,0 +1,112 @@
+import pytest
+
+from embestore.store.eviction import (
+    ARCEviction,
+    CountMinSketch,
+    EvictionPolicy,
+    LFUEviction,
+    LRUEviction,
+    TwoQueueEviction,
+    WTinyLFUEviction,
+    create_eviction_strategy,
+    replay_trace,
+)
+
+
+@pytest.mark.unit
+def test_lru_evicts_least_recently_used():
+    lru = LRUEviction(max_size=2)
+
+    assert lru.insert("a") == []
+    assert lru.insert("b") == []
+    lru.touch("a")
+
+    assert lru.insert("c") == ["b"]
+    assert "a" in lru and "c" in lru
+
+
+@pytest.mark.unit
+def test_lfu_evicts_only_the_overflow():
+    lfu = LFUEviction(max_size=3)
+    for key in ["a", "b", "c"]:
+        lfu.insert(key)
+    lfu.touch("a")
+    lfu.touch("c")
+
+    assert lfu.insert("d") == ["b"]
+    assert len(lfu) == 3
+    assert lfu.insert("e") == ["d"]
+
+
+@pytest.mark.unit
+def test_lfu_insert_with_loaded_frequency():
+    lfu = LFUEviction(max_size=2)
+    lfu.insert("a", frequency=5)
+    lfu.insert("b", frequency=3)
+
+    assert lfu.insert("c") == ["b"]
+    assert lfu.evict() == "c"
+    assert lfu.evict() == "a"
+    assert lfu.evict() is None
+
+
+@pytest.mark.unit
+def test_create_eviction_strategy():
+    assert isinstance(create_eviction_strategy(EvictionPolicy.LRU.value, max_size=1), LRUEviction)
+
+    with pytest.raises(ValueError):
+        create_eviction_strategy("fifo", max_size=1)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "strategy_class, hot_keys_kept",
+    [(LRUEviction, False), (WTinyLFUEviction, True), (ARCEviction, True), (TwoQueueEviction, True)],
+)
+def test_scan_resistant_strategies_keep_the_hot_keys(strategy_class, hot_keys_kept):
+    strategy = strategy_class(max_size=20)
+    hot_keys = [f"hot {i}" for i in range(5)]
+
+    def access(key):
+        if key in strategy:
+            strategy.touch(key)
+        else:
+            strategy.insert(key)
+
+    for round_ in range(10):
+        for key in hot_keys + [f"warm {round_} {i}" for i in range(5)]:
+            access(key)
+    for i in range(100):
+        access(f"scan {i}")
+
+    assert all(key in strategy for key in hot_keys) == hot_keys_kept
+    assert len(strategy) == 20
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("strategy_class", [WTinyLFUEviction, ARCEviction, TwoQueueEviction])
+def test_bounded_strategies_require_max_size(strategy_class):
+    with pytest.raises(ValueError):
+        strategy_class()
+
+
+@pytest.mark.unit
+def test_count_min_sketch_estimate():
+    sketch = CountMinSketch(width=64, sample_size=1000)
+    for _ in range(20):
+        sketch.increment("hot")
+    sketch.increment("cold")
+
+    assert sketch.estimate("hot") == CountMinSketch.MAX_COUNT
+    assert sketch.estimate("cold") >= 1
+    assert sketch.estimate("unknown") <= sketch.estimate("cold")
+
+
+@pytest.mark.unit
+def test_replay_trace():
+    trace = ["a", "b", "a", "c", "a", "b"]
+
+    hit_ratios = replay_trace(trace, max_size=2, policies=["lru", "lfu"])
+
+    assert hit_ratios == {"lru": 2 / 6, "lfu": 2 / 6}
+    assert set(replay_trace(trace, max_size=2)) == {policy.value for policy in EvictionPolicy}
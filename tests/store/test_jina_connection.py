@@ -0,0 +1,220 @@
+import asyncio
+
+import grpc
+import numpy as np
+import pytest
+from jina import Document, DocumentArray, Executor, Flow, requests
+
+from embestore.store.jina import JinaEmbeddingStore
+from embestore.store.jina_connection import BLOB_ENDPOINT, JinaConnection, JinaConnectionPool, response_embeddings
+
+FLOW_PORT = 54398
+FLOW_GRPC = f"grpc://0.0.0.0:{FLOW_PORT}"
+EMBEDDING_DIM = 8
+
+
+class LengthEmbedding(Executor):
+    @requests
+    def encode(self, docs: DocumentArray, **kwargs):
+        docs.embeddings = _length_embeddings(docs)
+
+    @requests(on=BLOB_ENDPOINT)
+    def encode_blob(self, docs: DocumentArray, **kwargs):
+        embeddings = _length_embeddings(docs)
+        return DocumentArray(
+            [Document(blob=embeddings.tobytes(), tags={"dtype": embeddings.dtype.str, "shape": list(embeddings.shape)})]
+        )
+
+
+def _length_embeddings(docs: DocumentArray) -> np.ndarray:
+    return np.array([[len(text)] * EMBEDDING_DIM for text in docs.texts], dtype=np.float32)
+
+
+@pytest.fixture(scope="module")
+def flow():
+    with Flow(port=FLOW_PORT).add(uses=LengthEmbedding) as local_flow:
+        yield local_flow
+
+
+@pytest.mark.integration
+def test_store_reuses_connection(flow):
+    embestore = JinaEmbeddingStore(embedding_grpc=FLOW_GRPC)
+    embeddings = embestore.retrieve_embeddings(["a", "abc"])
+    channel = embestore.connection.connections[0]._channel
+    embestore.retrieve_embeddings(["abcd"])
+
+    assert embeddings[:, 0].tolist() == [1, 3]
+    assert embestore.connection.connections[0]._channel is channel
+    embestore.close()
+
+
+@pytest.mark.integration
+def test_store_async_retrieval(flow):
+    embestore = JinaEmbeddingStore(embedding_grpc=FLOW_GRPC)
+
+    embeddings = asyncio.run(embestore.aretrieve_embeddings(["ab", "abcde"]))
+
+    assert embeddings[:, 0].tolist() == [2, 5]
+    embestore.close()
+
+
+@pytest.mark.integration
+def test_connection_reconnects(flow):
+    connection = JinaConnection(FLOW_GRPC)
+    document_array = DocumentArray().empty(1)
+    document_array.texts = ["abc"]
+
+    assert connection.is_healthy()
+    connection.reconnect()
+    assert connection.post(document_array).embeddings.shape == (1, EMBEDDING_DIM)
+    connection.close()
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("endpoint, from_blob", [(BLOB_ENDPOINT, True), ("/", False)])
+def test_response_embeddings(flow, endpoint, from_blob):
+    connection = JinaConnection(FLOW_GRPC)
+    document_array = DocumentArray().empty(2)
+    document_array.texts = ["ab", "abc"]
+
+    embeddings = connection.post(document_array, endpoint, response_embeddings)
+
+    assert embeddings.shape == (2, EMBEDDING_DIM)
+    assert embeddings[:, 0].tolist() == [2, 3]
+    assert embeddings.flags.writeable is not from_blob
+    connection.close()
+
+
+@pytest.mark.integration
+def test_connection_unhealthy_without_gateway():
+    assert not JinaConnection("grpc://0.0.0.0:1").is_healthy(timeout=0.2)
+
+
+async def _aio_channel(connection: JinaConnection) -> grpc.aio.Channel:
+    await connection._aio_stub()
+    return connection._aio_channels[asyncio.get_running_loop()]
+
+
+@pytest.mark.unit
+def test_asyncio_channels_of_closed_loops_are_closed():
+    connection = JinaConnection("grpc://0.0.0.0:1")
+
+    first_channel = asyncio.run(_aio_channel(connection))
+    second_channel = asyncio.run(_aio_channel(connection))
+
+    assert first_channel._channel.closed()
+    assert list(connection._aio_channels.values()) == [second_channel]
+    connection.close()
+    assert second_channel._channel.closed()
+    assert connection._aio_channels == {}
+
+
+@pytest.mark.unit
+def test_aclose_closes_the_asyncio_channel():
+    connection = JinaConnection("grpc://0.0.0.0:1")
+
+    async def open_and_close() -> grpc.aio.Channel:
+        channel = await _aio_channel(connection)
+        await connection.aclose()
+        return channel
+
+    assert asyncio.run(open_and_close())._channel.closed()
+    assert connection._aio_channels == {}
+
+
+class UnavailableError(grpc.RpcError):
+    def code(self):
+        return grpc.StatusCode.UNAVAILABLE
+
+
+class FakeConnection:
+    def __init__(self, host: str, fail: bool = False):
+        self.host = host
+        self.fail = fail
+        self.posts = 0
+
+    def post(self, document_array, endpoint="/", decode=None):
+        self.posts += 1
+        if self.fail:
+            raise UnavailableError()
+        return document_array
+
+    def is_healthy(self, timeout=1.0):
+        return not self.fail
+
+    def reconnect(self):
+        pass
+
+
+def _pool(*fails: bool, **kwargs) -> JinaConnectionPool:
+    pool = JinaConnectionPool([f"grpc://replica-{i}:54321" for i in range(len(fails))], **kwargs)
+    pool.connections = [FakeConnection(host, fail) for host, fail in zip(pool.hosts, fails)]
+    return pool
+
+
+@pytest.mark.unit
+def test_pool_picks_least_outstanding_endpoint():
+    pool = _pool(False, False, False)
+
+    assert [pool._acquire(set()) for _ in range(4)] == [0, 1, 2, 0]
+    pool._release(1, failed=False)
+    assert pool._acquire(set()) == 1
+    assert pool.outstanding() == [2, 1, 1]
+
+
+@pytest.mark.unit
+def test_pool_rotates_sequential_requests():
+    pool = _pool(False, False)
+
+    for _ in range(4):
+        pool.post(DocumentArray().empty(1))
+
+    assert [connection.posts for connection in pool.connections] == [2, 2]
+    assert pool.outstanding() == [0, 0]
+
+
+@pytest.mark.unit
+def test_pool_retries_and_marks_unhealthy():
+    pool = _pool(True, False, max_failures=2)
+
+    for _ in range(4):
+        assert len(pool.post(DocumentArray().empty(3))) == 3
+
+    assert pool.connections[0].posts == 2
+    assert pool.unhealthy_hosts == ["grpc://replica-0:54321"]
+    assert pool.outstanding() == [0, 0]
+
+
+@pytest.mark.unit
+def test_pool_raises_after_retries():
+    pool = _pool(True, True, retries=2)
+
+    with pytest.raises(grpc.RpcError):
+        pool.post(DocumentArray().empty(1))
+
+    assert [connection.posts for connection in pool.connections] == [2, 1]
+
+
+@pytest.mark.unit
+def test_pool_health_check():
+    pool = _pool(False, True)
+
+    assert pool.health_check() == [True, False]
+    assert pool.unhealthy_hosts == ["grpc://replica-1:54321"]
+    assert [pool._acquire(set()) for _ in range(2)] == [0, 0]
+
+
+@pytest.mark.unit
+def test_pool_requires_endpoint():
+    with pytest.raises(ValueError):
+        JinaConnectionPool([])
+
+
+@pytest.mark.integration
+def test_store_fails_over_to_healthy_replica(flow):
+    embestore = JinaEmbeddingStore(embedding_grpc=["grpc://0.0.0.0:1", FLOW_GRPC], max_failures=1, batch_size=1)
+    embeddings = embestore.retrieve_embeddings(["a", "ab", "abc", "abcd"])
+
+    assert embeddings[:, 0].tolist() == [1, 2, 3, 4]
+    assert embestore.connection.unhealthy_hosts == ["grpc://0.0.0.0:1"]
+    embestore.close()
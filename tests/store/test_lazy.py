@@ -0,0 +1,85 @@
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from embestore.store.lazy import LazyModel
+from embestore.store.torch import TorchEmbeddingStore
+
+HEAVY_MODULES = ["torch", "transformers", "sentence_transformers", "jina", "onnxruntime"]
+
+
+@pytest.mark.unit
+def test_concurrent_gets_load_once():
+    loads = []
+
+    def load():
+        time.sleep(0.05)
+        loads.append(1)
+        return object()
+
+    model = LazyModel(load)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(model.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert len(set(map(id, results))) == 1
+    assert model.loaded
+
+
+@pytest.mark.unit
+def test_warm_up_loads_in_background():
+    started = threading.Event()
+    model = LazyModel(lambda: started.set() or "model")
+
+    assert not model.loaded
+    assert model.get_if_loaded() is None
+
+    model.warm_up().join()
+
+    assert started.is_set()
+    assert model.get_if_loaded() == "model"
+
+
+@pytest.mark.unit
+def test_failed_load_is_retried():
+    attempts = []
+
+    def load():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("model not found")
+        return "model"
+
+    model = LazyModel(load, warm_up=True)
+    while not attempts:
+        time.sleep(0.01)
+
+    assert model.get() == "model"
+    assert len(attempts) == 2
+
+
+@pytest.mark.unit
+def test_store_loads_model_on_first_miss(tiny_sentence_transformer):
+    embestore = TorchEmbeddingStore(model_name=tiny_sentence_transformer)
+    assert not embestore._model.loaded
+
+    embestore.retrieve_embeddings(["I want to listen the music."])
+
+    assert embestore._model.loaded
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("module", ["embestore.store.torch", "embestore.store.jina", "embestore.store.onnx"])
+def test_store_import_does_not_import_models(module):
+    code = f"import sys, {module}; print(' '.join(sorted(set(sys.modules) & set({HEAVY_MODULES!r}))))"
+
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == ""
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from embestore.store.torch import TorchEmbeddingStore
+
+onnx = pytest.importorskip("embestore.store.onnx")
+
+SENTENCES = ["I want to listen the music.", "a", "Music don't want to listen me, and the music is loud!!", "42"]
+
+
+def _cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+
+
+@pytest.fixture(scope="module")
+def torch_embeddings(tiny_sentence_transformer):
+    return TorchEmbeddingStore(model_name=tiny_sentence_transformer).retrieve_embeddings(SENTENCES)
+
+
+@pytest.mark.unit
+def test_onnx_matches_torch(tiny_sentence_transformer, torch_embeddings, tmp_path):
+    embestore = onnx.OnnxEmbeddingStore(
+        model_name=tiny_sentence_transformer, onnx_path=str(tmp_path), encode_batch_size=3
+    )
+
+    np.testing.assert_allclose(embestore.retrieve_embeddings(SENTENCES), torch_embeddings, atol=1e-4)
+    assert embestore.retrieve_embeddings([]).shape[0] == 0
+
+
+@pytest.mark.unit
+def test_quantized_onnx_is_close_to_torch(tiny_sentence_transformer, torch_embeddings, tmp_path):
+    embestore = onnx.OnnxEmbeddingStore(model_name=tiny_sentence_transformer, onnx_path=str(tmp_path), quantize=True)
+
+    assert _cosine(embestore.retrieve_embeddings(SENTENCES), torch_embeddings).min() > 0.95
+    assert (tmp_path / onnx.QUANTIZED_MODEL_FILE).is_file()
+
+
+@pytest.mark.unit
+def test_exported_model_is_reused(tiny_sentence_transformer, tmp_path, mocker):
+    onnx.OnnxEmbeddingStore(model_name=tiny_sentence_transformer, onnx_path=str(tmp_path)).retrieve_embeddings(["a"])
+    export = mocker.spy(onnx, "export_onnx")
+
+    onnx.OnnxEmbeddingStore(model_name=tiny_sentence_transformer, onnx_path=str(tmp_path)).retrieve_embeddings(["a"])
+
+    export.assert_not_called()
+
+
+@pytest.mark.unit
+def test_invalid_encode_batch_size(tmp_path):
+    with pytest.raises(ValueError):
+        onnx.OnnxEmbeddingStore(onnx_path=str(tmp_path), encode_batch_size=0)
@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+import pytest
+
+from embestore.store.cache import ArrayCache
+from embestore.store.persistence import SegmentLog
+
+
+def _tracked_cache(storage_dtype="float32"):
+    cache = ArrayCache(storage_dtype=storage_dtype)
+    cache.track_changes = True
+
+    return cache
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("storage_dtype", ["float32", "float16", "int8"])
+def test_segments_are_merged_into_the_cache(tmp_path, storage_dtype):
+    embeddings = np.random.default_rng(0).uniform(-1, 1, size=(3, 8))
+    cache = _tracked_cache(storage_dtype)
+    log = SegmentLog(str(tmp_path))
+
+    cache.put(["a", "b", "c"], embeddings)
+    log.append(cache.changes_table())
+    cache.reset_changes()
+    cache.touch(["a", "a"])
+    cache.remove(["b"])
+    cache.put(["b"], embeddings[[2]])
+    cache.remove(["c"])
+    log.append(cache.changes_table())
+
+    loaded_cache = ArrayCache(storage_dtype=storage_dtype)
+    loaded_cache.put_table(SegmentLog(str(tmp_path)).read())
+    results, found = loaded_cache.get(["a", "b", "c"])
+
+    assert loaded_cache.keys() == cache.keys()
+    assert found.tolist() == [True, True, False]
+    assert np.array_equal(results[:2], cache.get(["a", "b"])[0])
+    assert loaded_cache.counts(["a", "b"]).tolist() == [2, 0]
+
+
+@pytest.mark.unit
+def test_segments_are_compacted_in_background(tmp_path):
+    cache = _tracked_cache()
+    log = SegmentLog(str(tmp_path), max_segments=2)
+
+    for i in range(5):
+        cache.put([f"key {i}"], np.full((1, 4), i))
+        cache.touch(["key 0"])
+        log.append(cache.changes_table())
+        cache.reset_changes()
+    log.wait_for_compaction()
+
+    loaded_cache = ArrayCache()
+    loaded_cache.put_table(log.read())
+
+    assert log.segment_count <= 2
+    assert any(name.startswith("compacted") for name in os.listdir(tmp_path))
+    assert loaded_cache.keys() == cache.keys()
+    assert loaded_cache.counts(["key 0"]).tolist() == [5]
+
+
+@pytest.mark.unit
+def test_incompatible_changes_are_detected(tmp_path):
+    cache = _tracked_cache()
+    cache.put(["a"], np.ones((1, 4)))
+    log = SegmentLog(str(tmp_path))
+    log.append(cache.changes_table())
+
+    other_cache = _tracked_cache("int8")
+    other_cache.put(["a"], np.ones((1, 4)))
+
+    assert log.compatible(cache.changes_table())
+    assert not log.compatible(other_cache.changes_table())
@@ -0,0 +1,110 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from embestore.store.redis import RedisCache
+from tests.store.counting import DIM, CountingAsyncEmbeddingStore, CountingEmbeddingStore
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+class BrokenRedis:
+    def pipeline(self, transaction: bool = True):
+        raise ConnectionError("Redis is down")
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.mark.unit
+def test_put_and_get(server):
+    embeddings = np.random.default_rng(0).uniform(-1, 1, size=(3, DIM)).astype(np.float32)
+    cache = RedisCache(client=fakeredis.FakeRedis(server=server), command_keys=2)
+    cache.put(["a", "b", "ü"], embeddings)
+
+    results, found = cache.get(["ü", "missing", "a", "ü"])
+
+    assert len(cache) == 3
+    assert found.tolist() == [True, False, True, True]
+    assert np.array_equal(results[[0, 2, 3]], embeddings[[2, 0, 2]])
+    assert cache.get(["missing"])[0].shape == (1, 0)
+
+
+@pytest.mark.unit
+def test_batch_is_sent_in_one_pipeline(server, mocker):
+    client = fakeredis.FakeRedis(server=server)
+    cache = RedisCache(client=client, command_keys=10)
+    pipeline = mocker.spy(client, "pipeline")
+
+    cache.put([f"sentence {i}" for i in range(25)], np.ones((25, DIM)))
+    cache.get([f"sentence {i}" for i in range(25)])
+
+    assert pipeline.call_count == 2
+
+
+@pytest.mark.unit
+def test_prefixes_and_ttl(server):
+    client = fakeredis.FakeRedis(server=server)
+    cache = RedisCache(client=client, prefix="model-a:", ttl=60)
+    other_cache = RedisCache(client=client, prefix="model-[b]:")
+    cache.put(["a"], np.ones((1, DIM)))
+    other_cache.put(["a", "b"], np.zeros((2, DIM)))
+
+    other_cache.clear()
+
+    assert 0 < client.ttl(b"model-a:a") <= 60
+    assert len(cache) == 1 and len(other_cache) == 0
+    cache.remove(["a"])
+    assert "a" not in cache
+
+
+@pytest.mark.unit
+def test_connection_pool():
+    cache = RedisCache(url="redis://localhost:6379/0", max_connections=4)
+
+    assert cache.client.connection_pool.max_connections == 4
+    cache.close()
+
+
+@pytest.mark.unit
+def test_stores_of_two_hosts_share_the_model_results(server):
+    store = CountingEmbeddingStore(l2_cache=RedisCache(client=fakeredis.FakeRedis(server=server)))
+    other_store = CountingEmbeddingStore(
+        max_size=10, eviction_policy="lru", l2_cache=RedisCache(client=fakeredis.FakeRedis(server=server))
+    )
+
+    store.retrieve_embeddings(["a", "bb"])
+    embeddings = other_store.retrieve_embeddings(["bb", "ccc"])
+    other_store.retrieve_embeddings(["bb"])
+
+    assert store.model_sentences == ["a", "bb"]
+    assert other_store.model_sentences == ["ccc"]
+    assert np.array_equal(embeddings, [[2] * DIM, [3] * DIM])
+    assert other_store.stats["hits"] == 1
+    assert other_store.stats["l2_hits"] == 1
+    assert other_store.l2_cache.get(["ccc"])[1].all()
+
+
+@pytest.mark.unit
+def test_async_store_writes_through(server):
+    l2_cache = RedisCache(client=fakeredis.FakeRedis(server=server))
+    store = CountingAsyncEmbeddingStore(l2_cache=l2_cache)
+
+    asyncio.run(store.aretrieve_embeddings(["a", "bb"]))
+
+    assert l2_cache.get(["a", "bb"])[1].all()
+
+
+@pytest.mark.unit
+def test_unavailable_server_falls_back_to_the_model():
+    store = CountingEmbeddingStore(l2_cache=RedisCache(client=BrokenRedis()))
+
+    embeddings = store.retrieve_embeddings(["a", "bb"])
+
+    assert store.model_sentences == ["a", "bb"]
+    assert np.array_equal(embeddings, [[1] * DIM, [2] * DIM])
+    assert store.stats["l2_misses"] == 2
+    assert "l2_size" not in store.stats
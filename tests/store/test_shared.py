@@ -0,0 +1,169 @@
+import multiprocessing as mp
+import uuid
+from typing import List, Text
+
+import numpy as np
+import pytest
+
+from embestore.store.base import EmbeddingStore
+from embestore.store.shared import SharedMemoryArrayCache
+
+DIM = 4
+
+
+class LengthEmbeddingStore(EmbeddingStore):
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.model_sentences: List[Text] = []
+
+    def _retrieve_embeddings_from_model(self, sentences: List[Text]) -> np.ndarray:
+        self.model_sentences.extend(sentences)
+        return np.array([[len(sentence)] * DIM for sentence in sentences], dtype=np.float32)
+
+
+def _put_from_process(name: Text, capacity: int, keys: List[Text]) -> None:
+    cache = SharedMemoryArrayCache(name, capacity=capacity, dim=DIM)
+    cache.put(keys, np.ones((len(keys), DIM)) * 7)
+    cache.close()
+
+
+@pytest.fixture
+def open_cache():
+    """Open shared caches under one unique name, the block is unlinked after the test."""
+
+    name = f"embestore-test-{uuid.uuid4().hex[:12]}"
+    caches = []
+
+    def open_cache(capacity: int = 8, **kwargs) -> SharedMemoryArrayCache:
+        caches.append(SharedMemoryArrayCache(name, capacity=capacity, dim=DIM, **kwargs))
+        return caches[-1]
+
+    yield open_cache
+    if caches:
+        caches[0].unlink()
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("storage_dtype", ["float32", "float16", "int8"])
+def test_put_and_get(open_cache, storage_dtype):
+    embeddings = np.random.default_rng(0).uniform(-1, 1, size=(3, DIM))
+    cache = open_cache(storage_dtype=storage_dtype)
+    cache.put(["a", "b", "c"], embeddings, counts=[1, 2, 3])
+
+    results, found = cache.get(["c", "missing", "a"])
+
+    assert len(cache) == 3
+    assert found.tolist() == [True, False, True]
+    assert np.allclose(results[[0, 2]], embeddings[[2, 0]], atol=1e-2)
+    assert cache.counts(["a", "b", "c"]).tolist() == [1, 2, 3]
+    assert sorted(cache.keys()) == ["a", "b", "c"]
+
+
+@pytest.mark.unit
+def test_caches_with_the_same_name_share_the_entries(open_cache):
+    writer, reader = open_cache(), open_cache()
+
+    writer.put(["a", "ü"], np.ones((2, DIM)))
+    reader.remove(["a"])
+
+    assert writer.keys() == ["ü"] == reader.keys()
+    assert np.allclose(reader.get(["ü"])[0], 1)
+    assert reader.version == writer.version
+
+
+@pytest.mark.unit
+def test_other_process_writes_are_visible(open_cache):
+    cache = open_cache()
+
+    process = mp.get_context("spawn").Process(target=_put_from_process, args=(cache.name, 8, ["a", "b"]))
+    process.start()
+    process.join()
+
+    assert process.exitcode == 0
+    assert np.allclose(cache.get(["a", "b"])[0], 7)
+
+
+@pytest.mark.unit
+def test_attach_with_other_dimension(open_cache):
+    cache = open_cache()
+
+    with pytest.raises(ValueError):
+        SharedMemoryArrayCache(cache.name, capacity=8, dim=DIM + 1)
+
+
+@pytest.mark.unit
+def test_full_cache_evicts_unreferenced_entries(open_cache):
+    cache, other_cache = open_cache(capacity=4), open_cache(capacity=4)
+    cache.put(["a", "b", "c", "d"], np.ones((4, DIM)))
+    cache.touch(["a", "c"])
+
+    other_cache.put(["e", "f"], np.zeros((2, DIM)))
+
+    assert len(cache) == 4
+    assert sorted(cache.keys()) == ["a", "c", "e", "f"] == sorted(other_cache.keys())
+
+
+@pytest.mark.unit
+def test_batch_larger_than_capacity_keeps_the_last_keys(open_cache):
+    cache = open_cache(capacity=3)
+
+    cache.put(["a", "b", "c", "d", "e"], np.arange(5 * DIM).reshape(5, DIM))
+
+    assert sorted(cache.keys()) == ["c", "d", "e"]
+    assert np.allclose(cache.get(["e"])[0], np.arange(4 * DIM, 5 * DIM))
+
+
+@pytest.mark.unit
+def test_keys_are_compacted_when_the_key_bytes_are_full(open_cache):
+    cache = open_cache(capacity=4, key_bytes=12)
+    cache.put(["aaaa", "bbbb", "cccc"], np.ones((3, DIM)))
+    cache.remove(["aaaa", "bbbb"])
+
+    cache.put(["dddd", "eeee"], np.zeros((2, DIM)))
+
+    assert sorted(cache.keys()) == ["cccc", "dddd", "eeee"]
+    assert cache.get(["cccc", "eeee"])[1].all()
+
+
+@pytest.mark.unit
+def test_remove_keeps_colliding_keys_reachable(open_cache):
+    cache = open_cache(capacity=64)
+    keys = [f"sentence {i}" for i in range(64)]
+    cache.put(keys, np.arange(64 * DIM).reshape(64, DIM))
+
+    cache.remove(keys[::3])
+
+    _, found = cache.get(keys)
+    assert found.tolist() == [i % 3 != 0 for i in range(64)]
+    assert len(cache) == 64 - len(keys[::3])
+
+
+@pytest.mark.unit
+def test_stores_share_the_cache(open_cache):
+    store = LengthEmbeddingStore(cache=open_cache())
+    other_store = LengthEmbeddingStore(cache=open_cache())
+
+    store.retrieve_embeddings(["I want to listen the music."])
+    other_store.retrieve_embeddings(["I want to listen the music."])
+
+    assert other_store.stats["hits"] == 1
+    assert other_store.cache_df.index.to_list() == ["I want to listen the music."]
+
+
+@pytest.mark.unit
+def test_keys_longer_than_the_key_bytes_are_rejected_before_the_model(open_cache):
+    store = LengthEmbeddingStore(cache=open_cache(capacity=2, key_bytes=8), max_in_flight=2)
+
+    for _ in range(2):
+        with pytest.raises(ValueError, match="key bytes"):
+            store.retrieve_embeddings(["short", "a sentence longer than the key bytes"])
+
+    assert store.model_sentences == []
+    assert store._in_flight == {}
+    assert store.retrieve_embeddings(["short"]).tolist() == [[5] * DIM]
+
+
+@pytest.mark.unit
+def test_store_eviction_policy_is_rejected(open_cache):
+    with pytest.raises(ValueError):
+        LengthEmbeddingStore(cache=open_cache(), max_size=4, eviction_policy="lru")
@@ -0,0 +1,58 @@
+import numpy as np
+import pyarrow.parquet as pq
+import pytest
+
+from embestore.store.cache import VALID_COLUMN_ATTRIBUTE, VALID_ROW_ATTRIBUTE
+from embestore.store.sink import write_embeddings
+
+
+def _batches(sizes, dim=4):
+    start = 0
+    for size in sizes:
+        sentences = [str(i) for i in range(start, start + size)]
+        yield sentences, np.arange(start, start + size, dtype=np.float64)[:, None].repeat(dim, axis=1)
+        start += size
+
+
+@pytest.mark.unit
+def test_write_npy(tmp_path):
+    path = str(tmp_path / "embeddings.npy")
+
+    rows = write_embeddings(_batches([3, 3, 1]), path)
+    embeddings = np.load(path)
+
+    assert rows == 7
+    assert embeddings.dtype == np.float32
+    assert embeddings[:, 0].tolist() == list(range(7))
+    assert embeddings.shape == (7, 4)
+
+
+@pytest.mark.unit
+def test_write_parquet(tmp_path):
+    path = str(tmp_path / "embeddings.parquet")
+
+    rows = write_embeddings(_batches([3, 1]), path)
+    table = pq.read_table(path)
+
+    assert rows == 4
+    assert table.column(VALID_ROW_ATTRIBUTE).to_pylist() == ["0", "1", "2", "3"]
+    assert table.column(VALID_COLUMN_ATTRIBUTE).to_pylist()[3] == [3.0] * 4
+
+
+@pytest.mark.unit
+def test_write_npy_with_different_dimension(tmp_path):
+    path = str(tmp_path / "embeddings.npy")
+
+    def batches():
+        yield from _batches([2], dim=4)
+        yield from _batches([2], dim=8)
+
+    with pytest.raises(ValueError):
+        write_embeddings(batches(), path)
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.unit
+def test_write_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        write_embeddings(_batches([1]), str(tmp_path / "embeddings.csv"))
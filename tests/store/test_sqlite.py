@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from embestore.store.sqlite import SqliteCache
+from tests.store.counting import DIM, CountingAsyncEmbeddingStore, CountingEmbeddingStore
+
+
+@pytest.mark.unit
+def test_put_and_get_are_persisted(tmp_path):
+    embeddings = np.random.default_rng(0).uniform(-1, 1, size=(3, DIM)).astype(np.float32)
+    cache = SqliteCache(str(tmp_path / "l2.sqlite"))
+    cache.put(["a", "b", "c"], embeddings)
+    cache.put(["a"], embeddings[[2]])
+    cache.close()
+
+    cache = SqliteCache(str(tmp_path / "l2.sqlite"))
+    results, found = cache.get(["c", "missing", "a", "c"])
+
+    assert len(cache) == 3
+    assert found.tolist() == [True, False, True, True]
+    assert np.array_equal(results[[0, 2, 3]], embeddings[[2, 2, 2]])
+    assert cache.get([])[0].shape == (0, 0)
+
+
+@pytest.mark.unit
+def test_max_size_deletes_least_recently_used(tmp_path):
+    cache = SqliteCache(str(tmp_path / "l2.sqlite"), max_size=2)
+    cache.put(["a"], np.zeros((1, DIM)))
+    cache.put(["b"], np.zeros((1, DIM)))
+    cache.get(["a"])
+
+    cache.put(["c"], np.zeros((1, DIM)))
+
+    assert len(cache) == 2
+    assert "a" in cache and "c" in cache and "b" not in cache
+
+
+@pytest.mark.unit
+def test_threads_share_the_file(tmp_path):
+    cache = SqliteCache(str(tmp_path / "l2.sqlite"))
+
+    def put(i: int) -> None:
+        cache.put([f"sentence {i}"], np.full((1, DIM), i))
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(put, range(32)))
+
+    assert len(cache) == 32
+    assert np.array_equal(cache.get(["sentence 7"])[0], np.full((1, DIM), 7))
+    cache.remove(["sentence 7"])
+    assert len(cache) == 31
+
+
+@pytest.mark.unit
+def test_evicted_entries_are_demoted_and_promoted(tmp_path):
+    store = CountingEmbeddingStore(max_size=2, eviction_policy="lru", l2_cache=SqliteCache(str(tmp_path / "l2.sqlite")))
+    store.retrieve_embeddings(["a", "bb", "ccc"])
+
+    assert store.l2_cache.get(["a"])[1].all()
+
+    embeddings = store.retrieve_embeddings(["a"])
+
+    assert store.model_sentences == ["a", "bb", "ccc"]
+    assert np.array_equal(embeddings, np.ones((1, DIM)))
+    assert "a" in store.cache
+    assert store.stats == {
+        "hits": 0,
+        "misses": 4,
+        "hit_rate": 0.0,
+        "size": 2,
+        "l2_hits": 1,
+        "l2_misses": 3,
+        "l2_hit_rate": 0.25,
+        "l2_size": 2,
+    }
+
+
+@pytest.mark.unit
+def test_failing_demotion_still_evicts(tmp_path, mocker, caplog):
+    store = CountingEmbeddingStore(max_size=2, eviction_policy="lru", l2_cache=SqliteCache(str(tmp_path / "l2.sqlite")))
+    lock_held = []
+
+    def failing_put(sentences, embeddings):
+        lock_held.append(store._lock._is_owned())
+        raise sqlite3.OperationalError("disk I/O error")
+
+    mocker.patch.object(store.l2_cache, "put", side_effect=failing_put)
+
+    with caplog.at_level(logging.WARNING, logger="embestore.store.base"):
+        embeddings = store.retrieve_embeddings(["a", "bb", "ccc"])
+
+    assert np.array_equal(embeddings[:, 0], [1, 2, 3])
+    assert lock_held == [False]
+    assert "Failed to demote" in caplog.text
+    assert len(store.cache) == len(store._eviction) == 2
+    assert "a" not in store.cache and "a" not in store._eviction
+    assert len(store.l2_cache) == 0
+
+
+@pytest.mark.unit
+def test_async_store_searches_the_second_tier(tmp_path):
+    l2_cache = SqliteCache(str(tmp_path / "l2.sqlite"))
+    l2_cache.put(["a"], np.full((1, DIM), 9))
+    store = CountingAsyncEmbeddingStore(l2_cache=l2_cache)
+
+    embeddings = asyncio.run(store.aretrieve_embeddings(["a", "bb"]))
+
+    assert store.model_sentences == ["bb"]
+    assert np.array_equal(embeddings, [[9] * DIM, [2] * DIM])
+    assert store.stats["l2_hits"] == 1
@@ -0,0 +1,122 @@
+import asyncio
+import importlib.util
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pytest
+
+pytest.importorskip("jina")
+pytest.importorskip("sentence_transformers")
+
+EXECUTOR_PATH = Path(__file__).parents[1] / "embedding_models" / "jina" / "executor" / "executor.py"
+DIM = 4
+
+
+def load_executor_module():
+    spec = importlib.util.spec_from_file_location("jina_executor", EXECUTOR_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    return module
+
+
+executor = load_executor_module()
+
+
+class FakeEncoder:
+    """Sentence transformer embedding every text as its length, one token per character."""
+
+    def __init__(self, error: Optional[Exception] = None) -> None:
+        self.error = error
+        self.batches: List[List[str]] = []
+
+    def tokenizer(self, texts: List[str], truncation: bool = True) -> Dict[str, List[List[int]]]:
+        return {"input_ids": [[0] * len(text) for text in texts]}
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return DIM
+
+    def encode(self, texts: List[str], batch_size: int, convert_to_numpy: bool = True) -> np.ndarray:
+        if self.error is not None:
+            raise self.error
+        self.batches.append(list(texts))
+        return np.array([[len(text)] * DIM for text in texts], dtype=np.float32)
+
+
+async def encode_concurrently(batcher, requests: List[List[str]]) -> list:
+    return await asyncio.gather(*[batcher.encode(texts) for texts in requests], return_exceptions=True)
+
+
+@pytest.mark.unit
+def test_requests_within_the_window_are_encoded_together():
+    encoder = FakeEncoder()
+    batcher = executor.EncodingBatcher(encoder, window_ms=50, max_batch_size=64)
+
+    results = asyncio.run(encode_concurrently(batcher, [["a"], ["bb", "ccc"]]))
+
+    assert encoder.batches == [["a", "bb", "ccc"]]
+    assert [result.tolist() for result in results] == [[[1] * DIM], [[2] * DIM, [3] * DIM]]
+    assert batcher.summary()["requests"] == 2
+
+
+@pytest.mark.unit
+def test_full_batch_is_flushed_before_the_window():
+    encoder = FakeEncoder()
+    batcher = executor.EncodingBatcher(encoder, window_ms=60_000, max_batch_size=2)
+
+    results = asyncio.run(asyncio.wait_for(encode_concurrently(batcher, [["a"], ["bb"]]), timeout=5))
+
+    assert encoder.batches == [["a", "bb"]]
+    assert len(results) == 2
+
+
+@pytest.mark.unit
+def test_length_sorted_batches_keep_the_request_order():
+    encoder = FakeEncoder()
+    batcher = executor.EncodingBatcher(encoder, window_ms=50, max_batch_size=2)
+
+    results = asyncio.run(encode_concurrently(batcher, [["dddd", "a"], ["ccc", "bb", "eeeee"]]))
+
+    assert encoder.batches == [["a", "bb"], ["ccc", "dddd"], ["eeeee"]]
+    assert results[0][:, 0].tolist() == [4, 1]
+    assert results[1][:, 0].tolist() == [3, 2, 5]
+    assert batcher.summary()["padding_efficiency"] == 15 / 17
+
+
+@pytest.mark.unit
+def test_encode_error_is_raised_to_every_waiting_request():
+    error = RuntimeError("model error")
+    batcher = executor.EncodingBatcher(FakeEncoder(error=error), window_ms=50, max_batch_size=64)
+
+    results = asyncio.run(encode_concurrently(batcher, [["a"], ["bb"]]))
+
+    assert results == [error, error]
+
+
+@pytest.mark.unit
+def test_batched_embedding_store_sends_the_misses_to_the_batcher():
+    encoder = FakeEncoder()
+    store = executor.create_batched_embedding_store(executor.EncodingBatcher(encoder, window_ms=0, max_batch_size=64))
+
+    asyncio.run(store.aretrieve_embeddings(["a", "bb", "a"]))
+    embeddings = asyncio.run(store.aretrieve_embeddings(["bb"]))
+
+    assert encoder.batches == [["a", "bb"]]
+    assert embeddings.tolist() == [[2] * DIM]
+
+
+@pytest.mark.unit
+def test_executor_without_cache_does_not_import_embestore():
+    code = (
+        "import importlib.util, sys; "
+        f"spec = importlib.util.spec_from_file_location('jina_executor', {str(EXECUTOR_PATH)!r}); "
+        "spec.loader.exec_module(importlib.util.module_from_spec(spec)); "
+        "print(' '.join(module for module in sys.modules if module.startswith('embestore')))"
+    )
+
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == ""